@@ -0,0 +1,162 @@
+"""
+キャンセルしてから BatchEngine.run() が戻るまでの時間（キャンセル → 待機状態）
+
+    python benchmarks/bench_cancel.py --pages 4000 --after 1.0
+
+PDF 側のシナリオは仕上げ（st_finalizing）に入ってから、Office 側は変換に入ってから
+--after 秒後に cancel_event をセットし、run() が戻るまでを測る。
+途中まで書いた出力（一時ファイル含む）が出力フォルダに残っていないかも確認する。
+
+- merge        : 全結合（分割書き出し）+ 透かし・ページ番号
+- merge_whole  : 全結合（merge_max_open=0、最後にまとめて書く）
+- one_file     : 大きな1ファイルに透かし・ページ番号を付けて出力
+- split_page   : 1ページずつに分割
+- excel        : シートの多いブック（偽 Excel、1シート --sheet-secs 秒）
+- word         : エクスポート中の Word（偽 Word、1件 --export-secs 秒）。実行中の Office を止める
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from pypdf import PdfReader, PdfWriter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine, make_file_info  # noqa: E402
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+from office2pdf.sheets import fill_excel_sheets  # noqa: E402
+
+STAMP = {
+    "wm1_text": "CONFIDENTIAL",
+    "wm1_pos": "diag",
+    "wm2_text": "{name} p.{pseq}",
+    "wm2_pos": "tr",
+    "wm_font": "Vera",
+    "pg_enabled": True,
+}
+
+
+def make_big_pdf(path, pages, base):
+    """base（数ページ）を繰り返して pages ページの PDF を作る"""
+    src = PdfReader(base)
+    w = PdfWriter()
+    for k in range(pages):
+        w.add_page(src.pages[k % len(src.pages)])
+    with open(path, "wb") as f:
+        w.write(f)
+    return path
+
+
+def measure(files, settings, backend, after, out, phase):
+    fill_excel_sheets(files, use_com=False)
+    cfg = AppConfig(output_dir=out, out_mode="folder", auto_open=False, **settings)
+    cancel = threading.Event()
+    logs = []
+    engine = BatchEngine(
+        cfg, files, backend=backend, cancel_event=cancel, on_exists=lambda d: True, font_map=corpus.FONT_MAP
+    )
+    engine.log = logs.append
+    result = {}
+    started = threading.Event()
+
+    def progress(**kw):
+        if kw.get("label", "").startswith(engine._(phase)):
+            started.set()
+
+    engine.progress = progress
+
+    def _run():
+        try:
+            result["outputs"] = engine.run()
+        except BaseException as e:
+            result["error"] = e
+
+    t = threading.Thread(target=_run)
+    t0 = time.perf_counter()
+    t.start()
+    while not started.wait(0.01) and t.is_alive():
+        pass
+    t.join(after)
+    if not t.is_alive():
+        return None, time.perf_counter() - t0, result, []
+    cancel.set()
+    t_cancel = time.perf_counter()
+    t.join()
+    latency = time.perf_counter() - t_cancel
+    # 出力に残ったもののうち、完成していないもの（壊れている・一時ファイル）
+    broken = []
+    for name in os.listdir(out):
+        p = os.path.join(out, name)
+        try:
+            PdfReader(p).pages[0]
+        except Exception:
+            broken.append(name)
+    return latency, time.perf_counter() - t0, result, broken
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=4000)
+    ap.add_argument("--after", type=float, default=1.0, help="キャンセルするまでの秒数")
+    ap.add_argument("--sheets", type=int, default=200)
+    ap.add_argument("--sheet-secs", type=float, default=0.2)
+    ap.add_argument("--export-secs", type=float, default=30.0)
+    ap.add_argument("--only", nargs="+")
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_cancel_")
+    try:
+        base = corpus.make_pdf(os.path.join(d, "_base.pdf"), 5)
+        big = make_big_pdf(os.path.join(d, "big.pdf"), args.pages, base)
+        parts = [make_big_pdf(os.path.join(d, f"part_{i}.pdf"), args.pages // 10, base) for i in range(10)]
+        book = corpus.make_book(os.path.join(d, "book.xlsx"), corpus.sheet_names(args.sheets))
+        doc = corpus.make_word(os.path.join(d, "doc.docx"), 3)
+
+        def infos(paths):
+            return [make_file_info(p) for p in paths]
+
+        scenarios = {
+            "merge": (infos(parts), {"merge_all": True, "naming_tpl": "merged", **STAMP}, FakeBackend()),
+            "merge_whole": (
+                infos(parts),
+                {"merge_all": True, "naming_tpl": "merged", "merge_max_open": 0, **STAMP},
+                FakeBackend(),
+            ),
+            "one_file": (infos([big]), dict(STAMP), FakeBackend()),
+            "split_page": (infos([big]), {"split_pdf_page": True, "naming_tpl": "{name}_{pseq}"}, FakeBackend()),
+            "excel": (
+                infos([book]),
+                {"split_excel_sheet": True, "naming_tpl": "{name}_{sheet}"},
+                FakeBackend(export_latency=args.sheet_secs, sheets=corpus.sheet_names(args.sheets), template=base),
+            ),
+            "word": (infos([doc]), {}, FakeBackend(export_latency=args.export_secs, template=base)),
+        }
+        print(f"cancel after {args.after}s")
+        for name, (files, settings, backend) in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            out = tempfile.mkdtemp(dir=d, prefix="out_")
+            phase = "st_conv_file" if name in ("excel", "word") else "st_finalizing"
+            latency, total, result, broken = measure(files, settings, backend, args.after, out, phase)
+            if latency is None:
+                print(f"  {name:12} finished before cancel ({total:.2f}s)")
+                continue
+            err = f"  error={result['error']!r}" if "error" in result else ""
+            print(
+                f"  {name:12} cancel→idle {latency:7.3f}s  outputs={len(result.get('outputs', []))}"
+                f"  left in out dir={len(os.listdir(out))} (broken {len(broken)}){err}"
+            )
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
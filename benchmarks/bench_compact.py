@@ -0,0 +1,98 @@
+"""
+コンパクト出力（compact_output）の効果と時間
+
+    python benchmarks/bench_compact.py --docs 300 --pages 3
+
+同じロゴ画像と埋め込みフォント（Vera）を使う帳票 PDF を --docs 個作って全結合し、
+compact_output なし / ありで出力サイズと時間を比べる（--password で暗号化も付ける）。
+Office から出力した帳票を結合すると、ファイルごとに同じフォント・ロゴが入っているのと同じ状況。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from PIL import Image
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine, make_file_info  # noqa: E402
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+
+# フォントのサブセットが全ファイルで同じになるよう、使う文字をそろえる
+TEXT = "Monthly report 0123456789 - Sales / Cost / Profit"
+
+
+def make_docs(d, n, pages):
+    logo = os.path.join(d, "logo.png")
+    Image.radial_gradient("L").resize((400, 400)).convert("RGB").save(logo)
+    pdfmetrics.registerFont(TTFont("Vera", "Vera.ttf"))
+    paths = []
+    for i in range(n):
+        p = os.path.join(d, f"doc_{i:05d}.pdf")
+        c = canvas.Canvas(p, pagesize=A4)
+        for pg in range(pages):
+            c.drawImage(logo, 40, 740, 80, 80)
+            c.setFont("Vera", 11)
+            for line in range(40):
+                c.drawString(60, 700 - line * 16, f"{TEXT} {(i * 7 + pg * 3 + line) % 10}")
+            c.showPage()
+        c.save()
+        paths.append(p)
+    return paths
+
+
+def run(paths, out, **kw):
+    cfg = AppConfig(output_dir=out, out_mode="folder", naming_tpl="merged", merge_all=True, **kw)
+    logs = []
+    engine = BatchEngine(cfg, [make_file_info(p) for p in paths], backend=FakeBackend(), on_exists=lambda d: True)
+    engine.log = logs.append
+    t0 = time.perf_counter()
+    outputs = engine.run()
+    secs = time.perf_counter() - t0
+    reader = PdfReader(outputs[0])
+    if reader.is_encrypted:
+        reader.decrypt(kw.get("password", ""))
+    assert len(reader.pages) == len(paths) * len(PdfReader(paths[0]).pages)
+    assert TEXT in reader.pages[-1].extract_text()
+    return secs, os.path.getsize(outputs[0])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=300)
+    ap.add_argument("--pages", type=int, default=3)
+    ap.add_argument("--password", default="")
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_compact_")
+    try:
+        paths = make_docs(d, args.docs, args.pages)
+        out = os.path.join(d, "out")
+        os.makedirs(out)
+        print(f"{args.docs} docs x {args.pages} pages{' (encrypted)' if args.password else ''}")
+        base = None
+        for label, kw in (
+            ("plain", {}),
+            ("compress", {"compress_pdf": True}),
+            ("compact", {"compact_output": True}),
+            ("compress+compact", {"compress_pdf": True, "compact_output": True}),
+        ):
+            secs, size = run(paths, out, password=args.password, **kw)
+            base = base or size
+            print(f"  {label:17} {secs:7.2f}s  {size / 1024:9.0f} KB  ({size / base:.0%})")
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
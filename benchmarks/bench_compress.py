@@ -0,0 +1,94 @@
+"""
+「PDF軽量化」（画像縮小）の効果と時間
+
+    python benchmarks/bench_compress.py --scans 40 --dpi 150 --quality 75 --workers 4
+
+300dpi の A4 スキャン（JPEG）を1ページずつの PDF にしたものを全結合し、
+compress_pdf なし / ありで出力サイズと時間を比べる。--unique を指定すると全ページ別の画像になる
+（指定しなければ同じ画像が繰り返されるので、ハッシュによる使い回しも効く）。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine, make_file_info  # noqa: E402
+from office2pdf.imagepdf import image_to_pdf  # noqa: E402
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+
+
+def make_scans(d, n, unique):
+    size = (2480, 3508)
+    paths = []
+    for i in range(n):
+        if i == 0 or unique:
+            img = Image.merge(
+                "RGB",
+                [
+                    Image.linear_gradient("L").rotate(i * 7).resize(size),
+                    Image.effect_noise(size, 25).convert("L"),
+                    Image.radial_gradient("L").resize(size),
+                ],
+            )
+            jpg = os.path.join(d, f"scan_{i}.jpg")
+            img.save(jpg, quality=90, dpi=(300, 300))
+        p = os.path.join(d, f"scan_{i}.pdf")
+        image_to_pdf(jpg, p)
+        paths.append(p)
+    return paths
+
+
+def run(paths, out, **kw):
+    cfg = AppConfig(output_dir=out, out_mode="folder", naming_tpl="merged", merge_all=True, **kw)
+    logs = []
+    engine = BatchEngine(cfg, [make_file_info(p) for p in paths], backend=FakeBackend(), on_exists=lambda d: True)
+    engine.log = logs.append
+    t0 = time.perf_counter()
+    outputs = engine.run()
+    return time.perf_counter() - t0, os.path.getsize(outputs[0])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scans", type=int, default=40)
+    ap.add_argument("--unique", action="store_true", help="ページごとに別の画像にする")
+    ap.add_argument("--dpi", type=int, default=150)
+    ap.add_argument("--quality", type=int, default=75)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_compress_")
+    try:
+        paths = make_scans(d, args.scans, args.unique)
+        out = os.path.join(d, "out")
+        os.makedirs(out)
+        secs, size = run(paths, out)
+        print(f"{args.scans} scans (A4 300dpi{', unique' if args.unique else ''})")
+        print(f"  off              {secs:7.2f}s  {size / 2**20:8.1f} MiB")
+        for w in args.workers:
+            secs, size2 = run(
+                paths,
+                out,
+                compress_pdf=True,
+                image_dpi=args.dpi,
+                image_quality=args.quality,
+                image_workers=w,
+            )
+            print(
+                f"  {args.dpi}dpi q{args.quality} x{w:<3} {secs:7.2f}s  {size2 / 2**20:8.1f} MiB"
+                f"  ({size2 / size:.0%} of original)"
+            )
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
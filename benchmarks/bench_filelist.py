@@ -0,0 +1,158 @@
+"""
+ファイルリスト（Treeview）の更新にかかる時間をリストの長さごとに測る
+
+    python benchmarks/bench_filelist.py --sizes 100 1000 10000
+
+- full    : 以前の update_tree（全行削除 → 全行再挿入、行ごとに apply_tags）
+- virtual : FileListView（差分だけ更新、表示中の行だけプレビュー計算）
+
+計るのは「命名ルールを1文字変えた」「1行移動した」「1行削除した」時に、画面が更新されるまでの時間。
+ディスプレイが無い環境（CI 等）では Treeview の代わりに同じメソッドを持つ簡易版で測る
+（Tk 自体の描画コストは入らないので、Python 側の処理量の比較になる）。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.engine import apply_tags, make_file_info  # noqa: E402
+from office2pdf.filelist import FileListView  # noqa: E402
+
+VISIBLE_ROWS = 8  # GUI の Treeview(height=8)
+
+
+class _ListTree:
+    """ディスプレイが無い時の ttk.Treeview 代わり（行の順序と値だけ持つ）"""
+
+    def __init__(self):
+        self.order = []
+        self.values = {}
+        self._n = 0
+        self.top = 0
+
+    def insert(self, parent, index, iid=None, values=()):
+        if iid is None:
+            self._n += 1
+            iid = f"I{self._n}"
+        self.order.append(iid)
+        self.values[iid] = list(values)
+        return iid
+
+    def delete(self, *iids):
+        drop = set(iids)
+        self.order = [i for i in self.order if i not in drop]
+        for i in iids:
+            self.values.pop(i, None)
+
+    def get_children(self, item=""):
+        return tuple(self.order)
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def item(self, iid, values=None):
+        if values is not None:
+            self.values[iid] = list(values)
+
+    def set(self, iid, column, value):
+        self.values[iid][3] = value
+
+    def selection(self):
+        return ()
+
+    def yview(self):
+        n = max(1, len(self.order))
+        return self.top / n, min(1.0, (self.top + VISIBLE_ROWS) / n)
+
+    def update(self):
+        pass
+
+
+def make_tree():
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+
+        root = tk.Tk()
+        root.withdraw()
+        tree = ttk.Treeview(root, columns=("Type", "Name", "Range", "Out"), show="headings", height=VISIBLE_ROWS)
+        tree.pack()
+        return tree, root.update, "ttk.Treeview"
+    except Exception:
+        tree = _ListTree()
+        return tree, tree.update, "list stand-in (no display)"
+
+
+def make_files(n):
+    return [make_file_info(rf"C:\data\project_{i // 100}\report_{i:05d}.docx") for i in range(n)]
+
+
+def preview(f, idx, tpl, total):
+    u = {"orig": f, "sheet": "", "fseq": idx}
+    return f"{apply_tags(tpl, u, idx, idx, 1, total=total)}.pdf"
+
+
+def full_rebuild(tree, files, tpl):
+    # 以前の update_tree と同じ処理
+    tree.delete(*tree.get_children())
+    for f in files:
+        idx = files.index(f) + 1
+        tree.insert("", "end", values=(f["type"], os.path.basename(f["path"]), f["range"], preview(f, idx, tpl, len(files))))
+
+
+def timed(fn, update):
+    t0 = time.perf_counter()
+    fn()
+    update()
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--max-full", type=int, default=10000, help="full 方式はこの件数までしか測らない（遅いので）")
+    args = ap.parse_args()
+
+    tree, update, kind = make_tree()
+    print(f"tree: {kind}")
+    print(f"{'rows':>6}  {'mode':8} {'rename':>10} {'move':>10} {'remove':>10}   (ms)")
+
+    for n in args.sizes:
+        if n <= args.max_full:
+            files = make_files(n)
+            r = timed(lambda: full_rebuild(tree, files, "{seq}_{name}"), update)
+            files[0], files[1] = files[1], files[0]
+            m = timed(lambda: full_rebuild(tree, files, "{seq}_{name}"), update)
+            del files[0]
+            d = timed(lambda: full_rebuild(tree, files, "{seq}_{name}"), update)
+            print(f"{n:6d}  {'full':8} {r:10.1f} {m:10.1f} {d:10.1f}")
+            tree.delete(*tree.get_children())
+
+        files = []
+        tpl = ["{seq}_{name}"]
+        view = FileListView(
+            tree, files, lambda f, idx: preview(f, idx, tpl[0], len(files)), lambda ms, fn: fn, lambda token: None
+        )
+        # 計測前にリストを作っておく（追加自体はバッチの取り込み側の話）
+        view.append(make_files(n))
+        update()
+
+        def rename():
+            tpl[0] = "{seq}-{name}"
+            view.invalidate()
+            view.flush()
+
+        r = timed(rename, update)
+        m = timed(lambda: (view.move(files[0], 1), view.flush()), update)
+        d = timed(lambda: (view.remove([files[0]]), view.flush()), update)
+        print(f"{n:6d}  {'virtual':8} {r:10.1f} {m:10.1f} {d:10.1f}")
+        view.clear()
+        update()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+finalize_units（透かし + ページ番号）の速度と出力サイズ
+
+    python benchmarks/bench_finalize.py --pages 2000
+
+フォントは reportlab 同梱の Vera.ttf を埋め込む（Windows のレジストリが無くても動くように）。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reportlab  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine  # noqa: E402
+from office2pdf.office_pool import FakeBackend, write_stub_pdf  # noqa: E402
+
+VERA = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=2000)
+    ap.add_argument("--files", type=int, default=4, help="入力PDFの数（ページは均等に分ける）")
+    args = ap.parse_args()
+
+    cfg = AppConfig(
+        wm1_text="CONFIDENTIAL",
+        wm1_pos="diag",
+        wm2_text="{name} p.{pseq}",
+        wm2_pos="tr",
+        wm_font="Vera",
+        pg_enabled=True,
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        srcs = []
+        for i in range(args.files):
+            p = os.path.join(tmp_dir, f"src_{i}.pdf")
+            write_stub_pdf(p, args.pages // args.files)
+            srcs.append(p)
+        files = [{"path": p, "type": "PDF", "range": "", "sheets": []} for p in srcs]
+        units = [{"path": p, "orig": f, "sheet": "", "fseq": n + 1} for n, (p, f) in enumerate(zip(srcs, files))]
+        engine = BatchEngine(cfg, files, backend=FakeBackend(), font_map={"Vera": (VERA, 0)})
+
+        dest = os.path.join(tmp_dir, "out.pdf")
+        t0 = time.perf_counter()
+        engine.finalize_units(units, dest)
+        elapsed = time.perf_counter() - t0
+        pages = (args.pages // args.files) * args.files
+        print(f"{pages} pages  {elapsed:6.2f}s  {pages / elapsed:8.1f} pages/s  output {os.path.getsize(dest) / 1024:,.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+画像 → PDF 変換（convert_image）の速さと出力サイズ
+
+    python benchmarks/bench_images.py --images 200 --size 2480x3508
+
+- pillow      : 以前の方法（Pillow でデコード → RGB → save(out, "PDF") で JPEG 再圧縮）
+- passthrough : office2pdf.imagepdf.image_to_pdf（JPEG はそのまま、PNG は IDAT をそのまま埋め込む）
+
+スキャン画像の代わりにノイズ入りのグラデーション画像を JPEG / PNG で作って使う。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.imagepdf import image_to_pdf  # noqa: E402
+
+
+def make_images(d, n, size, fmt):
+    base = Image.merge(
+        "RGB",
+        [
+            Image.linear_gradient("L").resize(size),
+            Image.effect_noise(size, 40).convert("L"),
+            Image.radial_gradient("L").resize(size),
+        ],
+    )
+    base.save(os.path.join(d, f"img_0.{fmt}"), dpi=(300, 300), **({"quality": 85} if fmt == "jpg" else {}))
+    src = os.path.join(d, f"img_0.{fmt}")
+    paths = [src]
+    for i in range(1, n):
+        p = os.path.join(d, f"img_{i}.{fmt}")
+        shutil.copyfile(src, p)
+        paths.append(p)
+    return paths
+
+
+def old_convert(src, out):
+    with Image.open(src) as img:
+        img.convert("RGB").save(out, "PDF")
+
+
+def run(paths, fn):
+    t0 = time.perf_counter()
+    out_bytes = 0
+    for p in paths:
+        out = p + ".pdf"
+        fn(p, out)
+        out_bytes += os.path.getsize(out)
+    return time.perf_counter() - t0, out_bytes
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", type=int, default=100)
+    ap.add_argument("--size", default="2480x3508", help="画像サイズ（既定: A4 300dpi）")
+    ap.add_argument("--formats", nargs="+", default=["jpg", "png"])
+    args = ap.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    for fmt in args.formats:
+        d = tempfile.mkdtemp(prefix="o2p_img_")
+        try:
+            paths = make_images(d, args.images, size, fmt)
+            in_bytes = sum(os.path.getsize(p) for p in paths)
+            print(f"{fmt}: {args.images} x {size[0]}x{size[1]}  input {in_bytes / 2**20:.1f} MiB")
+            for label, fn in (("pillow", old_convert), ("passthrough", image_to_pdf)):
+                secs, out_bytes = run(paths, fn)
+                print(
+                    f"  {label:12} {secs:7.2f}s  {args.images / secs:7.1f} img/s"
+                    f"  output {out_bytes / 2**20:7.1f} MiB ({out_bytes / in_bytes:.2f}x input)"
+                )
+        finally:
+            shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+フォルダ追加の速さを比べる（一時フォルダにダミーファイルのツリーを作って読む）
+
+    python benchmarks/bench_ingest.py --files 50000 --per-dir 200
+
+- old    : 以前の add_folder / add_files_worker（os.listdir、重複は any() で全件比較）
+           ※ 直下しか読まないので、比較のため各フォルダに対して呼ぶ
+- ingest : office2pdf.ingest.ingest（os.scandir で再帰、正規化パスの索引、500件ずつ追加）
+
+first = 最初のまとまりがリストに届くまでの時間
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.engine import make_file_info  # noqa: E402
+from office2pdf.ingest import PathIndex, ingest  # noqa: E402
+
+EXTS = (".docx", ".xlsx", ".pdf", ".png", ".txt")
+
+
+def make_tree(root, n, per_dir):
+    for i in range(n):
+        d = os.path.join(root, f"dept_{i // (per_dir * 10):03d}", f"box_{i // per_dir:04d}")
+        if i % per_dir == 0:
+            os.makedirs(d, exist_ok=True)
+        open(os.path.join(d, f"doc_{i:06d}{EXTS[i % len(EXTS)]}"), "wb").close()
+
+
+def old_add(files, paths):
+    new_files = []
+    for p in paths:
+        info = make_file_info(p)
+        if info is None or any(f["path"] == p for f in files):
+            continue
+        new_files.append(info)
+    files.extend(new_files)
+
+
+def run_old(root):
+    files = []
+    for d, _, names in sorted(os.walk(root)):
+        old_add(files, [os.path.join(d, f) for f in os.listdir(d)])
+    return len(files)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=50000)
+    ap.add_argument("--per-dir", type=int, default=200)
+    ap.add_argument("--max-old", type=int, default=20000, help="old はこの件数までしか測らない（遅いので）")
+    args = ap.parse_args()
+
+    root = tempfile.mkdtemp(prefix="o2p_ingest_")
+    try:
+        make_tree(root, args.files, args.per_dir)
+        print(f"tree: {args.files} files ({args.per_dir}/dir)")
+
+        if args.files <= args.max_old:
+            t0 = time.perf_counter()
+            n = run_old(root)
+            print(f"old     : {n:6d} files  {time.perf_counter() - t0:8.2f}s")
+
+        batches = []
+        first = []
+        t0 = time.perf_counter()
+
+        def on_batch(b):
+            if not first:
+                first.append(time.perf_counter() - t0)
+            batches.append(len(b))
+
+        n = ingest([root], PathIndex(), on_batch)
+        total = time.perf_counter() - t0
+        print(f"ingest  : {n:6d} files  {total:8.2f}s  first={first[0] * 1000:.0f}ms  batches={len(batches)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
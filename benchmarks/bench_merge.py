@@ -0,0 +1,132 @@
+"""
+全結合（merge_all）のピークメモリと同時に開いたファイル数を、入力ファイル数を変えて測る
+
+    python benchmarks/bench_merge.py --files 250 1000 3000
+    python benchmarks/bench_merge.py --files 1000 --max-open 0   # 従来の全部開いてから書く方式
+
+1回ずつ別プロセスで実行して、そのプロセスのピーク RSS を取る（psutil があれば使う）。
+開いているファイル数は実行前からの増分。
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reportlab  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine  # noqa: E402
+from office2pdf.office_pool import FakeBackend, write_stub_pdf  # noqa: E402
+
+VERA = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+
+def peak_rss_mb() -> float:
+    try:
+        import psutil
+
+        mi = psutil.Process().memory_info()
+        return getattr(mi, "peak_wset", mi.rss) / 1024 / 1024
+    except ImportError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def count_open_files() -> int:
+    try:
+        import psutil
+
+        p = psutil.Process()
+        return p.num_handles() if hasattr(p, "num_handles") else p.num_fds()
+    except ImportError:
+        return len(os.listdir("/proc/self/fd"))
+
+
+def child(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = []
+        for i in range(args.files):
+            p = os.path.join(tmp_dir, f"in_{i}.pdf")
+            write_stub_pdf(p, args.pages)
+            f = {"path": p, "type": "PDF", "range": "", "sheets": []}
+            files.append(f)
+
+        cfg = AppConfig(
+            output_dir=tmp_dir,
+            out_mode="folder",
+            merge_all=True,
+            merge_max_open=args.max_open,
+            wm1_text="CONFIDENTIAL",
+            wm1_pos="diag",
+            wm_font="Vera",
+            pg_enabled=True,
+        )
+        engine = BatchEngine(cfg, files, backend=FakeBackend(), font_map={"Vera": (VERA, 0)})
+
+        # 開いているファイル数の最大値は別スレッドで見張る
+        state = {"max": 0, "stop": False}
+
+        def watch():
+            while not state["stop"]:
+                state["max"] = max(state["max"], count_open_files())
+                time.sleep(0.005)
+
+        base = count_open_files()
+        th = threading.Thread(target=watch, daemon=True)
+        th.start()
+        t0 = time.perf_counter()
+        try:
+            out = engine.run()
+        finally:
+            state["stop"] = True
+            th.join()
+        elapsed = time.perf_counter() - t0
+
+        print(
+            json.dumps(
+                {
+                    "files": args.files,
+                    "pages": args.files * args.pages,
+                    "max_open": args.max_open,
+                    "seconds": round(elapsed, 2),
+                    "peak_rss_mb": round(peak_rss_mb(), 1),
+                    "max_open_files": state["max"] - base,
+                    "output_kib": os.path.getsize(out[0]) // 1024,
+                }
+            )
+        )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, nargs="+", default=[250, 1000, 3000])
+    ap.add_argument("--pages", type=int, default=3, help="1ファイルあたりのページ数")
+    ap.add_argument("--max-open", type=int, default=32, help="0=全部開いてから書く")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        args.files = args.files[0]
+        child(args)
+        return
+
+    for n in args.files:
+        cmd = [sys.executable, __file__, "--child", "--files", str(n), "--pages", str(args.pages)]
+        cmd += ["--max-open", str(args.max_open)]
+        r = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+        print(
+            f"{r['files']:5d} files {r['pages']:6d} pages  {r['seconds']:7.2f}s  "
+            f"peak RSS {r['peak_rss_mb']:7.1f} MB  open files {r['max_open_files']:5d}  output {r['output_kib']:,} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
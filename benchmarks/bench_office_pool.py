@@ -0,0 +1,49 @@
+"""
+OfficePool のベンチマーク（FakeBackend を使うので Linux でも動く）
+
+    python benchmarks/bench_office_pool.py --docs 200 --launch 0.05 --export 0.005
+
+毎回起動（max_uses=1 = 従来の DispatchEx → Quit 相当）と常駐プールを比較する。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.converters import convert_word  # noqa: E402
+from office2pdf.office_pool import FakeBackend, OfficePool  # noqa: E402
+
+
+def run(docs: int, max_uses: int, launch: float, export: float) -> dict:
+    backend = FakeBackend(launch_latency=launch, export_latency=export)
+    with tempfile.TemporaryDirectory() as tmp_dir, OfficePool(backend, max_uses=max_uses) as pool:
+        t0 = time.perf_counter()
+        for i in range(docs):
+            ok = convert_word({"path": f"doc_{i}.docx"}, os.path.join(tmp_dir, f"{i}.pdf"), pool)
+            assert ok
+        elapsed = time.perf_counter() - t0
+    return {"max_uses": max_uses, "seconds": elapsed, "docs_per_sec": docs / elapsed, "launches": backend.launches}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=200)
+    ap.add_argument("--launch", type=float, default=0.05, help="模擬起動時間(秒)")
+    ap.add_argument("--export", type=float, default=0.005, help="模擬エクスポート時間(秒)")
+    ap.add_argument("--recycle", type=int, default=50)
+    args = ap.parse_args()
+
+    for max_uses in (1, args.recycle, 0):
+        r = run(args.docs, max_uses, args.launch, args.export)
+        print(
+            f"max_uses={r['max_uses']:>4}  {r['seconds']:7.2f}s  "
+            f"{r['docs_per_sec']:8.1f} docs/s  launches={r['launches']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
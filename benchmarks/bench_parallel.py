@@ -0,0 +1,65 @@
+"""
+直列変換とマルチプロセス並列変換の比較（FakeBackend を使うので Linux でも動く）
+
+    python benchmarks/bench_parallel.py --docs 40 --workers 4 --export 0.2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.converters import convert_file  # noqa: E402
+from office2pdf.office_pool import FakeBackend, OfficePool  # noqa: E402
+from office2pdf.parallel import iter_parallel  # noqa: E402
+
+
+def make_files(n: int):
+    kinds = [("Word", ".docx"), ("Excel", ".xlsx")]
+    return [
+        {"path": f"doc_{i}{kinds[i % 2][1]}", "type": kinds[i % 2][0], "range": "全ページ", "sheets": []}
+        for i in range(n)
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=40)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--launch", type=float, default=0.5, help="模擬起動時間(秒)")
+    ap.add_argument("--export", type=float, default=0.2, help="模擬エクスポート時間(秒)")
+    args = ap.parse_args()
+
+    files = make_files(args.docs)
+    backend = FakeBackend(launch_latency=args.launch, export_latency=args.export)
+    cfg = AppConfig(parallel=True, parallel_workers={"Word": args.workers, "Excel": args.workers})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        t0 = time.perf_counter()
+        with OfficePool(backend) as pool:
+            serial = [convert_file(f, i, tmp_dir, cfg, pool) for i, f in enumerate(files)]
+        t_serial = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        t0 = time.perf_counter()
+        results = {}
+        for i, units, _logs, _hits, _secs, err in iter_parallel(files, tmp_dir, cfg, backend):
+            assert err is None, err
+            results[i] = units
+        t_parallel = time.perf_counter() - t0
+        ordered = [results[i] for i in range(len(files))]
+
+    # 並び順を組み直せば直列と同じ一時ファイル名になる
+    assert [[os.path.basename(p) for p, _, _ in u] for u in ordered] == [
+        [os.path.basename(p) for p, _, _ in u] for u in serial
+    ]
+    print(f"serial   : {t_serial:6.2f}s  {args.docs / t_serial:6.1f} files/s")
+    print(f"parallel : {t_parallel:6.2f}s  {args.docs / t_parallel:6.1f} files/s  (workers/type={args.workers})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+全部変換してから仕上げる（pipeline_depth=0）と、変換し終えたファイルから仕上げる（pipeline_depth>0）の比較。
+偽 Office なので Linux でも動く。
+
+    python benchmarks/bench_pipeline.py --docs 40 --pages 20 --export 0.2
+
+Word ファイルをページごとに分割し、透かし・圧縮を付けて出力する。
+最初の出力が現れるまでの時間・全体の時間（makespan）と、出力が両方で同じになるかを表示する。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine, make_file_info  # noqa: E402
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+
+
+def run(paths, out, depth, args, template):
+    cfg = AppConfig(
+        output_dir=out,
+        out_mode="folder",
+        auto_open=False,
+        split_word_page=True,
+        naming_tpl="{seq}_{name}_{pseq}",
+        wm1_text="CONFIDENTIAL {pseq}/{ptotal}",
+        wm1_pos="diag",
+        wm_font="Vera",
+        compress_pdf=True,
+        pipeline_depth=depth,
+    )
+    engine = BatchEngine(
+        cfg,
+        [make_file_info(p) for p in paths],
+        backend=FakeBackend(args.launch, args.export, template=template),
+        on_exists=lambda dest: False,
+        font_map=corpus.FONT_MAP,
+    )
+    t0 = time.perf_counter()
+    outputs = engine.run()
+    return outputs, engine.first_output_secs, time.perf_counter() - t0
+
+
+def signature(outputs):
+    return [(os.path.basename(o), len(PdfReader(o).pages), os.path.getsize(o)) for o in outputs]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=40)
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--launch", type=float, default=0.5, help="模擬 Office 起動時間(秒)")
+    ap.add_argument("--export", type=float, default=0.2, help="模擬エクスポート時間(秒)")
+    ap.add_argument("--depth", type=int, default=4, help="段の間に溜める数")
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_pipeline_")
+    try:
+        template = corpus.make_pdf(os.path.join(d, "_export.pdf"), args.pages)
+        paths = [corpus.make_word(os.path.join(d, f"doc_{i:03d}.docx"), args.pages) for i in range(args.docs)]
+        sigs = []
+        for label, depth in (("two-phase", 0), (f"pipeline({args.depth})", args.depth)):
+            out = tempfile.mkdtemp(dir=d, prefix="out_")
+            outputs, first, total = run(paths, out, depth, args, template)
+            sigs.append(signature(outputs))
+            print(f"{label:12} first output {first:6.2f}s  makespan {total:6.2f}s  outputs {len(outputs)}")
+        print(f"same outputs (names, pages, sizes): {sigs[0] == sigs[1]}")
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+落ちたバッチの再開（cfg.journal_enabled）を、実際にプロセスを kill して確かめる
+
+    python benchmarks/bench_resume.py --docs 40 --export 0.05
+
+バッチを別プロセスで動かし、変換の途中（crash_convert）・書き出しの途中（crash_finalize）で
+SIGKILL する（後片付けは一切走らない）。同じ入力・設定で実行し直し、次を表示する。
+- 実行し直しにかかった時間（最初から全部やる場合との比較）
+- 実行し直しで Office にエクスポートさせた回数（変換済みのものは飛ばされる）
+- 出力が全部揃い、どれも壊れていないか（書きかけの PDF が出力名で残っていないか）
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine, make_file_info  # noqa: E402
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+
+
+class CountingBackend(FakeBackend):
+    """エクスポート回数を数える（偽 Office は open ごとに1回エクスポートする）"""
+
+    exports = 0
+
+    def should_hang(self, path):
+        self.exports += 1
+        return super().should_hang(path)
+
+
+def make_cfg(out, journal):
+    return AppConfig(
+        output_dir=out,
+        out_mode="folder",
+        auto_open=False,
+        split_word_page=True,
+        naming_tpl="{name}_{pseq}_{date:HHMMSS}",
+        wm1_text="CONFIDENTIAL",
+        wm1_pos="diag",
+        wm_font="Vera",
+        journal_enabled=True,
+        journal_dir=journal,
+    )
+
+
+def run_batch(paths, out, journal, export, template):
+    backend = CountingBackend(export_latency=export, template=template)
+    engine = BatchEngine(
+        make_cfg(out, journal),
+        [make_file_info(p) for p in paths],
+        backend=backend,
+        on_exists=lambda dest: False,
+        font_map=corpus.FONT_MAP,
+    )
+    outputs = engine.run()
+    return outputs, backend.exports
+
+
+def _child(paths, out, journal, export, template):
+    run_batch(paths, out, journal, export, template)
+
+
+def journal_units(journal):
+    n = 0
+    for root, _, names in os.walk(journal):
+        if "journal.jsonl" in names:
+            with open(os.path.join(root, "journal.jsonl"), encoding="utf-8") as f:
+                n += sum('"t": "units"' in line for line in f)
+    return n
+
+
+def check_outputs(out):
+    names = os.listdir(out)
+    pdfs = [n for n in names if n.endswith(".pdf") and not n.startswith(".o2p_")]
+    broken = 0
+    for n in pdfs:
+        try:
+            PdfReader(os.path.join(out, n)).pages[0]
+        except Exception:
+            broken += 1
+    return len(pdfs), broken, len(names) - len(pdfs)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=40)
+    ap.add_argument("--pages", type=int, default=3)
+    ap.add_argument("--export", type=float, default=0.05, help="模擬エクスポート時間(秒)")
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_resume_")
+    try:
+        template = corpus.make_pdf(os.path.join(d, "_export.pdf"), args.pages)
+        paths = [corpus.make_word(os.path.join(d, f"doc_{i:03d}.docx"), args.pages) for i in range(args.docs)]
+        total = args.docs * args.pages
+
+        out = tempfile.mkdtemp(dir=d, prefix="full_")
+        t0 = time.perf_counter()
+        outputs, exports = run_batch(paths, out, os.path.join(d, "j_full"), args.export, template)
+        full = time.perf_counter() - t0
+        print(f"full run        {full:6.2f}s  outputs={len(outputs)}/{total}  exports={exports}")
+
+        for name in ("crash_convert", "crash_finalize"):
+            out = tempfile.mkdtemp(dir=d, prefix="out_")
+            journal = os.path.join(d, f"j_{name}")
+            p = multiprocessing.Process(target=_child, args=(paths, out, journal, args.export, template))
+            p.start()
+            # 変換の半分、または出力の半分まで進んだところで落とす
+            while p.is_alive():
+                if name == "crash_convert" and journal_units(journal) >= args.docs // 2:
+                    break
+                if name == "crash_finalize" and len(os.listdir(out)) >= total // 2:
+                    break
+                time.sleep(0.005)
+            p.kill()
+            p.join()
+            before = check_outputs(out)[0]
+
+            t0 = time.perf_counter()
+            outputs, exports = run_batch(paths, out, journal, args.export, template)
+            secs = time.perf_counter() - t0
+            pdfs, broken, other = check_outputs(out)
+            print(
+                f"{name:15} {secs:6.2f}s  ({secs / full:.0%} of full)  written before kill={before}"
+                f"  outputs={len(outputs)}/{total}  files in out dir={pdfs} (broken {broken}, temp {other})"
+                f"  exports={exports}  journal left={os.path.exists(journal) and bool(os.listdir(journal))}"
+            )
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+変換サーバー（office2pdf.server）の負荷試験。偽 Office で、同じプロセス内にサーバーを立てて叩く
+
+    python benchmarks/bench_server.py --clients 8 --jobs 5 --workers 2 --queue 4
+
+--clients 個のスレッドがそれぞれ --jobs 個のジョブを順に投げる
+（作成 → Word と PDF をアップロード → 開始 → 終わるまで状態を見る → 出力をダウンロード）。
+429（キューが一杯）が返ったら Retry-After だけ待ってやり直す。
+かかった時間・ジョブ/秒・1ジョブの所要時間（中央値・95%）・429 の回数と、
+ダウンロードした PDF が全部読めるかを表示する。
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+from office2pdf.server import JobManager, make_server  # noqa: E402
+
+
+class Client:
+    def __init__(self, port, stats):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.stats = stats
+
+    def call(self, method, path, body=None, headers=None):
+        """429 の間は待ってやり直し、(状態コード, 本文) を返す"""
+        while True:
+            self.conn.request(method, path, body=body, headers=headers or {})
+            r = self.conn.getresponse()
+            data = r.read()
+            if r.status != 429:
+                return r.status, data
+            self.stats["429"] += 1
+            time.sleep(float(r.getheader("Retry-After") or 1) * 0.1)
+
+    def json(self, method, path, body=None):
+        status, data = self.call(method, path, json.dumps(body).encode() if body is not None else None)
+        return status, json.loads(data)
+
+    def run_job(self, uploads, settings):
+        status, job = self.json("POST", "/jobs", {"config": settings})
+        assert status == 201, (status, job)
+        for path in uploads:
+            with open(path, "rb") as f:
+                # ファイルオブジェクトを渡すと http.client は少しずつ送る
+                status, _ = self.call(
+                    "PUT",
+                    f"/jobs/{job['id']}/files/{os.path.basename(path)}",
+                    body=f,
+                    headers={"Content-Length": str(os.path.getsize(path))},
+                )
+            assert status == 201, status
+        status, job = self.json("POST", f"/jobs/{job['id']}/start")
+        assert status == 202, (status, job)
+        while job["state"] in ("queued", "running"):
+            time.sleep(0.02)
+            _, job = self.json("GET", f"/jobs/{job['id']}")
+        pages = 0
+        for name in job["outputs"]:
+            status, data = self.call("GET", f"/jobs/{job['id']}/output/{name}")
+            assert status == 200, status
+            pages += len(PdfReader(io.BytesIO(data)).pages)
+        self.json("DELETE", f"/jobs/{job['id']}")
+        return job["state"], pages
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--jobs", type=int, default=5, help="1クライアントあたりのジョブ数")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--queue", type=int, default=4)
+    ap.add_argument("--launch", type=float, default=0.5, help="模擬 Office 起動時間(秒)")
+    ap.add_argument("--export", type=float, default=0.1, help="模擬エクスポート時間(秒)")
+    ap.add_argument("--pdf-pages", type=int, default=20)
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_server_")
+    try:
+        template = corpus.make_pdf(os.path.join(d, "_export.pdf"), 3)
+        uploads = [
+            corpus.make_word(os.path.join(d, "memo.docx"), 3),
+            corpus.make_pdf(os.path.join(d, "report.pdf"), args.pdf_pages),
+        ]
+        settings = {"merge_all": True, "naming_tpl": "merged", "wm1_text": "DRAFT", "wm1_pos": "diag", "wm_font": "Vera"}
+        backend = FakeBackend(args.launch, args.export, template=template)
+        manager = JobManager(
+            backend,
+            os.path.join(d, "jobs"),
+            workers=args.workers,
+            queue_size=args.queue,
+            font_map=corpus.FONT_MAP,
+        )
+        server = make_server(manager, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+
+        stats = {"429": 0}
+        latencies, results, errors = [], [], []
+
+        def client():
+            c = Client(port, stats)
+            for _ in range(args.jobs):
+                t0 = time.perf_counter()
+                try:
+                    results.append(c.run_job(uploads, settings))
+                except Exception as e:
+                    errors.append(repr(e))
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        total = time.perf_counter() - t0
+        server.shutdown()
+        manager.close()
+
+        n = len(latencies)
+        done = sum(state == "done" for state, _ in results)
+        expected = 3 + args.pdf_pages
+        bad = sum(pages != expected for _, pages in results)
+        p95 = sorted(latencies)[max(0, int(n * 0.95) - 1)]
+        print(
+            f"{n} jobs in {total:.2f}s ({n / total:.1f} jobs/s)  per job median {statistics.median(latencies):.2f}s"
+            f"  p95 {p95:.2f}s  429s {stats['429']}"
+        )
+        print(
+            f"done {done}/{n}  wrong page count {bad}  errors {len(errors)}  office launches {backend.launches}"
+            f"  (workers {args.workers}, queue {args.queue})"
+        )
+        for e in errors[:5]:
+            print(f"  {e}")
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+ベンチマーク一式（合成した入力 + 偽の win32com で、Linux でも BatchEngine 全体を通して計測する）
+
+    python benchmarks/bench_suite.py --json before.json
+    python benchmarks/bench_suite.py --json after.json --compare before.json
+    python benchmarks/bench_suite.py --only merge stamp --repeat 5 --scale 2
+
+シナリオ:
+- merge        : PDF / Word / Excel / 画像をまとめて全結合
+- merge_par    : merge を並列変換（cfg.parallel）で
+- split_page   : PDF と Word を1ページずつに分割
+- split_metric : split_page を計測レポートありで（split_page との差が計測のオーバーヘッド）
+- split_sheet  : Excel をシートごとに分割
+- stamp        : 透かし2つ + ページ番号（ファイルごとに出力）
+- encrypt      : 全結合 + パスワード
+- compress     : スキャン画像入りの全結合 + PDF軽量化
+- page_spec    : parse_page_spec（1回あたり）
+- apply_tags   : apply_tags（1回あたり）
+
+各シナリオを --repeat 回実行し、最小値・中央値と出力のページ数・バイト数を JSON に保存する。
+--compare で前回の JSON と中央値を比べ、--threshold を超えて遅くなったものがあれば終了コード 1 を返す。
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import PIL
+import pypdf
+import reportlab
+from pypdf import PdfReader
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import corpus  # noqa: E402
+import fakecom  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.converters import count_pdf_pages, parse_page_spec  # noqa: E402
+from office2pdf.engine import BatchEngine, make_file_info  # noqa: E402
+from office2pdf.sheets import fill_excel_sheets  # noqa: E402
+from office2pdf.templates import apply_tags  # noqa: E402
+
+STAMP = {
+    "wm1_text": "CONFIDENTIAL",
+    "wm1_pos": "diag",
+    "wm2_text": "{name} p.{pseq}",
+    "wm2_pos": "tr",
+    "wm_font": "Vera",
+    "pg_enabled": True,
+}
+
+# シナリオ名 → (入力の種別, AppConfig に渡す設定)
+SCENARIOS = {
+    "merge": (("PDF", "Word", "Excel", "Image"), {"merge_all": True, "naming_tpl": "merged"}),
+    "merge_par": (("PDF", "Word", "Excel", "Image"), {"merge_all": True, "naming_tpl": "merged", "parallel": True}),
+    "split_page": (("PDF", "Word"), {"split_pdf_page": True, "split_word_page": True, "naming_tpl": "{name}_{pseq}"}),
+    "split_metric": (
+        ("PDF", "Word"),
+        {"split_pdf_page": True, "split_word_page": True, "naming_tpl": "{name}_{pseq}", "metrics_enabled": True},
+    ),
+    "split_sheet": (("Excel",), {"split_excel_sheet": True, "naming_tpl": "{name}_{sheet}"}),
+    "stamp": (("PDF",), dict(STAMP)),
+    "encrypt": (("PDF", "Word"), {"merge_all": True, "naming_tpl": "merged", "password": "bench"}),
+    "compress": (("PDF", "Image"), {"merge_all": True, "naming_tpl": "merged", "compress_pdf": True}),
+}
+MICRO = ("page_spec", "apply_tags")
+
+
+def count_pages(path, password=""):
+    if not password:
+        return count_pdf_pages(path)
+    reader = PdfReader(path)
+    reader.decrypt(password)
+    return len(reader.pages)
+
+
+def run_batch(kinds, settings, inputs, out_dir):
+    files = [make_file_info(p) for k in kinds for p in inputs[k]]
+    fill_excel_sheets(files, use_com=False)
+    cfg = AppConfig(output_dir=out_dir, out_mode="folder", auto_open=False, metrics_dir=out_dir, **settings)
+    engine = BatchEngine(cfg, files, on_exists=lambda d: True, font_map=corpus.FONT_MAP)
+    t0 = time.perf_counter()
+    outputs = engine.run()
+    secs = time.perf_counter() - t0
+    stats = {
+        "outputs": len(outputs),
+        "pages": sum(count_pages(p, cfg.password) for p in outputs),
+        "bytes": sum(os.path.getsize(p) for p in outputs),
+    }
+    return secs, stats
+
+
+def run_micro(name, n):
+    if name == "page_spec":
+        specs = ["1-3,5,8-", "-3", "2", "10-20,25,30-", "全ページ"]
+        t0 = time.perf_counter()
+        for i in range(n):
+            parse_page_spec(specs[i % len(specs)], 200)
+    else:
+        f = {"path": r"C:\work\report.xlsx"}
+        u = {"path": f["path"], "orig": f, "sheet": "Sheet1", "fseq": 1}
+        t0 = time.perf_counter()
+        for i in range(n):
+            apply_tags("{name}_{sheet}_{seq}_{date:yyyymmdd}", u, i, 1, i)
+    # 1回あたりの秒数
+    return (time.perf_counter() - t0) / n, {"calls": n}
+
+
+def environment(args):
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pypdf": pypdf.__version__,
+        "reportlab": reportlab.Version,
+        "pillow": PIL.__version__,
+        "args": vars(args),
+    }
+
+
+def compare(results, base_path, threshold):
+    """中央値を前回と比べて表示し、遅くなったシナリオ名を返す"""
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)["scenarios"]
+    slower = []
+    print(f"\n{'scenario':12} {'base':>10} {'now':>10} {'ratio':>7}")
+    for name, r in results.items():
+        b = base.get(name)
+        if not b:
+            print(f"{name:12} {'-':>10} {r['median']:10.4g}")
+            continue
+        ratio = r["median"] / b["median"] if b["median"] else float("inf")
+        mark = ""
+        if ratio > 1 + threshold:
+            slower.append(name)
+            mark = "  slower"
+        elif ratio < 1 - threshold:
+            mark = "  faster"
+        print(f"{name:12} {b['median']:10.4g} {r['median']:10.4g} {ratio:7.2f}{mark}")
+    return slower
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", nargs="+", choices=[*SCENARIOS, *MICRO], help="実行するシナリオ（既定: 全部）")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--scale", type=float, default=1.0, help="入力の数を何倍にするか")
+    ap.add_argument("--pdf-pages", type=int, default=5)
+    ap.add_argument("--sheets", type=int, default=4)
+    ap.add_argument("--launch", type=float, default=0.2, help="模擬 Office 起動時間(秒)")
+    ap.add_argument("--export", type=float, default=0.02, help="模擬エクスポート時間(秒)")
+    ap.add_argument("--json", help="結果を保存する JSON")
+    ap.add_argument("--compare", help="比較する前回の JSON")
+    ap.add_argument("--threshold", type=float, default=0.1, help="これを超えて遅くなったら終了コード 1")
+    args = ap.parse_args()
+    names = args.only or [*SCENARIOS, *MICRO]
+
+    def n(base):
+        return max(1, round(base * args.scale))
+
+    d = tempfile.mkdtemp(prefix="o2p_suite_")
+    try:
+        src = os.path.join(d, "src")
+        t0 = time.perf_counter()
+        inputs = corpus.build_corpus(
+            src,
+            pdfs=n(40),
+            pdf_pages=args.pdf_pages,
+            docs=n(20),
+            books=n(10),
+            sheets=args.sheets,
+            images=n(10),
+        )
+        # Office が書き出す PDF も本文入りのものにする（白紙だと透かし・圧縮の負荷が軽すぎる）
+        page_pdf = corpus.make_pdf(os.path.join(d, "_export.pdf"), 3)
+        backend = fakecom.install(args.launch, args.export, sheets=corpus.sheet_names(args.sheets), template=page_pdf)
+        print(f"corpus: {sum(len(v) for v in inputs.values())} files in {time.perf_counter() - t0:.1f}s")
+
+        results = {}
+        for name in names:
+            runs, stats = [], {}
+            for _ in range(args.repeat):
+                out = tempfile.mkdtemp(dir=d, prefix="out_")
+                if name in MICRO:
+                    secs, stats = run_micro(name, n(20000))
+                else:
+                    kinds, settings = SCENARIOS[name]
+                    secs, stats = run_batch(kinds, settings, inputs, out)
+                shutil.rmtree(out, ignore_errors=True)
+                runs.append(secs)
+            results[name] = {
+                "runs": runs,
+                "min": min(runs),
+                "median": statistics.median(runs),
+                **stats,
+            }
+            unit = "s/call" if name in MICRO else "s"
+            extra = "  ".join(f"{k}={v}" for k, v in stats.items())
+            print(f"{name:12} median {results[name]['median']:10.4g} {unit:6} min {min(runs):10.4g}  {extra}")
+        print(f"office launches: {backend.launches}")
+    finally:
+        fakecom.uninstall()
+        shutil.rmtree(d, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"env": environment(args), "scenarios": results}, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        slower = compare(results, args.compare, args.threshold)
+        if slower:
+            print(f"slower than {args.compare}: {', '.join(slower)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
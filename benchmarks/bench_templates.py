@@ -0,0 +1,101 @@
+"""
+命名ルール/透かし/ページ番号のタグ置換1回あたりの時間
+
+    python benchmarks/bench_templates.py --calls 100000
+
+- legacy : 以前の apply_tags（毎回 str.replace 10回 + re.sub、getlogin、datetime.now）
+- apply  : templates.apply_tags（字句分解はキャッシュ、毎回ファイル分のタグも埋める）
+- bound  : bind() 済みの FileTemplate.render（ページごとの経路。数字を埋めるだけ）
+"""
+
+import argparse
+import datetime
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from office2pdf.templates import PAGE_NUMBER_ALIASES, apply_tags, compile_template, get_username  # noqa: E402
+
+TEMPLATES = {
+    "naming": "{seq}_{parent}_{name}_{sheet}_{date:yyyymmdd}",
+    "watermark": "{username} {date:yyyy-mm-dd HH:MM} ({pseq}/{ptotal})",
+    "page no.": "- {n} / {total} -",
+}
+
+
+def legacy_apply_tags(tpl, u_info, seq, fseq, pseq, ptotal=1, total=1):
+    now = datetime.datetime.now()
+    path = u_info["orig"]["path"]
+    name = os.path.splitext(os.path.basename(path))[0]
+    sheet = u_info.get("sheet", "")
+    parent = os.path.basename(os.path.dirname(path))
+
+    res = tpl
+    res = res.replace("{name}", name)
+    res = res.replace("{sheet}", sheet)
+    res = res.replace("{parent}", parent)
+    res = res.replace("{seq}", str(seq))
+    res = res.replace("{fseq}", str(fseq))
+    res = res.replace("{pseq}", str(pseq))
+    res = res.replace("{total}", str(total))
+    res = res.replace("{ptotal}", str(ptotal))
+    try:
+        user = os.getlogin()
+    except OSError:
+        user = get_username()
+    res = res.replace("{username}", user)
+    res = res.replace("{rand}", f"{random.randint(0, 9999):04d}")
+
+    def _repl(m):
+        fmt = m.group(1)
+        fmt = fmt.replace("yyyy", "%Y").replace("mm", "%m").replace("dd", "%d")
+        fmt = fmt.replace("HH", "%H").replace("MM", "%M").replace("SS", "%S")
+        return now.strftime(fmt)
+
+    return re.sub(r"{date:(.*?)}", _repl, res)
+
+
+def per_call_us(fn, calls):
+    t0 = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=100000)
+    args = ap.parse_args()
+
+    u = {"orig": {"path": r"C:\archive\2024\Sales\quarterly report.xlsx"}, "sheet": "Summary", "fseq": 3}
+    now = datetime.datetime.now()
+    print(f"{'template':10} {'legacy':>9} {'apply':>9} {'bound':>9}   (us/call)")
+    for label, tpl in TEMPLATES.items():
+        if label == "page no.":
+            # 以前は {n} / {total} を先に str.replace してから apply_tags に渡していた
+            def legacy(i):
+                s = tpl.replace("{n}", str(i)).replace("{total}", "999")
+                return legacy_apply_tags(s, u, i, 3, i, 999, 50)
+
+            def apply(i):
+                return compile_template(tpl, PAGE_NUMBER_ALIASES).render(u, i, 3, i, 999, 50, now)
+
+        else:
+
+            def legacy(i):
+                return legacy_apply_tags(tpl, u, i, 3, i, 999, 50)
+
+            def apply(i):
+                return apply_tags(tpl, u, i, 3, i, 999, 50, now)
+
+        bound = compile_template(tpl, PAGE_NUMBER_ALIASES if label == "page no." else ()).bind(u, 3, 50, now)
+        res = [per_call_us(f, args.calls) for f in (legacy, apply, lambda i: bound.render(i, i, 999))]
+        print(f"{label:10} {res[0]:9.2f} {res[1]:9.2f} {res[2]:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+ホットフォルダ（office2pdf.watch.HotFolder）を偽 Office で動かして確かめる
+
+    python benchmarks/bench_watch.py --drops 10 --launch 1.0 --settle 1.0
+
+監視フォルダに Word ファイルを --gap 秒おきに置いていき、次を表示する。
+- 置いてから元ファイルが done/ に移るまでの時間（中央値・最大）
+- Office の起動回数（温めたまま使い回すので 1 のはず）
+- 少しずつ書き込まれるファイル（コピー中の模擬）が、書き終わる前に拾われていないか
+- 開けないファイル（偽 Office の fail_on）が failed/ に移り、監視が止まらないか
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+from office2pdf.watch import DONE_DIR, FAILED_DIR, OUT_DIR, HotFolder  # noqa: E402
+
+
+def record_arrivals(d, seen, stop):
+    """d に現れたファイル名と時刻を seen に記録し続ける（done/ に移った時刻を測る）"""
+    while not stop.is_set():
+        try:
+            for name in os.listdir(d):
+                seen.setdefault(name, time.monotonic())
+        except OSError:
+            pass
+        time.sleep(0.01)
+
+
+def wait_for(path, timeout):
+    t0 = time.monotonic()
+    while not os.path.exists(path):
+        if time.monotonic() - t0 > timeout:
+            return None
+        time.sleep(0.01)
+    return time.monotonic()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--drops", type=int, default=10)
+    ap.add_argument("--gap", type=float, default=0.5, help="ファイルを置く間隔(秒)")
+    ap.add_argument("--launch", type=float, default=1.0, help="模擬 Office 起動時間(秒)")
+    ap.add_argument("--export", type=float, default=0.1, help="模擬エクスポート時間(秒)")
+    ap.add_argument("--interval", type=float, default=0.2)
+    ap.add_argument("--settle", type=float, default=1.0)
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_watch_")
+    try:
+        src = os.path.join(d, "src")
+        os.makedirs(src)
+        inbox = os.path.join(d, "to-PDF")
+        os.makedirs(inbox)
+        template = corpus.make_pdf(os.path.join(d, "_export.pdf"), 2)
+        backend = FakeBackend(args.launch, args.export, template=template, fail_on=("broken",))
+        cfg = AppConfig(output_dir="", out_mode="original", auto_open=False, naming_tpl="{name}")
+        hot = HotFolder([inbox], cfg, backend, interval=args.interval, settle=args.settle)
+        t = threading.Thread(target=hot.run)
+        t.start()
+        try:
+            run_drops(args, inbox, src)
+        finally:
+            hot.stop()
+            t.join()
+        outs = sorted(os.listdir(os.path.join(inbox, OUT_DIR)))
+        print(
+            f"office launches {backend.launches}  batches {hot.stats['batches']}  done {hot.stats['done']}"
+            f"  failed {hot.stats['failed']}  outputs {len(outs)}"
+        )
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+def run_drops(args, inbox, src):
+    timeout = args.launch + args.settle + 30
+
+    # 1. 少しずつ書き込まれるファイル（書き終わるまで拾われてはいけない）
+    slow = os.path.join(inbox, "slow_copy.docx")
+    body = open(corpus.make_word(os.path.join(src, "slow.docx"), 2), "rb").read()
+    chunk = max(1, len(body) // 5)
+    with open(slow, "wb") as f:
+        for k in range(0, len(body), chunk):
+            f.write(body[k : k + chunk])
+            f.flush()
+            time.sleep(args.settle * 0.6)
+            if os.path.exists(os.path.join(inbox, DONE_DIR, "slow_copy.docx")):
+                print("slow copy       picked up before it was fully written")
+                return
+    written = time.monotonic()
+    picked = wait_for(os.path.join(inbox, DONE_DIR, "slow_copy.docx"), timeout)
+    print(f"slow copy       picked {picked - written:.2f}s after the last write")
+
+    # 2. 一定間隔で置かれるファイル
+    arrived = {}
+    stop = threading.Event()
+    recorder = threading.Thread(target=record_arrivals, args=(os.path.join(inbox, DONE_DIR), arrived, stop))
+    recorder.start()
+    pending = []
+    for i in range(args.drops):
+        name = f"doc_{i:03d}.docx"
+        tmp = corpus.make_word(os.path.join(src, name), 2)
+        shutil.copyfile(tmp, os.path.join(inbox, name))
+        pending.append((name, time.monotonic()))
+        time.sleep(args.gap)
+    broken = os.path.join(inbox, "broken.docx")
+    shutil.copyfile(tmp, broken)
+    seen = {}
+    for name, _ in pending:
+        seen[name] = wait_for(os.path.join(inbox, DONE_DIR, name), timeout)
+    stop.set()
+    recorder.join()
+    # 記録スレッドが見る前に止めたものは wait_for が見つけた時刻を使う（見つからなければ届かなかった）
+    for name, t in seen.items():
+        if t is not None:
+            arrived.setdefault(name, t)
+    latencies = [arrived[name] - dropped for name, dropped in pending if name in arrived]
+    missing = [name for name, _ in pending if name not in arrived]
+    failed = wait_for(os.path.join(inbox, FAILED_DIR, "broken.docx"), timeout) is not None
+    if latencies:
+        print(
+            f"{args.drops} drops     drop→done median {statistics.median(latencies):.2f}s  max {max(latencies):.2f}s"
+            f"  (interval {args.interval}s + settle {args.settle}s + export {args.export}s)"
+        )
+    if missing:
+        print(f"never reached done/ within {timeout:g}s: {', '.join(missing)}")
+    print(f"broken.docx     moved to failed/: {failed}")
+
+
+if __name__ == "__main__":
+    main()
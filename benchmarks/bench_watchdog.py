@@ -0,0 +1,104 @@
+"""
+固まる Office の監視（制限時間 → kill → 再試行 → 隔離）を偽 Office で確かめる
+
+    python benchmarks/bench_watchdog.py --timeout 0.5 --retries 2
+
+FakeBackend(hang_on=...) は指定した名前の文書のエクスポートで、止められるまで戻らない。
+- hang_always : 毎回固まる → 再試行しても終わらず隔離される
+- hang_once   : 最初の1回だけ固まる → 再試行で変換できる
+- それ以外    : 普通に変換される
+直列・並列それぞれで、かかった時間・出力数・隔離されたファイルを表示する。
+直列では kill の回数と、止めずに残った Office（プロセスが残るのと同じ）が無いことも表示する
+（並列ではアプリはワーカープロセス側にあるので数えられない）。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import corpus  # noqa: E402
+
+from office2pdf.config import AppConfig  # noqa: E402
+from office2pdf.engine import BatchEngine, make_file_info  # noqa: E402
+from office2pdf.office_pool import FakeBackend  # noqa: E402
+from office2pdf.sheets import fill_excel_sheets  # noqa: E402
+
+
+class CountingBackend(FakeBackend):
+    """起動したアプリを覚えておき、最後に終了・kill されていないものを数える"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.apps = []
+
+    def launch(self, kind):
+        app = super().launch(kind)
+        self.apps.append(app)
+        return app
+
+    def leftover(self):
+        return sum(app.alive for app in self.apps)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--timeout", type=float, default=0.5, help="制限時間(秒)")
+    ap.add_argument("--retries", type=int, default=2)
+    ap.add_argument("--backoff", type=float, default=0.1)
+    ap.add_argument("--docs", type=int, default=6, help="普通に変換できる文書の数")
+    ap.add_argument("--export", type=float, default=0.05, help="模擬エクスポート時間(秒)")
+    args = ap.parse_args()
+
+    d = tempfile.mkdtemp(prefix="o2p_watchdog_")
+    try:
+        base = corpus.make_pdf(os.path.join(d, "_base.pdf"), 2)
+        paths = [corpus.make_word(os.path.join(d, f"doc_{i:03d}.docx"), 2) for i in range(args.docs)]
+        paths.insert(1, corpus.make_word(os.path.join(d, "hang_always.docx"), 2))
+        paths.insert(3, corpus.make_book(os.path.join(d, "hang_once.xlsx"), corpus.sheet_names(3)))
+        paths.append(corpus.make_word(os.path.join(d, "hang_always.pptx"), 2))
+
+        for mode in ("serial", "parallel"):
+            files = [make_file_info(p) for p in paths]
+            fill_excel_sheets(files, use_com=False)
+            out = tempfile.mkdtemp(dir=d, prefix="out_")
+            qdir = os.path.join(d, f"quarantine_{mode}")
+            cfg = AppConfig(
+                output_dir=out,
+                out_mode="folder",
+                auto_open=False,
+                parallel=mode == "parallel",
+                office_timeouts={"Word": args.timeout, "Excel": args.timeout, "PowerPoint": args.timeout},
+                office_retries=args.retries,
+                office_retry_backoff=args.backoff,
+                quarantine_dir=qdir,
+            )
+            backend = CountingBackend(
+                export_latency=args.export,
+                sheets=corpus.sheet_names(3),
+                template=base,
+                hang_on={"hang_always": 0, "hang_once": 1},
+            )
+            logs = []
+            engine = BatchEngine(cfg, files, backend=backend, on_exists=lambda dest: True, log=logs.append)
+            t0 = time.perf_counter()
+            outputs = engine.run()
+            secs = time.perf_counter() - t0
+            quarantined = sorted(os.path.basename(p) for p in engine.quarantined)
+            counts = "" if cfg.parallel else f"  kills={backend.kills}  leftover office={backend.leftover()}"
+            print(
+                f"{mode:8} {secs:6.2f}s  outputs={len(outputs)}/{len(files) - 2}  quarantined={quarantined}{counts}"
+            )
+            for msg in logs:
+                if "hang" in msg or "秒" in msg:
+                    print(f"    {msg}")
+    finally:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+ベンチマーク用の入力ファイル一式を作る（reportlab / Pillow。Office は不要）。
+
+- PDF   : 本文テキスト（埋め込みフォント）とロゴ画像入り。ページ数・用紙サイズを指定できる
+- 画像  : ノイズ入りグラデーションの JPEG / PNG（スキャンの代わり）
+- Word / Excel / PowerPoint : 中身の無い最小限の OOXML（zip）。
+  下調べ（preflight）とシート情報の読み取りが通るように、ページ数（docProps/app.xml）とシートだけ書く。
+  PDF 化は fakecom の偽 Office が行う
+
+    from corpus import build_corpus
+    files = build_corpus(d, pdfs=20, pdf_pages=5, docs=10, books=10, sheets=4, images=10)
+"""
+
+import os
+import shutil
+import zipfile
+from typing import Dict, List, Sequence, Tuple
+
+import reportlab
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+VERA = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+# 透かしのフォントに渡す font_map（Windows のレジストリが無くても動くように Vera を使う）
+FONT_MAP = {"Vera": (VERA, 0)}
+
+_LINES = 40
+
+
+def _noise_image(size: Tuple[int, int], seed: int) -> Image.Image:
+    return Image.merge(
+        "RGB",
+        [
+            Image.linear_gradient("L").rotate(seed * 7).resize(size),
+            Image.effect_noise(size, 25).convert("L"),
+            Image.radial_gradient("L").resize(size),
+        ],
+    )
+
+
+def make_pdf(path: str, pages: int, pagesize: Tuple[float, float] = A4, logo: str = "") -> str:
+    """本文テキストとロゴ入りの pages ページの PDF（Office が書き出した帳票の代わり）"""
+    if "Vera" not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont("Vera", VERA))
+    w, h = pagesize
+    c = canvas.Canvas(path, pagesize=pagesize)
+    for pg in range(pages):
+        if logo:
+            c.drawImage(logo, 40, h - 100, 60, 60)
+        c.setFont("Vera", 10)
+        for line in range(_LINES):
+            c.drawString(60, h - 130 - line * 16, f"Page {pg + 1} line {line + 1}: sales / cost / profit 0123456789")
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_image(path: str, size: Tuple[int, int] = (2480, 3508), seed: int = 0, dpi: int = 300) -> str:
+    """スキャン画像の代わり（拡張子で JPEG / PNG を決める）"""
+    img = _noise_image(size, seed)
+    if path.lower().endswith((".jpg", ".jpeg")):
+        img.save(path, quality=85, dpi=(dpi, dpi))
+    else:
+        img.save(path, dpi=(dpi, dpi), compress_level=1)
+    return path
+
+
+def _app_xml(tag: str, n: int) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+        f"<{tag}>{n}</{tag}></Properties>"
+    )
+
+
+def make_word(path: str, pages: int) -> str:
+    """ページ数だけ書いた .docx（pptx なら Slides）"""
+    tag = "Slides" if path.lower().endswith(".pptx") else "Pages"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("docProps/app.xml", _app_xml(tag, pages))
+    return path
+
+
+def make_book(path: str, sheets: Sequence[str]) -> str:
+    """sheets の名前のワークシート（各1セル）を持つ .xlsx"""
+    ns = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    rel_ns = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    ws_type = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+    wb_sheets = "".join(
+        f'<sheet name="{name}" sheetId="{i + 1}" r:id="rId{i + 1}"/>' for i, name in enumerate(sheets)
+    )
+    rels = "".join(
+        f'<Relationship Id="rId{i + 1}" Type="{ws_type}" Target="worksheets/sheet{i + 1}.xml"/>'
+        for i in range(len(sheets))
+    )
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("xl/workbook.xml", f'<workbook xmlns="{ns}" xmlns:r="{rel_ns}"><sheets>{wb_sheets}</sheets></workbook>')
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}</Relationships>',
+        )
+        for i in range(len(sheets)):
+            zf.writestr(
+                f"xl/worksheets/sheet{i + 1}.xml",
+                f'<worksheet xmlns="{ns}"><dimension ref="A1"/><sheetData>'
+                f'<row r="1"><c r="A1"><v>{i}</v></c></row></sheetData></worksheet>',
+            )
+    return path
+
+
+def sheet_names(n: int) -> List[str]:
+    return [f"Sheet{i + 1}" for i in range(n)]
+
+
+def build_corpus(
+    d: str,
+    pdfs: int = 0,
+    pdf_pages: int = 5,
+    docs: int = 0,
+    doc_pages: int = 3,
+    books: int = 0,
+    sheets: int = 3,
+    images: int = 0,
+    image_size: Tuple[int, int] = (1240, 1754),
+    unique: bool = False,
+) -> Dict[str, List[str]]:
+    """
+    d に入力ファイルを作り、種別ごとのパスを返す（{"PDF": [...], "Word": [...], "Excel": [...], "Image": [...]}）。
+    unique=False なら同じ内容の PDF / 画像をコピーして数を揃える（作るのが速い）。
+    """
+    os.makedirs(d, exist_ok=True)
+    logo = make_image(os.path.join(d, "_logo.png"), (200, 200))
+    out: Dict[str, List[str]] = {"PDF": [], "Word": [], "Excel": [], "Image": []}
+
+    first = ""
+    for i in range(pdfs):
+        p = os.path.join(d, f"report_{i:05d}.pdf")
+        if unique or not first:
+            first = make_pdf(p, pdf_pages, logo=logo)
+        else:
+            shutil.copyfile(first, p)
+        out["PDF"].append(p)
+    for i in range(docs):
+        out["Word"].append(make_word(os.path.join(d, f"doc_{i:05d}.docx"), doc_pages))
+    for i in range(books):
+        out["Excel"].append(make_book(os.path.join(d, f"book_{i:05d}.xlsx"), sheet_names(sheets)))
+    for i in range(images):
+        p = os.path.join(d, f"scan_{i:05d}.{'jpg' if i % 2 == 0 else 'png'}")
+        if unique or i < 2:
+            make_image(p, image_size, seed=i)
+        else:
+            shutil.copyfile(out["Image"][i % 2], p)
+        out["Image"].append(p)
+    return out
+
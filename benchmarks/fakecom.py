@@ -0,0 +1,61 @@
+"""
+win32com / pythoncom の代役（Linux でベンチマークを動かす用）。
+
+install() すると sys.modules に偽の pythoncom と win32com.client を入れる。
+以後は本番と同じ ComBackend（DispatchEx）と com_apartment（CoInitialize）の経路がそのまま動き、
+Office の起動・エクスポートは office_pool.FakeBackend の待ち時間で模擬される。
+並列変換のワーカーは fork で作られるので、親で install() しておけば子でも有効。
+
+    backend = fakecom.install(launch_latency=1.0, export_latency=0.3, template="page.pdf")
+    BatchEngine(cfg, files).run()   # backend を渡さない = ComBackend
+"""
+
+import sys
+import types
+from typing import Iterable, Optional
+
+from office2pdf.office_pool import PROG_IDS, FakeBackend
+
+_KINDS = {v: k for k, v in PROG_IDS.items()}
+
+
+def install(
+    launch_latency: float = 0.0,
+    export_latency: float = 0.0,
+    pages: int = 1,
+    sheets: Iterable[str] = ("Sheet1",),
+    template: Optional[str] = None,
+) -> FakeBackend:
+    """偽モジュールを入れ、起動・エクスポートを受け持つ FakeBackend を返す（launches などの集計用）"""
+    backend = FakeBackend(launch_latency, export_latency, pages, sheets, template=template)
+
+    pythoncom = types.ModuleType("pythoncom")
+    pythoncom.initialized = 0
+
+    def CoInitialize():
+        pythoncom.initialized += 1
+
+    def CoUninitialize():
+        pythoncom.initialized -= 1
+
+    pythoncom.CoInitialize = CoInitialize
+    pythoncom.CoUninitialize = CoUninitialize
+    pythoncom.com_error = RuntimeError
+
+    client = types.ModuleType("win32com.client")
+
+    def DispatchEx(prog_id: str):
+        return backend.launch(_KINDS[prog_id])
+
+    client.DispatchEx = DispatchEx
+    client.Dispatch = DispatchEx
+    win32com = types.ModuleType("win32com")
+    win32com.client = client
+
+    sys.modules.update({"pythoncom": pythoncom, "win32com": win32com, "win32com.client": client})
+    return backend
+
+
+def uninstall():
+    for name in ("pythoncom", "win32com", "win32com.client"):
+        sys.modules.pop(name, None)
@@ -0,0 +1 @@
+"""Office2PDF の変換処理（GUI から独立して import できる部分）"""
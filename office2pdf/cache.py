@@ -0,0 +1,182 @@
+"""
+変換済み中間PDFのキャッシュ（内容ハッシュ + 変換オプションがキー）。
+
+- 入力の同一性は「パス・サイズ・更新日時」で引ける内容ハッシュの記録を使い、無ければ実際にハッシュを取る。
+  そのため、内容が同じファイルは別パスにあっても1回しか変換しない。
+- entries/<key>/ に units.json と PDF を置く。units.json の更新日時を最終利用時刻として
+  サイズ上限を超えたら古い順に削除する（LRU）。
+- 並列変換のワーカープロセスからも同時に使えるよう、書き込みは一時ディレクトリ → rename で行う。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+# キャッシュ形式・変換処理を変えたら上げる（古いキャッシュを使わないため）
+CACHE_VERSION = 2
+
+# PDF 入力は再保存だけなので、キャッシュしても複製が増えるだけ
+CACHEABLE_TYPES = ("Word", "Excel", "PowerPoint", "Image")
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "Office2PDF", "cache")
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _write_atomic(path: str, text: str):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class ConversionCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(root, "entries")
+        self.stat_dir = os.path.join(root, "stat")
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.stat_dir, exist_ok=True)
+        self._total: Optional[int] = None
+        self.stats = {"hit": 0, "miss": 0}
+
+    # --- Keys ---
+    def content_hash(self, path: str) -> str:
+        st = os.stat(path)
+        ident = f"{os.path.normcase(os.path.abspath(path))}|{st.st_size}|{st.st_mtime_ns}"
+        sp = os.path.join(self.stat_dir, hashlib.sha1(ident.encode("utf-8")).hexdigest())
+        try:
+            with open(sp, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            pass
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _write_atomic(sp, digest)
+        return digest
+
+    def key_for(self, f: dict, cfg) -> Optional[str]:
+        """キャッシュ対象外なら None"""
+        if f["type"] not in CACHEABLE_TYPES:
+            return None
+        opts = {"v": CACHE_VERSION, "type": f["type"]}
+        if f["type"] == "Excel":
+            # シート選択と「1ページに収める」は出力が変わる
+            opts.update(range=f.get("range", ""), fit=cfg.excel_fit, fit_tall=cfg.excel_fit_tall)
+        try:
+            digest = self.content_hash(f["path"])
+        except OSError:
+            return None
+        raw = digest + json.dumps(opts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # --- Get / Put ---
+    def get(self, key: str, tmp_dir: str, prefix: str) -> Optional[List[Tuple[str, str]]]:
+        """ヒットしたら tmp_dir に取り出して [(pdfパス, シート名), ...] を返す"""
+        d = os.path.join(self.entries_dir, key)
+        meta = os.path.join(d, "units.json")
+        try:
+            with open(meta, "r", encoding="utf-8") as f:
+                recs = json.load(f)
+            units = []
+            for n, rec in enumerate(recs):
+                dst = os.path.join(tmp_dir, f"{prefix}{n}.pdf")
+                _link_or_copy(os.path.join(d, rec["file"]), dst)
+                units.append((dst, rec["sheet"]))
+            os.utime(meta)  # LRU 用に最終利用時刻を更新
+        except (OSError, ValueError, KeyError):
+            # 未登録、または別プロセスが削除中
+            self.stats["miss"] += 1
+            return None
+        self.stats["hit"] += 1
+        return units
+
+    def put(self, key: str, units: List[Tuple[str, str]]):
+        final = os.path.join(self.entries_dir, key)
+        if os.path.isdir(final):
+            return
+        tmp = tempfile.mkdtemp(dir=self.entries_dir, prefix=".tmp_")
+        size = 0
+        try:
+            recs = []
+            for n, (p, sheet) in enumerate(units):
+                name = f"{n}.pdf"
+                shutil.copyfile(p, os.path.join(tmp, name))
+                size += os.path.getsize(p)
+                recs.append({"file": name, "sheet": sheet})
+            with open(os.path.join(tmp, "units.json"), "w", encoding="utf-8") as f:
+                json.dump(recs, f, ensure_ascii=False)
+            os.rename(tmp, final)
+        except OSError:
+            # 別プロセスが先に登録した等。キャッシュは失敗しても変換自体は続ける
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        if self._total is None:
+            self._total = self._scan()[1]
+        else:
+            self._total += size
+        if self._total > self.max_bytes:
+            self.prune()
+
+    # --- Eviction ---
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        entries = []
+        total = 0
+        for e in os.scandir(self.entries_dir):
+            if not e.is_dir() or e.name.startswith(".tmp_"):
+                continue
+            try:
+                used = os.stat(os.path.join(e.path, "units.json")).st_mtime
+                size = sum(x.stat().st_size for x in os.scandir(e.path))
+            except OSError:
+                continue
+            entries.append((used, size, e.path))
+            total += size
+        return entries, total
+
+    def prune(self):
+        """サイズ上限の 9 割まで、最後に使われたのが古い順に削除する"""
+        entries, total = self._scan()
+        limit = self.max_bytes * 0.9
+        for used, size, path in sorted(entries):
+            if total <= limit:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        self._total = total
+
+        # 内容ハッシュの記録は増え続けるので、1日以上前のものは捨てる（次回ハッシュを取り直すだけ）
+        cutoff = time.time() - 86400
+        for e in os.scandir(self.stat_dir):
+            try:
+                if e.stat().st_mtime < cutoff:
+                    os.remove(e.path)
+            except OSError:
+                pass
+
+
+def open_cache(cfg) -> Optional[ConversionCache]:
+    if not cfg.cache_enabled:
+        return None
+    try:
+        return ConversionCache(cfg.cache_dir or default_cache_dir(), int(cfg.cache_max_mb) * 1024 * 1024)
+    except OSError:
+        return None
@@ -0,0 +1,211 @@
+"""
+GUI なしでバッチ変換を行うコマンドライン入口（tkinter 不要）
+
+    python -m office2pdf 入力ファイル/フォルダ... [--config pdf_pro_config_v4.json] [--preset 名前] [--out 出力先]
+    python -m office2pdf --watch 監視フォルダ... --preset 名前      （ホットフォルダ。Ctrl+C で終了）
+    python -m office2pdf --serve [--port 8765]                       （ローカルの変換サーバー。Ctrl+C で終了）
+
+環境変数 O2P_FAKE_OFFICE=1 なら Office の代わりに FakeBackend を使う（Office の無い環境でのベンチマーク・動作確認用）。
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+from dataclasses import fields
+from typing import List, Optional
+
+from .config import AppConfig
+from .engine import BatchEngine
+from .ingest import iter_input_files
+from .office_pool import ComBackend, FakeBackend
+from .server import JobManager, serve
+from .sheets import fill_excel_sheets
+from .watch import HotFolder
+
+CONFIG_FILE = "pdf_pro_config_v4.json"
+
+# これが空でなければ Office の代わりに FakeBackend で変換する
+FAKE_OFFICE_ENV = "O2P_FAKE_OFFICE"
+
+
+def load_config(path: str, preset: str = "") -> AppConfig:
+    """
+    GUI の設定ファイル（{"current":…, "presets":…}）か、AppConfig そのままの JSON を読む。
+    preset が無ければ ValueError（メッセージにあるプリセットの一覧を入れる）。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if preset:
+        presets = data.get("presets", {})
+        if preset not in presets:
+            names = ", ".join(sorted(presets)) or "なし"
+            raise ValueError(f"プリセット {preset!r} が {path} にありません（あるもの: {names}）")
+        data = presets[preset]
+    elif "current" in data:
+        data = data["current"]
+    known = {f.name for f in fields(AppConfig)}
+    return AppConfig(**{k: v for k, v in data.items() if k in known})
+
+
+def load_presets(path: str) -> dict:
+    """GUI の設定ファイルのプリセット一覧（無ければ空）"""
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("presets", {})
+
+
+def collect_inputs(paths: List[str], recursive: bool = False) -> List[dict]:
+    """ファイルはそのまま、フォルダは中の対応ファイルを名前順に追加する（重複は除く）"""
+    return list(iter_input_files([os.path.abspath(p) for p in paths], recursive=recursive))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="office2pdf", description="Office/画像/PDF を一括でPDFに変換します")
+    ap.add_argument("inputs", nargs="*", help="入力ファイルまたはフォルダ（--watch の時は監視するフォルダ）")
+    ap.add_argument("--config", help=f"設定ファイル（既定: {CONFIG_FILE} があれば使用）")
+    ap.add_argument("--preset", default="", help="設定ファイル内のプリセット名")
+    ap.add_argument("-r", "--recursive", action="store_true", help="フォルダはサブフォルダの中も追加する")
+    ap.add_argument("--out", help="出力フォルダ（指定時はカスタム出力先）")
+    ap.add_argument("--naming", help="命名ルール（例: {seq}_{name}）")
+    ap.add_argument("--merge", action="store_true", help="1つのPDFに全結合する")
+    ap.add_argument("--parallel", action="store_true", help="マルチプロセスで並列変換する")
+    ap.add_argument("--cache", action="store_true", help="変換済み中間PDFのキャッシュを使う")
+    ap.add_argument(
+        "--pipeline",
+        type=int,
+        metavar="N",
+        help="変換し終えたファイルから仕上げ・書き出す時に段の間に溜める数（0=全部変換してから仕上げる）",
+    )
+    ap.add_argument(
+        "--metrics", nargs="?", const="", metavar="DIR", help="段階ごとの計測レポート（JSON / CSV）を書く（DIR 省略時は既定の場所）"
+    )
+    ap.add_argument(
+        "--resume",
+        nargs="?",
+        const="",
+        metavar="DIR",
+        help="中断したら同じ入力・設定で実行し直した時に続きから再開する（DIR: 記録の置き場所）",
+    )
+    ap.add_argument(
+        "--timeout", type=float, metavar="SECS", help="Office の変換1件あたりの制限時間（全種別、0=制限なし）"
+    )
+    ap.add_argument("--retries", type=int, help="制限時間を過ぎた時の再試行回数")
+    ap.add_argument("--quarantine", metavar="DIR", help="再試行しても終わらなかったファイルのコピー先")
+    ap.add_argument(
+        "--on-exists",
+        choices=["rename", "overwrite", "skip"],
+        default="rename",
+        help="出力先が既にある場合（既定: 連番を付ける）",
+    )
+    ap.add_argument(
+        "--watch", action="store_true", help="フォルダを監視し、置かれたファイルを変換して done / failed に移し続ける"
+    )
+    ap.add_argument("--interval", type=float, default=2.0, help="--watch: フォルダを調べる間隔(秒)")
+    ap.add_argument("--settle", type=float, default=5.0, help="--watch: 書き込みが止まってから処理するまでの秒数")
+    ap.add_argument("--serve", action="store_true", help="ローカルの変換サーバーとして待ち受ける（HTTP）")
+    ap.add_argument("--host", default="127.0.0.1", help="--serve: 待ち受けるアドレス")
+    ap.add_argument("--port", type=int, default=8765, help="--serve: ポート")
+    ap.add_argument("--workers", type=int, default=1, help="--serve: 同時に変換するジョブ数")
+    ap.add_argument("--queue", type=int, default=16, help="--serve: 待たせておけるジョブ数（超えたら 429）")
+    ap.add_argument("--jobs-dir", help="--serve: アップロード・出力の置き場所（既定: 一時フォルダ）")
+    ap.add_argument("--lang", choices=["ja", "en"], default="en")
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = build_parser()
+    args = ap.parse_args(argv)
+    if not args.inputs and not args.serve:
+        ap.error("入力ファイルまたはフォルダを指定してください")
+
+    cfg_path = args.config or (CONFIG_FILE if os.path.exists(CONFIG_FILE) else "")
+    try:
+        cfg = load_config(cfg_path, args.preset) if cfg_path else AppConfig()
+    except (OSError, ValueError) as e:
+        ap.error(str(e))
+    if args.out:
+        cfg.out_mode, cfg.output_dir = "custom", os.path.abspath(args.out)
+    if args.naming:
+        cfg.naming_tpl = args.naming
+    if args.merge:
+        cfg.merge_all = True
+    if args.parallel:
+        cfg.parallel = True
+    if args.cache:
+        cfg.cache_enabled = True
+    if args.pipeline is not None:
+        cfg.pipeline_depth = args.pipeline
+    if args.metrics is not None:
+        cfg.metrics_enabled = True
+        cfg.metrics_dir = os.path.abspath(args.metrics) if args.metrics else cfg.metrics_dir
+    if args.resume is not None:
+        cfg.journal_enabled = True
+        cfg.journal_dir = os.path.abspath(args.resume) if args.resume else cfg.journal_dir
+    if args.timeout is not None:
+        cfg.office_timeouts = {kind: args.timeout for kind in cfg.office_timeouts}
+    if args.retries is not None:
+        cfg.office_retries = args.retries
+    if args.quarantine:
+        cfg.quarantine_dir = os.path.abspath(args.quarantine)
+
+    def log(msg: str):
+        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {msg}", file=sys.stderr)
+
+    backend = FakeBackend() if os.environ.get(FAKE_OFFICE_ENV) else ComBackend()
+    if args.serve:
+        root = os.path.abspath(args.jobs_dir) if args.jobs_dir else tempfile.mkdtemp(prefix="o2p_jobs_")
+        manager = JobManager(
+            backend,
+            root,
+            workers=args.workers,
+            queue_size=args.queue,
+            presets=load_presets(cfg_path),
+            base_cfg=cfg,
+            log=log,
+        )
+        serve(manager, args.host, args.port)
+        return 0
+    if args.watch:
+        hot = HotFolder(
+            args.inputs, cfg, backend, log=log, interval=args.interval, settle=args.settle, lang=args.lang
+        )
+        try:
+            hot.run()
+        except KeyboardInterrupt:
+            hot.stop()
+        return 0
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        print("No input files.", file=sys.stderr)
+        return 2
+
+    # シート一覧は .xlsx / .xlsm だけ先に読む（.xls は変換時に開いたついでに調べる）
+    fill_excel_sheets(files, use_com=False)
+
+    on_exists = {"rename": lambda d: False, "overwrite": lambda d: True, "skip": lambda d: None}[args.on_exists]
+
+    engine = BatchEngine(
+        cfg,
+        files,
+        backend=backend,
+        log=log,
+        on_exists=on_exists,
+        lang=args.lang,
+    )
+    try:
+        outputs = engine.run()
+    except KeyboardInterrupt:
+        engine.cancel_event.set()
+        return 130
+    except Exception as e:
+        log(f"{engine._('log_fatal')}: {e}")
+        return 1
+
+    for o in outputs:
+        print(o)
+    return 0 if outputs else 1
@@ -0,0 +1,95 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass
+class AppConfig:
+    output_dir: str = ""
+    out_mode: str = "original"
+    naming_tpl: str = "{name}"
+    auto_open: bool = True
+    open_folder: bool = False
+    clear_after: bool = False
+    compress_pdf: bool = False  # 追加
+
+    wm1_text: str = ""
+    wm1_pos: str = "None"
+    wm2_text: str = ""
+    wm2_pos: str = "None"
+
+    wm_font: str = ""
+    wm_size: int = 60
+    wm_color: str = "#C0C0C0"
+    wm_alpha: float = 0.3
+
+    pg_enabled: bool = False
+    pg_pos: str = "bc"
+    pg_format: str = "- {n} / {total} -"
+
+    merge_all: bool = False
+    split_word_page: bool = False
+    split_ppt_page: bool = False
+    split_pdf_page: bool = False
+    split_excel_sheet: bool = False
+    split_excel_page: bool = False
+
+    password: str = ""
+    excel_fit: bool = False
+    excel_fit_tall: bool = False
+    clear_metadata: bool = False
+
+    # 透かしを Form XObject で重ねる（False なら従来どおりページ毎に merge_page）
+    fast_stamp: bool = True
+
+    # PDF軽量化（compress_pdf）時の画像縮小。ページに対して image_dpi を超える画像を縮小して JPEG にする
+    # （image_dpi=0 なら画像はそのまま。image_workers は縮小を並列に行うスレッド数）
+    image_dpi: int = 150
+    image_quality: int = 75
+    image_workers: int = 4
+
+    # 全結合時に同時に開くPDFの数（読んだ分から書き出す。0=従来どおり全部開いてから書く）
+    merge_max_open: int = 32
+
+    # 出力を小さく書く（同じ内容のフォント・画像などを1つにまとめ、オブジェクトストリームと xref ストリームで書く。PDF 1.5）
+    compact_output: bool = False
+
+    # Office インスタンスを何件ごとに再起動するか（0=再起動しない）
+    office_recycle_after: int = 50
+
+    # Office の変換1件あたりの制限時間（秒、種別ごと。0=制限なし）。過ぎたら Office をプロセスごと止め、
+    # office_retry_backoff 秒（回ごとに倍）待って office_retries 回まで再試行する。
+    # それでも終わらないファイルは quarantine_dir（空なら %LOCALAPPDATA%\Office2PDF\quarantine）にコピーして飛ばす
+    office_timeouts: Dict[str, float] = field(default_factory=lambda: {"Word": 300, "Excel": 600, "PowerPoint": 300})
+    office_retries: int = 2
+    office_retry_backoff: float = 5.0
+    quarantine_dir: str = ""
+
+    # 全結合以外で、変換し終えたファイルから仕上げ・書き出しを始める（変換・仕上げ・書き出しを並行させる）。
+    # 段の間に溜める件数。0=従来どおり全部変換してから仕上げる
+    pipeline_depth: int = 4
+
+    # 並列変換（プロセス毎に STA と Office を持つ）と種別ごとの並列数
+    # PowerPoint はシングルインスタンスなので 1 のままにしておく
+    parallel: bool = False
+    parallel_workers: Dict[str, int] = field(
+        default_factory=lambda: {"Word": 2, "Excel": 2, "PowerPoint": 1, "Image": 2, "PDF": 2}
+    )
+
+    # 変換済み中間PDFのキャッシュ（cache_dir が空なら %LOCALAPPDATA%\Office2PDF\cache）
+    cache_enabled: bool = False
+    cache_dir: str = ""
+    cache_max_mb: int = 2048
+
+    # 段階ごとの計測レポート（JSON / CSV）を書く。metrics_dir が空なら %LOCALAPPDATA%\Office2PDF\metrics
+    metrics_enabled: bool = False
+    metrics_dir: str = ""
+
+    # 中断したバッチを同じ入力・設定で実行し直した時に続きから再開する（変換済み・出力済みを飛ばす）。
+    # journal_dir が空なら %LOCALAPPDATA%\Office2PDF\journal
+    journal_enabled: bool = False
+    journal_dir: str = ""
+
+    def __post_init__(self):
+        if not self.output_dir:
+            self.output_dir = os.path.expanduser(r"~\Desktop")
@@ -0,0 +1,285 @@
+"""
+各種ファイル → PDF 変換。Office は OfficePool 経由で常駐インスタンスを使う。
+GUI に依存しないので、並列変換のワーカープロセスからも呼ばれる。
+"""
+
+import os
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+from pypdf import PdfReader
+
+from .cache import ConversionCache
+from .i18n import I18N
+from .imagepdf import image_to_pdf
+from .office_pool import OfficePool, OfficeTimeout
+from .sheets import printable_sheets
+
+ALL_PAGES_LABELS = ("全ページ", "All Pages")
+
+
+class EmptyRangeError(ValueError):
+    """範囲指定を反映した結果、1ページも残らなかった"""
+
+
+class BatchCancelled(Exception):
+    """キャンセルされた（途中まで書いた出力は投げた側が片付けてある）"""
+
+
+def _target_sheets(f: dict) -> Optional[List[str]]:
+    """
+    シート情報（sheets.fill_excel_sheets）があれば、非表示・空のシートを除いた対象シート名を返す。
+    無ければ None（Excel で開いてから決める）。
+    """
+    sheet_info = f.get("sheet_info")
+    if sheet_info is None:
+        return None
+    printable = set(printable_sheets(sheet_info))
+    r_spec = f.get("range", "")
+    if is_all_range(r_spec):
+        names = [s["name"] for s in sheet_info]
+    else:
+        names = [s.strip() for s in r_spec.split(",") if s.strip()]
+    return [n for n in names if n in printable]
+
+
+def convert_excel_units(
+    f: dict, tmp_dir: str, cfg, pool: OfficePool, prefix: str = "ex_", cancel_event=None
+) -> List[Tuple[str, str]]:
+    """
+    対象シートを1枚ずつPDF化し、[(pdfパス, シート名), ...] を返す（印刷範囲優先）。
+    cancel_event がセットされたら次のシートに進まずに BatchCancelled を投げる。
+    """
+    units = []
+    known = _target_sheets(f)
+    if known == []:
+        # 出力するシートが無いので Excel を開かない
+        return units
+
+    with pool.session("Excel") as excel:
+        wb = excel.Workbooks.Open(os.path.abspath(f["path"]), ReadOnly=True)
+        try:
+            r_spec = f.get("range", "")
+            if known is not None:
+                target_sheets = known
+            elif is_all_range(r_spec):
+                target_sheets = [s.Name for s in wb.Sheets]
+            else:
+                target_sheets = [s.strip() for s in r_spec.split(",") if s.strip()]
+
+            for name in target_sheets:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise BatchCancelled(f["path"])
+                try:
+                    ws = wb.Worksheets(name)
+                    if ws.Visible != -1:
+                        continue
+
+                    ps = ws.PageSetup
+                    if cfg.excel_fit or cfg.excel_fit_tall:
+                        ps.Zoom = False
+                        if cfg.excel_fit:
+                            ps.FitToPagesWide = 1
+                        if cfg.excel_fit_tall:
+                            ps.FitToPagesTall = 1
+
+                    tmp_p = os.path.join(tmp_dir, f"{prefix}{len(units)}.pdf")
+                    ws.ExportAsFixedFormat(0, tmp_p)
+                    units.append((tmp_p, name))
+                except Exception:
+                    # 止められた Excel で残りのシートを試しても無駄（session が OfficeTimeout にする）
+                    if pool.timed_out("Excel"):
+                        raise
+                    continue
+        finally:
+            wb.Close(False)
+    return units
+
+
+def convert_word(f: dict, out: str, pool: OfficePool) -> bool:
+    try:
+        with pool.session("Word") as word:
+            doc = word.Documents.Open(os.path.abspath(f["path"]), ReadOnly=True)
+            try:
+                doc.ExportAsFixedFormat(os.path.abspath(out), 17)
+            finally:
+                doc.Close(False)
+        return True
+    except OfficeTimeout:
+        raise
+    except Exception:
+        return False
+
+
+def convert_ppt(f: dict, out: str, pool: OfficePool, log: Optional[Callable[[str], None]] = None) -> bool:
+    try:
+        with pool.session("PowerPoint") as ppt:
+            abs_path = os.path.abspath(f["path"])
+            abs_out = os.path.abspath(out)
+
+            # Open(FileName, ReadOnly, Untitled, WithWindow)
+            pres = ppt.Presentations.Open(abs_path, True, False, False)
+            try:
+                # ★ExportAsFixedFormat の既知回避（PrintRange=None）
+                pres.ExportAsFixedFormat(abs_out, 2, PrintRange=None)
+            finally:
+                pres.Close()
+        return True
+
+    except OfficeTimeout:
+        raise
+    except Exception as e:
+        if log:
+            log(f"PPT変換エラー ({os.path.basename(f['path'])}): {e}")
+        return False
+
+
+def convert_image(f: dict, out: str) -> bool:
+    # JPEG/PNG は再圧縮せずにそのまま埋め込む（透過も残す）
+    try:
+        image_to_pdf(f["path"], out)
+        return True
+    except:
+        return False
+
+
+def count_pdf_pages(path: str) -> int:
+    """ファイル全体をメモリに読み込まずにページ数だけ数える（数百MBのスキャンPDFでも軽い）"""
+    with open(path, "rb") as fh:
+        return len(PdfReader(fh).pages)
+
+
+# --- Range ---
+def is_all_range(s: str) -> bool:
+    s = (s or "").strip()
+    return not s or s in ALL_PAGES_LABELS
+
+
+def parse_page_spec(spec: str, total_pages: int) -> List[int]:
+    """
+    spec例: "1-3,5,8-" / "2" / "1-" / "-3"（-3は1-3扱い）
+    戻り値: 0-based page indices（重複排除、昇順）
+    """
+    if is_all_range(spec):
+        return list(range(total_pages))
+
+    spec = spec.replace(" ", "")
+    out = set()
+
+    for token in [t for t in spec.split(",") if t]:
+        m = re.fullmatch(r"(\d+)?-(\d+)?", token)
+        if m:
+            a, b = m.group(1), m.group(2)
+            start = int(a) if a else 1
+            end = int(b) if b else total_pages
+            start = max(1, start)
+            end = min(total_pages, end)
+            if start <= end:
+                for p in range(start, end + 1):
+                    out.add(p - 1)
+            continue
+
+        if token.isdigit():
+            p = int(token)
+            if 1 <= p <= total_pages:
+                out.add(p - 1)
+
+    return sorted(out)
+
+
+def _convert_with_retry(
+    f: dict, idx: int, tmp_dir: str, cfg, pool: OfficePool, log: Optional[Callable[[str], None]], cancel_event=None
+) -> List[Tuple[str, str]]:
+    """
+    _convert_raw を呼び、Office が制限時間を過ぎて止められたら cfg.office_retries 回まで再試行する。
+    待ち時間は cfg.office_retry_backoff 秒から回ごとに倍にする（キャンセルされたらすぐ抜ける）。
+    それでも終わらなければ OfficeTimeout をそのまま投げる（隔離するかは呼び出し側が決める）。
+    """
+    retries = max(0, cfg.office_retries)
+    attempt = 0
+    while True:
+        try:
+            return _convert_raw(f, idx, tmp_dir, cfg, pool, log, cancel_event)
+        except OfficeTimeout as e:
+            if attempt >= retries:
+                raise
+            wait = cfg.office_retry_backoff * (2**attempt)
+            attempt += 1
+            if log:
+                msg = I18N[pool.lang]["log_office_retry"]
+                log(msg.format(name=os.path.basename(f["path"]), err=e, wait=wait, attempt=attempt, retries=retries))
+            if cancel_event is None:
+                time.sleep(wait)
+            elif cancel_event.wait(wait):
+                raise BatchCancelled(f["path"]) from e
+
+
+def _convert_raw(
+    f: dict, idx: int, tmp_dir: str, cfg, pool: OfficePool, log: Optional[Callable[[str], None]], cancel_event=None
+) -> List[Tuple[str, str]]:
+    if f["type"] == "Excel":
+        return convert_excel_units(f, tmp_dir, cfg, pool, prefix=f"ex_{idx}_", cancel_event=cancel_event)
+
+    tmp_p = os.path.join(tmp_dir, f"conv_{idx}.pdf")
+    ok = False
+    if f["type"] == "Word":
+        ok = convert_word(f, tmp_p, pool)
+    elif f["type"] == "PowerPoint":
+        ok = convert_ppt(f, tmp_p, pool, log=log)
+    elif f["type"] == "Image":
+        ok = convert_image(f, tmp_p)
+    return [(tmp_p, "")] if ok else []
+
+
+def convert_file(
+    f: dict,
+    idx: int,
+    tmp_dir: str,
+    cfg,
+    pool: OfficePool,
+    log: Optional[Callable[[str], None]] = None,
+    cache: Optional[ConversionCache] = None,
+    cancel_event=None,
+) -> List[Tuple[str, str, Optional[List[int]]]]:
+    """
+    1ファイルを変換し、[(pdfパス, シート名, 使うページ番号 or None=全ページ), ...] を返す。
+    range指定はPDFを書き直さず、0-based のページ番号として返す（仕上げ時に元PDFから直接取り出す）。
+    PDF入力は変換もコピーもせず、元ファイルをそのまま参照する。
+    変換失敗は空リスト、範囲指定で1ページも残らなければ EmptyRangeError。
+    一時ファイル名は idx で区別するので、並列に呼んでも衝突しない。
+    cache があれば range 反映前の変換結果をキャッシュから取り出す／登録する。
+    cancel_event は Excel のシートごとに見る（実行中の Office を止めるのは OfficePool）。
+    Office が制限時間内に終わらなければ再試行し、それでもだめなら OfficeTimeout。
+    """
+    if f["type"] == "PDF":
+        units = [(f["path"], "")]
+    else:
+        key = cache.key_for(f, cfg) if cache else None
+        units = cache.get(key, tmp_dir, f"cache_{idx}_") if key else None
+        if units is None:
+            units = _convert_with_retry(f, idx, tmp_dir, cfg, pool, log, cancel_event)
+            if key and units:
+                cache.put(key, units)
+
+    # Excel はシート指定を変換時に反映済み
+    if f["type"] == "Excel" or not units:
+        return [(p, sheet, None) for p, sheet in units]
+
+    # --- F: range指定をページ番号にする ---
+    tmp_p = units[0][0]
+    r_spec = f.get("range", "")
+    if is_all_range(r_spec) and f["type"] != "PDF":
+        return [(tmp_p, "", None)]
+    try:
+        # 壊れた/暗号化されたPDFはここで弾く（以前の再保存と同じく変換失敗扱い）
+        total = count_pdf_pages(tmp_p)
+    except Exception:
+        return []
+    if is_all_range(r_spec):
+        return [(tmp_p, "", None)]
+
+    idxs = parse_page_spec(r_spec, total)
+    if not idxs:
+        raise EmptyRangeError(f["path"])
+    return [(tmp_p, "", idxs)]
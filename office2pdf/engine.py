@@ -0,0 +1,1013 @@
+"""
+GUI から独立したバッチ変換エンジン。
+
+ファイルリストと AppConfig を受け取り、変換 → 透かし/ページ番号 → 出力までを行って
+出力したPDFのパスを返す。tkinter には依存しないので、CLI やサーバーからも使える。
+"""
+
+import datetime
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from pypdf import PdfReader, PdfWriter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .cache import open_cache
+from .config import AppConfig
+from .converters import BatchCancelled, EmptyRangeError, convert_file, count_pdf_pages
+from .fonts import build_registry_font_map
+from .i18n import I18N
+from .journal import BatchJournal, open_journal
+from .metrics import NULL_METRICS, BatchMetrics, default_metrics_dir
+from .office_pool import ComBackend, OfficeBackend, OfficePool, OfficeTimeout, com_apartment
+from .optimize import ImageOptimizer, flate_encode_streams
+from .parallel import iter_parallel
+from .pdfstream import StreamingPdfWriter
+from .pipeline import InOrder, PipelineStage
+from .preflight import PreflightIndex, find_problems
+from .quarantine import default_quarantine_dir, quarantine_file
+from .stamping import FormStamper, is_page_invariant, page_to_form
+from .templates import PAGE_NUMBER_ALIASES, apply_tags, compile_template
+
+SUPPORTED_EXTS = {
+    ".docx": "Word",
+    ".doc": "Word",
+    ".xlsx": "Excel",
+    ".xls": "Excel",
+    ".xlsm": "Excel",
+    ".pptx": "PowerPoint",
+    ".ppt": "PowerPoint",
+    ".pdf": "PDF",
+    ".jpg": "Image",
+    ".jpeg": "Image",
+    ".png": "Image",
+}
+
+
+def make_file_info(path: str) -> Optional[dict]:
+    """対応形式ならファイルリスト用の dict を返す（Excel のシート名は空のまま）"""
+    # 文字列検索ではなく、拡張子で正確に判定する
+    t = SUPPORTED_EXTS.get(os.path.splitext(path)[1].lower())
+    if t is None:
+        return None
+    return {"path": path, "type": t, "range": "全ページ", "sheets": [], "sheet_info": None}
+
+
+# ページ分割時、この枚数ごとに reader の解析済みオブジェクトを捨てる
+SPLIT_TRIM_EVERY = 200
+
+# 透かしのオーバーレイはこのページ数ごとに描く（canvas.save / 解析は途中で止められないので、
+# 何千ページあってもキャンセルを待たせないように分ける）
+STAMP_CHUNK = 500
+
+# atomic_output が出力先のフォルダに作る一時ファイルの名前
+TEMP_PREFIX, TEMP_SUFFIX = ".o2p_", ".pdf"
+
+
+@contextmanager
+def atomic_output(dest: str):
+    """
+    dest と同じフォルダの一時ファイルに書かせ、最後まで書けたら dest に rename する。
+    途中で失敗・キャンセルしたら一時ファイルを消すので、dest に書きかけの PDF が現れることはない
+    （dest が入力のどれかと同じでも、読み終わるまでは元のまま残る）。
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), prefix=TEMP_PREFIX, suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            yield fh
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def iter_pages_bounded(reader: PdfReader, idxs: Optional[Sequence[int]] = None, trim_every: int = SPLIT_TRIM_EVERY):
+    """
+    (何枚目か, PageObject) を順に返す。idxs があればそのページ（0-based）だけ。
+    pypdf は一度解析したオブジェクト（コンテンツストリーム・画像など）を reader に溜め続けるので、
+    何千ページも分割するとメモリが増え続ける。処理済みページの分は定期的に捨てる
+    （必要になれば元データから解析し直されるだけ）。
+    """
+    if idxs is None:
+        idxs = range(len(reader.pages))
+    for n, k in enumerate(idxs):
+        if n and n % trim_every == 0:
+            reader.resolved_objects.clear()
+        yield n, reader.pages[k]
+
+
+class BatchEngine:
+    """
+    files: [{"path", "type", "range", "sheets"}, ...]（GUI の self.files と同じ形）
+    log / progress: GUI の queue_log / queue_progress と同じ形のコールバック
+    on_exists: 出力先が既にある時に呼ばれる。True=上書き, False=連番, None=中止
+    preflight: GUI で追加時から下調べしている索引（無ければ run の最初に調べる）
+    pool: バッチをまたいで Office を温めておく時の OfficePool（無ければ run ごとに起動・終了する）
+    keep_going: 1ファイルの変換・仕上げで例外が起きてもログに出してそのファイルだけ飛ばし、残りを続ける
+    （ホットフォルダ用。False ならバッチ全体を止める）
+    """
+
+    def __init__(
+        self,
+        cfg: AppConfig,
+        files: List[Dict[str, Any]],
+        backend: Optional[OfficeBackend] = None,
+        log: Optional[Callable[[str], None]] = None,
+        progress: Optional[Callable[..., None]] = None,
+        on_exists: Optional[Callable[[str], Optional[bool]]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        lang: str = "en",
+        font_map: Optional[Dict[str, Tuple[str, int]]] = None,
+        preflight: Optional[PreflightIndex] = None,
+        pool: Optional[OfficePool] = None,
+        keep_going: bool = False,
+    ):
+        self.cfg = cfg
+        self.files = files
+        self.backend = backend or ComBackend()
+        self.log = log or (lambda msg: None)
+        self.progress = progress or (lambda **kw: None)
+        self.on_exists = on_exists or (lambda dest: False)
+        self.cancel_event = cancel_event or threading.Event()
+        self.lang = lang
+        self._font_map = font_map
+        self.cache = open_cache(cfg)
+        self.cache_hits = 0
+        self.preflight = preflight
+        self.pool = pool
+        self.keep_going = keep_going
+        self.skip: Dict[int, str] = {}
+        # 制限時間内に変換が終わらず隔離したファイル（元のパス → 隔離先のコピー）
+        self.quarantined: Dict[str, str] = {}
+        # 出力まで終わったファイル・keep_going で飛ばしたファイル（self.files の番号）
+        self.finished: Set[int] = set()
+        self.failed: Set[int] = set()
+        self.journal: Optional[BatchJournal] = None
+        self.metrics = NULL_METRICS
+        # 開始から最初の出力を書き終えるまでの秒数（前回書き終えていた出力は数えない）
+        self.first_output_secs: Optional[float] = None
+        self._t0 = time.perf_counter()
+        # 出力先に決めたが、まだ書き出していないパス（同名の出力が同じパスを選ばないようにする）
+        self._reserved: Set[str] = set()
+        # {date:…} はバッチ開始時刻で揃える（ファイルごと・ページごとにずれない）
+        self.started = datetime.datetime.now()
+        self.image_optimizer: Optional[ImageOptimizer] = None
+        if cfg.compress_pdf and cfg.image_dpi > 0:
+            self.image_optimizer = ImageOptimizer(cfg.image_dpi, cfg.image_quality, cfg.image_workers)
+
+    def _(self, key: str) -> str:
+        return I18N[self.lang].get(key, key)
+
+    @property
+    def font_map(self) -> Dict[str, Tuple[str, int]]:
+        if self._font_map is None:
+            self._font_map = build_registry_font_map()
+        return self._font_map
+
+    # --- Batch ---
+    def run(self) -> List[str]:
+        """バッチ全体を処理し、出力したPDFのパスを順に返す"""
+        cfg = self.cfg
+        outputs: List[str] = []
+        self.started = datetime.datetime.now()
+        self.quarantined = {}
+        self.finished = set()
+        self.failed = set()
+        self.first_output_secs = None
+        self._t0 = time.perf_counter()
+        self._reserved = set()
+        self.metrics = BatchMetrics() if cfg.metrics_enabled else NULL_METRICS
+        self.journal = open_journal(cfg, self.files)
+        if self.journal is not None:
+            self.started = self.journal.start(self.started)
+            if self.journal.resumed:
+                self.log(
+                    f"{self._('log_resume')} {len(self.journal.units)} / {len(self.files)}, "
+                    f"{len(self.journal.outputs)} PDF"
+                )
+                self.remove_stale_temps()
+        pool = self.pool or OfficePool(
+            self.backend,
+            max_uses=cfg.office_recycle_after,
+            log=self.log,
+            cancel_event=self.cancel_event,
+            timeouts=cfg.office_timeouts,
+            lang=self.lang,
+        )
+        completed = False
+        try:
+            # 渡されたプールは閉じない（呼び出し側がバッチをまたいで使う）
+            with com_apartment(), (nullcontext() if pool is self.pool else pool):
+                # 再開できるようにする時は、中間PDFを記録と一緒に残す
+                work_dir = nullcontext(self.journal.work_dir) if self.journal else tempfile.TemporaryDirectory()
+                with work_dir as tmp_dir:
+                    self.run_preflight()
+                    self.progress(max=len(self.files), progress=0, label=self._("st_converting"))
+                    if not cfg.merge_all and cfg.pipeline_depth > 0:
+                        try:
+                            self.run_pipeline(tmp_dir, pool, outputs)
+                        finally:
+                            self.close_image_optimizer()
+                        if self.cancel_event.is_set():
+                            return outputs
+                    else:
+                        results = self.convert(tmp_dir, pool)
+
+                        # 完了順に関係なく self.files の順に並べ直す（merge_all / {seq} を決定的にする）
+                        temp_units = []
+                        for i in range(len(self.files)):
+                            temp_units.extend(self.unit_dicts(i, results.get(i, [])))
+
+                        if self.cancel_event.is_set():
+                            return outputs
+
+                        if temp_units:
+                            self.progress(label=self._("st_finalizing"))
+                            try:
+                                self.finalize_all(temp_units, tmp_dir, outputs)
+                            finally:
+                                self.close_image_optimizer()
+                        self.finished = {u["fseq"] - 1 for u in temp_units} - self.failed
+            completed = True
+            if self.first_output_secs is not None:
+                self.log(
+                    f"{self._('log_first_output')} {self.first_output_secs:.2f}s / "
+                    f"{self._('log_makespan')} {time.perf_counter() - self._t0:.2f}s"
+                )
+            return outputs
+        except BatchCancelled:
+            # 書きかけの出力は投げた側で消してあり、一時フォルダは with を抜けた時に消えている
+            self.log(self._("log_cancelled"))
+            return outputs
+        finally:
+            if self.journal is not None:
+                # 最後まで終わらなかった時は、次に同じバッチを実行した時の再開用に残す
+                if completed:
+                    self.journal.finish()
+                else:
+                    self.journal.close()
+            if self.metrics.enabled:
+                self.report_metrics(outputs, pool.stats)
+
+    def report_metrics(self, outputs: List[str], office_stats: dict):
+        """計測結果の要約をログに出し、JSON / CSV のレポートを書く（書けなくてもバッチは失敗にしない）"""
+        m = self.metrics
+        m.finish()
+        m.extra.update(
+            files=len(self.files),
+            outputs=len(outputs),
+            cancelled=self.cancel_event.is_set(),
+            office=dict(office_stats),
+            first_output_secs=self.first_output_secs,
+        )
+        self.log(f"{self._('log_metrics')} {m.summary_line()}")
+        try:
+            path = m.write_report(self.cfg.metrics_dir or default_metrics_dir())
+        except OSError as e:
+            self.log(f"{self._('log_metrics')} {e}")
+            return
+        self.log(f"{self._('log_metrics_report')} {path}")
+
+    def measure_units(self, rec: dict, f: dict, units: list, hits_before: int):
+        """変換結果の読み書きバイト数・ページ数・キャッシュヒットを rec に記入する（計測時のみ呼ぶ）"""
+        rec["bytes_in"] = os.path.getsize(f["path"])
+        rec["bytes_out"] = sum(os.path.getsize(p) for p, _, _ in units if p != f["path"])
+        rec["pages"] = sum(len(idxs) if idxs else count_pdf_pages(p) for p, _, idxs in units)
+        rec["cache_hit"] = self.cache is not None and self.cache.stats["hit"] > hits_before
+
+    def quarantine(self, f: dict, err: BaseException):
+        """再試行しても終わらなかったファイルを隔離フォルダにコピーして記録する（バッチは続ける）"""
+        name = os.path.basename(f["path"])
+        try:
+            dest = quarantine_file(f["path"], str(err), self.cfg.quarantine_dir or default_quarantine_dir())
+        except OSError as e:
+            dest = ""
+            self.log(f"{self._('log_quarantined')} {name} ({e})")
+        else:
+            self.log(f"{self._('log_quarantined')} {name} → {dest}")
+        self.quarantined[f["path"]] = dest
+
+    def output_dirs(self) -> Set[str]:
+        """このバッチの出力先フォルダ"""
+        if self.cfg.out_mode == "original":
+            return {os.path.dirname(os.path.abspath(f["path"])) for f in self.files}
+        return {os.path.abspath(self.cfg.output_dir)}
+
+    def remove_stale_temps(self):
+        """再開時、前回落ちた時に atomic_output が出力先に残した一時ファイルを消す"""
+        for d in self.output_dirs():
+            try:
+                names = os.listdir(d)
+            except OSError:
+                continue
+            for name in names:
+                if name.startswith(TEMP_PREFIX) and name.endswith(TEMP_SUFFIX):
+                    try:
+                        os.remove(os.path.join(d, name))
+                    except OSError:
+                        pass
+
+    def resumed_units(self) -> Dict[int, List[Tuple[str, str, Optional[List[int]]]]]:
+        """再開時、前回変換し終えていたファイルの変換結果（self.files の番号 → units）"""
+        if self.journal is None:
+            return {}
+        done = {}
+        for i in range(len(self.files)):
+            units = self.journal.converted(i)
+            if units is not None and i not in self.skip:
+                done[i] = units
+        return done
+
+    def written_before(self, key: str) -> Optional[str]:
+        """再開時、key の出力を前回書き終えていればそのパス"""
+        return self.journal.written(key) if self.journal is not None else None
+
+    def resumed_output(self, key: str, outputs: List[str]) -> bool:
+        """再開時、key の出力を前回書き終えていれば outputs に足して True を返す"""
+        dest = self.written_before(key)
+        if dest is None:
+            return False
+        outputs.append(dest)
+        return True
+
+    def commit_output(self, key: str, dest: str, outputs: List[str]):
+        outputs.append(dest)
+        if self.first_output_secs is None:
+            self.first_output_secs = time.perf_counter() - self._t0
+        if self.journal is not None:
+            self.journal.add_output(key, dest)
+
+    def emit_output(self, key: str, writer: Optional[StreamingPdfWriter], dest: str, outputs: List[str]):
+        """仕上げた出力を dest に書き出して記録する（writer が None なら前回書き終えていた出力）"""
+        if writer is None:
+            outputs.append(dest)
+            return
+        try:
+            self.write_output(writer, dest)
+        finally:
+            self._reserved.discard(dest)
+        self.commit_output(key, dest, outputs)
+
+    def file_failed(self, i: int, err: BaseException):
+        """
+        keep_going の時、self.files[i] を失敗として記録して続ける。そうでなければ err を投げ直す
+        （キャンセルで Office を止めたことによるエラーは BatchCancelled にする）。
+        """
+        self.check_cancel()
+        if not self.keep_going:
+            raise err
+        self.failed.add(i)
+        self.log(f"{self._('log_conv_fail')} {os.path.basename(self.files[i]['path'])}: {err}")
+
+    def check_cancel(self):
+        """キャンセルされていれば BatchCancelled を投げる（ページ・シートごとに呼ぶ）"""
+        if self.cancel_event.is_set():
+            raise BatchCancelled()
+
+    def close_image_optimizer(self):
+        opt = self.image_optimizer
+        if opt is None:
+            return
+        opt.close()
+        if opt.images:
+            mb = 1024 * 1024
+            self.log(
+                f"{self._('log_images_optimized')} {opt.images} "
+                f"({opt.bytes_before / mb:.1f} MB → {opt.bytes_after / mb:.1f} MB)"
+            )
+
+    def run_preflight(self):
+        """変換しても失敗すると分かっているファイルを先にまとめて報告し、変換対象から外す"""
+        index = self.preflight or PreflightIndex()
+        try:
+            with self.metrics.stage("preflight", f"{len(self.files)} files"):
+                metas = index.wait(self.files)
+        finally:
+            if index is not self.preflight:
+                index.close()
+        self.skip = find_problems(self.files, metas)
+        for i, key in self.skip.items():
+            self.log(f"{self._(key)} {os.path.basename(self.files[i]['path'])}")
+
+    def convert(
+        self, tmp_dir: str, pool: OfficePool, on_done: Optional[Callable[[int, list], None]] = None
+    ) -> Dict[int, List[Tuple[str, str, Optional[List[int]]]]]:
+        """
+        全ファイルを変換し、self.files の番号 → units を返す。
+        on_done があれば、ファイルごとに結果が決まった時点で (番号, units) を渡す
+        （飛ばした・失敗したファイルは units が空。並列変換では完了順）。
+        """
+        if self.cfg.parallel:
+            results = self.convert_parallel(tmp_dir, on_done)
+        else:
+            results = self.convert_serial(tmp_dir, pool, on_done)
+        if self.cache is not None:
+            self.log(f"{self._('log_cache_hits')} {self.cache_hits} / {len(self.files)}")
+        return results
+
+    def convert_serial(
+        self, tmp_dir: str, pool: OfficePool, on_done: Optional[Callable[[int, list], None]] = None
+    ) -> Dict[int, List[Tuple[str, str, Optional[List[int]]]]]:
+        results = self.resumed_units()
+        for i, f in enumerate(self.files):
+            if self.cancel_event.is_set():
+                break
+            if i not in self.skip and i not in results:
+                self.convert_one(i, f, tmp_dir, pool, results)
+            if on_done is not None:
+                on_done(i, results.get(i, []))
+        if self.cache is not None:
+            self.cache_hits = self.cache.stats["hit"]
+        return results
+
+    def convert_one(self, i: int, f: dict, tmp_dir: str, pool: OfficePool, results: dict):
+        """1ファイル変換して results[i] に入れる（範囲が空・隔離したものは入れない）"""
+        self.progress(
+            progress=i + 1,
+            label=f"{self._('st_conv_file')} {os.path.basename(f['path'])}",
+        )
+        try:
+            with self.metrics.stage("convert", os.path.basename(f["path"])) as rec:
+                hits = self.cache.stats["hit"] if self.cache is not None else 0
+                results[i] = convert_file(
+                    f, i, tmp_dir, self.cfg, pool, log=self.log, cache=self.cache, cancel_event=self.cancel_event
+                )
+                if self.metrics.enabled:
+                    self.measure_units(rec, f, results[i], hits)
+            if self.journal is not None and results[i]:
+                self.journal.add_units(i, results[i])
+        except EmptyRangeError:
+            self.log(f"{self._('log_conv_fail')} {os.path.basename(f['path'])} (range empty)")
+        except OfficeTimeout as e:
+            self.check_cancel()
+            self.quarantine(f, e)
+        except Exception as e:
+            self.file_failed(i, e)
+
+    def convert_parallel(
+        self, tmp_dir: str, on_done: Optional[Callable[[int, list], None]] = None
+    ) -> Dict[int, List[Tuple[str, str, Optional[List[int]]]]]:
+        results = self.resumed_units()
+        done = len(results)
+        if on_done is not None:
+            for i in sorted(set(self.skip) | set(results)):
+                on_done(i, results.get(i, []))
+        for i, units, logs, hits, secs, err in iter_parallel(
+            self.files,
+            tmp_dir,
+            self.cfg,
+            self.backend,
+            self.cancel_event,
+            skip=set(self.skip) | set(results),
+            lang=self.lang,
+        ):
+            done += 1
+            self.cache_hits += hits
+            name = os.path.basename(self.files[i]["path"])
+            self.progress(progress=done, label=f"{self._('st_conv_file')} {name}")
+            for msg in logs:
+                self.log(msg)
+            if isinstance(err, EmptyRangeError):
+                self.log(f"{self._('log_conv_fail')} {name} (range empty)")
+            elif isinstance(err, OfficeTimeout):
+                self.check_cancel()
+                self.quarantine(self.files[i], err)
+            elif err is not None:
+                self.file_failed(i, err)
+            else:
+                results[i] = units
+                if self.journal is not None and units:
+                    self.journal.add_units(i, units)
+                if self.metrics.enabled:
+                    rec = self.metrics.add("convert", name, secs=secs)
+                    self.measure_units(rec, self.files[i], units, 0)
+                    rec["cache_hit"] = hits > 0
+            if on_done is not None:
+                on_done(i, results.get(i, []))
+        return results
+
+    def unit_dicts(self, i: int, units: List[Tuple[str, str, Optional[List[int]]]]) -> List[dict]:
+        f = self.files[i]
+        return [{"path": p, "orig": f, "sheet": s_name, "fseq": i + 1, "pages": idxs} for p, s_name, idxs in units]
+
+    def run_pipeline(self, tmp_dir: str, pool: OfficePool, outputs: List[str]):
+        """
+        全結合以外: 変換し終えたファイルから順に仕上げて書き出す。
+        変換（このスレッド）・仕上げ・書き出しの3段を、cfg.pipeline_depth 件までの queue でつないで並行させる。
+        仕上げはファイルの並び順に行うので、{seq} と outputs の順は全部変換してから仕上げる時と同じ。
+        """
+        depth = self.cfg.pipeline_depth
+        next_seq = 1
+
+        def write(item):
+            if isinstance(item, int):
+                # このファイルの出力は全部書き終えて記録した（前に積んだものから順に処理される）
+                self.finished.add(item)
+            else:
+                self.emit_output(*item, outputs)
+
+        write_stage = PipelineStage(write, depth, "o2p-write")
+
+        def finalize(item):
+            nonlocal next_seq
+            i, units = item
+            self.check_cancel()
+            u_list = self.unit_dicts(i, units)
+            if u_list:
+                try:
+                    next_seq = self.finalize_file(i, u_list, next_seq, lambda *out: write_stage.put(out))
+                except BatchCancelled:
+                    raise
+                except Exception as e:
+                    self.file_failed(i, e)
+                    return
+                write_stage.put(i)
+
+        finalize_stage = PipelineStage(finalize, depth, "o2p-finalize")
+        order = InOrder(finalize_stage.put)
+        try:
+            self.convert(tmp_dir, pool, on_done=lambda i, units: order.done(i, (i, units)))
+            self.progress(label=self._("st_finalizing"))
+            finalize_stage.close()
+            write_stage.close()
+        except BaseException as e:
+            finalize_stage.abort()
+            if isinstance(e, BatchCancelled) or self.cancel_event.is_set():
+                write_stage.abort()
+                raise
+            # キャンセル以外で止まった時は、仕上げ済みの出力は書き出してから投げ直す
+            try:
+                write_stage.close()
+            except BaseException:
+                write_stage.abort()
+            raise
+
+    def finalize_all(self, temp_units: List[dict], tmp_dir: str, outputs: List[str]):
+        cfg = self.cfg
+        global_seq = 1
+
+        # 出力の記録キーは「何番目のファイルの、何番目の単位の、何ページ目か」（再開時も同じになる）
+        if cfg.merge_all:
+            if self.resumed_output("merge", outputs):
+                return
+            dest = self.get_final_dest(temp_units[0], 1, 1, 1)
+            if dest:
+                if cfg.merge_max_open > 0:
+                    self.finalize_units_streaming(temp_units, dest)
+                else:
+                    self.finalize_units(temp_units, dest)
+                self.commit_output("merge", dest, outputs)
+            return
+
+        emit = lambda key, writer, dest: self.emit_output(key, writer, dest, outputs)  # noqa: E731
+        for i, f_orig in enumerate(self.files):
+            self.check_cancel()
+
+            u_list = [u for u in temp_units if u["orig"] is f_orig]
+            if u_list:
+                try:
+                    global_seq = self.finalize_file(i, u_list, global_seq, emit)
+                except BatchCancelled:
+                    raise
+                except Exception as e:
+                    self.file_failed(i, e)
+
+    def finalize_file(
+        self,
+        i: int,
+        u_list: List[dict],
+        global_seq: int,
+        emit: Callable[[str, Optional[StreamingPdfWriter], str], None],
+    ) -> int:
+        """
+        self.files[i] の出力（ページごと・シートごと・ファイルごと）を仕上げ、
+        emit(記録キー, writer, 出力先) に渡す（前回書き終えていた出力は writer=None）。次の {seq} を返す。
+        """
+        cfg = self.cfg
+        t = self.files[i]["type"]
+        do_pg = (
+            (t == "Word" and cfg.split_word_page)
+            or (t == "PowerPoint" and cfg.split_ppt_page)
+            or (t == "PDF" and cfg.split_pdf_page)
+            or (t == "Excel" and cfg.split_excel_page)
+        )
+        do_sh = t == "Excel" and cfg.split_excel_sheet
+
+        if do_pg:
+            for u_no, u in enumerate(u_list):
+                # 元PDFは1回だけ開き、ページを一時ファイルに書き出さずにそのまま渡す
+                with open(u["path"], "rb") as fh:
+                    reader = PdfReader(fh)
+                    idxs = u.get("pages") or range(len(reader.pages))
+                    p_total = len(idxs)
+                    for p_idx, page in iter_pages_bounded(reader, idxs):
+                        self.check_cancel()
+                        key = f"{i}:{u_no}:{p_idx}"
+                        done = self.written_before(key)
+                        if done is not None:
+                            emit(key, None, done)
+                            global_seq += 1
+                            continue
+                        dest = self.get_final_dest(u, global_seq, i + 1, p_idx + 1, p_total)
+                        if dest:
+                            writer = self.prepare_pages([page], os.path.basename(dest), [u], p_idx + 1, p_total)
+                            global_seq += 1
+                            emit(key, writer, dest)
+
+        elif do_sh:
+            for u_no, u in enumerate(u_list):
+                key = f"{i}:{u_no}"
+                done = self.written_before(key)
+                if done is not None:
+                    emit(key, None, done)
+                    global_seq += 1
+                    continue
+                dest = self.get_final_dest(u, global_seq, i + 1, 1)
+                if dest:
+                    writer = self.prepare_units([u], os.path.basename(dest))
+                    global_seq += 1
+                    emit(key, writer, dest)
+        else:
+            key = str(i)
+            done = self.written_before(key)
+            if done is not None:
+                emit(key, None, done)
+                return global_seq + 1
+            dest = self.get_final_dest(u_list[0], global_seq, i + 1, 1)
+            if dest:
+                writer = self.prepare_units(u_list, os.path.basename(dest))
+                global_seq += 1
+                emit(key, writer, dest)
+        return global_seq
+
+    # --- Preview ---
+    def render_preview(self, f_info: dict, out_p: str) -> bool:
+        """f_info の1ページ目だけに透かし/ページ番号を当てて out_p に出力する"""
+        with com_apartment(), OfficePool(self.backend, max_uses=1) as pool:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # range指定を反映してから1ページ目を作る
+                try:
+                    res = convert_file(f_info, 0, tmp_dir, self.cfg, pool, log=self.log, cache=self.cache)
+                except EmptyRangeError:
+                    self.log(f"{self._('log_conv_fail')} {os.path.basename(f_info['path'])} (range empty)")
+                    return False
+
+                if not res:
+                    self.log(f"{self._('log_conv_fail')} {os.path.basename(f_info['path'])}")
+                    return False
+
+                src, _, idxs = res[0]
+                with open(src, "rb") as fh:
+                    reader = PdfReader(fh)
+                    if not reader.pages:
+                        return False
+
+                    unit = {"orig": f_info, "sheet": "Preview", "fseq": 1}
+                    self.finalize_pages([reader.pages[idxs[0] if idxs else 0]], out_p, [unit], 1, 1)
+                return True
+
+    # --- Watermark & Finalize ---
+    def register_reportlab_font(self, chosen_font: str) -> Tuple[str, str]:
+        chosen = chosen_font or ""
+        if chosen in self.font_map:
+            p, idx = self.font_map[chosen]
+            internal_name = f"WM_{chosen.replace(' ', '_')}_{idx}"
+            try:
+                if internal_name not in pdfmetrics.getRegisteredFontNames():
+                    if p.lower().endswith(".ttc"):
+                        pdfmetrics.registerFont(TTFont(internal_name, p, subfontIndex=idx))
+                    else:
+                        pdfmetrics.registerFont(TTFont(internal_name, p))
+                return internal_name, f"{self._('log_font_using')}: {chosen}"
+            except Exception as e:
+                self.log(f"{self._('log_font_fail')}: {e}")
+
+        try:
+            pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
+            return "HeiseiKakuGo-W5", "使用フォント: 標準CIDフォント"
+        except:
+            return "Helvetica", "使用フォント: Helvetica (日本語不可)"
+
+    def render_overlays(
+        self, specs: List[Tuple[float, float, int, list, bool]], units: List[dict], total_p: int, font_name: str
+    ) -> PdfReader:
+        """
+        オーバーレイをまとめて1つの複数ページ canvas に描画し、1回だけ解析する。
+        フォントも1回しか埋め込まれないので、結合後のPDFでも全ページで共有される。
+        specs: [(幅, 高さ, ページ番号, 描く透かし [(テキスト, 位置)], ページ番号を描くか), ...]
+        """
+        cfg = self.cfg
+        packet = io.BytesIO()
+        c = canvas.Canvas(packet)
+        rgb = [int(cfg.wm_color.lstrip("#")[j : j + 2], 16) / 255 for j in (0, 2, 4)]
+
+        # テンプレートはファイル分のタグを先に埋めておき、ページごとには番号だけ埋める
+        u0, fseq = units[0], units[0].get("fseq", 1)
+        bound = {}
+
+        def tpl_for(tpl, aliases=()):
+            if (tpl, aliases) not in bound:
+                bound[tpl, aliases] = self.bind_template(tpl, u0, fseq, aliases)
+            return bound[tpl, aliases]
+
+        for w, h, curr_p, wms, with_pg in specs:
+            self.check_cancel()
+            c.setPageSize((w, h))
+
+            # ---- Watermark (1/2) ----
+            for txt_raw, pos_id in wms:
+                txt = tpl_for(txt_raw).render(curr_p, curr_p, total_p)
+                c.saveState()
+
+                f_size = int(cfg.wm_size)
+                c.setFont(font_name, f_size)
+                c.setFillColorRGB(*rgb, alpha=float(cfg.wm_alpha))
+
+                if pos_id == "diag":
+                    c.translate(w / 2, h / 2)
+                    c.rotate(45)
+                    c.drawCentredString(0, 0, txt)
+                elif pos_id == "large":
+                    c.drawCentredString(w / 2, h / 2, txt)
+                else:
+                    tw = c.stringWidth(txt, font_name, f_size)
+
+                    if "l" in pos_id:
+                        tx = 20
+                    elif "r" in pos_id:
+                        tx = w - tw - 20
+                    else:
+                        tx = (w - tw) / 2
+
+                    if "t" in pos_id:
+                        ty = h - f_size - 20
+                    elif "b" in pos_id:
+                        ty = 20
+                    else:
+                        ty = h / 2
+
+                    c.drawString(tx, ty, txt)
+
+                c.restoreState()
+
+            # ---- Page number ----
+
+            if with_pg:
+                # 書式の {n} / {total} はページ番号・総ページ数
+                pg_txt = tpl_for(cfg.pg_format, PAGE_NUMBER_ALIASES).render(curr_p, curr_p, total_p)
+
+                c.saveState()
+
+                # ★固定：10.5pt / 黒（必ずここで定義）
+                pg_size = 10.5
+                c.setFont(font_name, pg_size)
+                c.setFillColorRGB(0, 0, 0)  # 黒固定
+
+                tw = c.stringWidth(pg_txt, font_name, pg_size)
+
+                # bc=中央下, br=右下
+                margin_x = 20
+                margin_y = 24
+                if cfg.pg_pos == "br":
+                    x = w - tw - margin_x
+                    y = margin_y
+                else:  # "bc" default
+                    x = (w - tw) / 2
+                    y = margin_y
+
+                c.drawString(x, y, pg_txt)
+                c.restoreState()
+
+            c.showPage()
+
+        c.save()
+        packet.seek(0)
+        return PdfReader(packet)
+
+    def _open_unit_pages(self, stack: ExitStack, units: List[dict]) -> list:
+        """
+        units の PDF（"pages" があればそのページだけ）のページを返す。
+        PDF はファイルハンドルから読むので、ページは必要になった分しか読み込まない。
+        """
+        pages = []
+        for u in units:
+            reader = PdfReader(stack.enter_context(open(u["path"], "rb")))
+            # reader と解析済みオブジェクトは循環参照なので、閉じる時に切っておく
+            # （切らないと GC が回るまで画像などのデータが残り、結合する数に比例してメモリが増える）
+            stack.callback(reader.resolved_objects.clear)
+            idxs = u.get("pages") or range(len(reader.pages))
+            pages.extend(reader.pages[k] for k in idxs)
+        return pages
+
+    def finalize_units(self, units: List[dict], dest: str, page_offset: int = 1, total_override: int = 0):
+        self.write_output(self.prepare_units(units, os.path.basename(dest), page_offset, total_override), dest)
+
+    def prepare_units(
+        self, units: List[dict], name: str, page_offset: int = 1, total_override: int = 0
+    ) -> StreamingPdfWriter:
+        with ExitStack() as stack:
+            pages = self._open_unit_pages(stack, units)
+            return self.prepare_pages(pages, name, units, page_offset, total_override or len(pages))
+
+    def finalize_units_streaming(self, units: List[dict], dest: str):
+        """
+        merge_all 用。一度に開くPDFを cfg.merge_max_open 個までにして、仕上げた分から dest へ書き出す。
+        {total} は先にページ数だけ数えて決めるので、入力が何千あってもメモリとファイルハンドルは増えない。
+        """
+        cfg = self.cfg
+        font_name, _ = self.register_reportlab_font(cfg.wm_font)
+        total_p = sum(len(u["pages"]) if u.get("pages") else count_pdf_pages(u["path"]) for u in units)
+
+        # dest が入力のどれかと同じ（上書き確認済み）こともあるので、読み終わるまでは別名に書く
+        with atomic_output(dest) as fh:
+            writer = StreamingPdfWriter(fh, compact=cfg.compact_output, check=self.check_cancel)
+            if cfg.password:
+                # 暗号化は書き出したオブジェクトから順に掛かるので、最初に設定する
+                writer.encrypt(cfg.password)
+
+            name = os.path.basename(dest)
+            page_offset = 1
+            for start in range(0, len(units), cfg.merge_max_open):
+                with ExitStack() as stack:
+                    pages = self._open_unit_pages(stack, units[start : start + cfg.merge_max_open])
+                    with self.metrics.stage("stamp", name, pages=len(pages)):
+                        self.add_finalized_pages(writer, pages, units, page_offset, total_p, font_name)
+                    with self.metrics.stage("write", name) as rec:
+                        pos = fh.tell()
+                        writer.flush(compress=cfg.compress_pdf)
+                        rec["bytes_out"] = fh.tell() - pos
+                page_offset += len(pages)
+
+            if cfg.clear_metadata:
+                writer.add_metadata({})
+            with self.metrics.stage("write", name) as rec:
+                pos = fh.tell()
+                writer.finish()
+                rec["bytes_out"] = fh.tell() - pos
+        if writer.compact:
+            self.log_compact(writer, dest)
+
+    def finalize_pages(self, pages: list, dest: str, units: List[dict], page_offset: int = 1, total_p: int = 0):
+        """読み込み済みのページ（PageObject）に透かし等を付けて dest に書き出す"""
+        self.write_output(self.prepare_pages(pages, os.path.basename(dest), units, page_offset, total_p), dest)
+
+    def prepare_pages(
+        self, pages: list, name: str, units: List[dict], page_offset: int = 1, total_p: int = 0
+    ) -> StreamingPdfWriter:
+        """
+        ページに透かし等を付け、圧縮・暗号化まで済ませた writer を返す（name は計測の記録用）。
+        ページは writer に複製されるので、返した後は元の PDF を閉じてもよい。
+        """
+        cfg = self.cfg
+        # PdfWriter.write は途中で止められないので、キャンセルを見ながら書ける StreamingPdfWriter で書く
+        writer = StreamingPdfWriter(compact=cfg.compact_output, check=self.check_cancel)
+        font_name, _ = self.register_reportlab_font(cfg.wm_font)
+        with self.metrics.stage("stamp", name, pages=len(pages)):
+            self.add_finalized_pages(writer, pages, units, page_offset, total_p or len(pages), font_name)
+
+        if cfg.clear_metadata:
+            writer.add_metadata({})
+        if cfg.password:
+            writer.encrypt(cfg.password)
+        if cfg.compress_pdf:
+            with self.metrics.stage("compress", name):
+                flate_encode_streams(writer, check=self.check_cancel)
+        return writer
+
+    def write_output(self, writer: StreamingPdfWriter, dest: str):
+        """prepare_pages で仕上げた writer を dest に書き出す"""
+        name = os.path.basename(dest)
+        # 書きかけ（キャンセル・書き込みエラー・異常終了）の出力は dest に残さない
+        with self.metrics.stage("write", name) as rec, atomic_output(dest) as f:
+            writer.finish(f)
+            rec["bytes_out"] = f.tell()
+        if writer.compact:
+            self.log_compact(writer, dest)
+
+    def log_compact(self, writer: StreamingPdfWriter, dest: str):
+        """コンパクト出力で減ったバイト数（従来の書き方との比較）を出力ごとに記録する"""
+        size = os.path.getsize(dest)
+        saved = max(0, writer.classic_bytes - size)
+        self.log(
+            f"{self._('log_compact')} {os.path.basename(dest)} "
+            f"{size / 1024:.0f} KB (-{saved / 1024:.0f} KB, {writer.deduped} dup)"
+        )
+
+    def add_finalized_pages(
+        self, writer: PdfWriter, pages: list, units: List[dict], page_offset: int, total_p: int, font_name: str
+    ):
+        """pages に透かし・ページ番号を付けて writer に追加する"""
+        cfg = self.cfg
+
+        # 透かし有無
+        wms = [(t, pos) for t, pos in [(cfg.wm1_text, cfg.wm1_pos), (cfg.wm2_text, cfg.wm2_pos)] if t and pos != "None"]
+        has_pg = cfg.pg_enabled
+
+        for page in pages:
+            self.check_cancel()
+            # 回転していないページは変換不要（コンテンツの書き直しを避ける）
+            if page.rotation % 360:
+                page.transfer_rotation_to_content()
+        sizes = [(float(p.mediabox.width), float(p.mediabox.height)) for p in pages]
+        start = len(writer.flattened_pages)
+
+        if not (wms or has_pg):
+            for page in pages:
+                self.check_cancel()
+                writer.add_page(page)
+        elif cfg.fast_stamp:
+            self._stamp_with_forms(writer, pages, sizes, wms, units, page_offset, total_p, font_name)
+        else:
+            for c_start in range(0, len(pages), STAMP_CHUNK):
+                chunk = range(c_start, min(c_start + STAMP_CHUNK, len(pages)))
+                specs = [(*sizes[k], page_offset + k, wms, has_pg) for k in chunk]
+                overlay = self.render_overlays(specs, units, total_p, font_name)
+                for k, ov in zip(chunk, overlay.pages):
+                    self.check_cancel()
+                    pages[k].merge_page(ov)
+                    writer.add_page(pages[k])
+
+        if self.image_optimizer is not None:
+            # 追加したページ（writer 側のコピー）の画像を縮小する
+            self.image_optimizer.optimize(writer.flattened_pages[start:], check=self.check_cancel)
+
+    def _stamp_with_forms(self, writer, pages, sizes, wms, units, page_offset, total_p, font_name):
+        """
+        ページに依存しない透かしはページサイズごとに1つの Form XObject にして共有し、
+        ページ毎に変わる部分（ページ番号・{pseq} 等を含む透かし）だけをページ毎の小さな XObject にする。
+        """
+        static_wms = [wm for wm in wms if is_page_invariant(wm[0])]
+        varying_wms = [wm for wm in wms if not is_page_invariant(wm[0])]
+        has_varying = bool(varying_wms) or self.cfg.pg_enabled
+
+        size_keys = list(dict.fromkeys(sizes)) if static_wms else []
+        static_forms = {}
+        stamper = FormStamper(writer)
+        for c_start in range(0, len(pages), STAMP_CHUNK):
+            chunk = range(c_start, min(c_start + STAMP_CHUNK, len(pages)))
+            # 静的部分は最初のまとまりの可変部分と同じ canvas に描いて、フォントの埋め込みを減らす
+            statics = [] if static_forms else size_keys
+            specs = [(w, h, page_offset, static_wms, False) for w, h in statics]
+            if has_varying:
+                specs += [(*sizes[k], page_offset + k, varying_wms, self.cfg.pg_enabled) for k in chunk]
+            overlay = self.render_overlays(specs, units, total_p, font_name) if specs else None
+            for i, size in enumerate(statics):
+                static_forms[size] = page_to_form(writer, overlay.pages[i])
+
+            for k in chunk:
+                self.check_cancel()
+                wpage = writer.add_page(pages[k])
+                forms = [static_forms[sizes[k]]] if static_wms else []
+                if has_varying:
+                    forms.append(page_to_form(writer, overlay.pages[len(statics) + k - c_start]))
+                stamper.stamp(wpage, forms)
+
+    # --- Naming ---
+    def apply_tags(self, tpl: str, u_info: dict, seq: int, fseq: int, pseq: int, ptotal: int = 1) -> str:
+        return apply_tags(tpl, u_info, seq, fseq, pseq, ptotal, total=len(self.files), now=self.started)
+
+    def bind_template(self, tpl: str, u_info: dict, fseq: int, aliases=()):
+        return compile_template(tpl, aliases).bind(u_info, fseq, total=len(self.files), now=self.started)
+
+    def get_final_dest(self, u_info, seq, fseq, pseq, ptotal=1) -> Optional[str]:
+        cfg = self.cfg
+        out_name = self.apply_tags(cfg.naming_tpl, u_info, seq, fseq, pseq, ptotal)
+        base = os.path.dirname(u_info["orig"]["path"]) if cfg.out_mode == "original" else cfg.output_dir
+        if not os.path.exists(base):
+            os.makedirs(base, exist_ok=True)
+        dest = os.path.join(base, re.sub(r'[\\/:*?"<>|]+', "_", out_name) + ".pdf")
+        return self.confirm_overwrite_or_rename(dest)
+
+    def confirm_overwrite_or_rename(self, dest: str) -> Optional[str]:
+        dest = self._confirm_overwrite_or_rename(dest)
+        if dest is not None:
+            self._reserved.add(dest)
+        return dest
+
+    def _exists(self, path: str) -> bool:
+        # まだ書き出し待ちの出力先も、あるものとして扱う
+        return path in self._reserved or os.path.exists(path)
+
+    def _confirm_overwrite_or_rename(self, dest: str) -> Optional[str]:
+        if not self._exists(dest):
+            return dest
+        ans = self.on_exists(dest)
+        if ans is None:
+            return None
+        if ans:
+            return dest
+        b, e = os.path.splitext(dest)
+        i = 1
+        while self._exists(f"{b}_{i}{e}"):
+            i += 1
+        return f"{b}_{i}{e}"
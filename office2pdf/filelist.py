@@ -0,0 +1,146 @@
+"""
+ファイルリスト（self.files）と Treeview の同期。
+
+- 行は追加時に振った固定の item ID で管理し、追加・削除・移動はその行だけ操作する（全消し→全挿入をしない）
+- 出力名のプレビュー列は表示中の行だけ計算し、内容が変わったら無効化して後でまとめて描き直す
+- 命名ルールの入力など連続する変更は debounce して1回にまとめる
+
+tkinter には依存しない（tree は ttk.Treeview と同じメソッドを持つもの、
+schedule / cancel は root.after / root.after_cancel と同じ形）。
+"""
+
+import math
+import os
+from typing import Any, Callable, Dict, Iterable, List
+
+
+class FileListView:
+    # 表示範囲の前後に余分に計算しておく行数（少しのスクロールで空欄が見えないように）
+    OVERSCAN = 20
+
+    def __init__(
+        self,
+        tree: Any,
+        files: List[dict],
+        preview: Callable[[dict, int], str],
+        schedule: Callable[[int, Callable[[], None]], Any],
+        cancel: Callable[[Any], None],
+        debounce_ms: int = 150,
+    ):
+        self.tree = tree
+        self.files = files
+        self.preview = preview
+        self.schedule = schedule
+        self.cancel = cancel
+        self.debounce_ms = debounce_ms
+
+        self._seq = 0
+        self._iid_of: Dict[int, str] = {}  # id(file dict) -> item ID
+        self._file_of: Dict[str, dict] = {}
+        self._fresh: Dict[str, int] = {}  # item ID -> プレビューを計算した世代
+        self._gen = 0
+        self._pending = None
+
+    # --- Lookup ---
+    def iid(self, f: dict) -> str:
+        return self._iid_of[id(f)]
+
+    def file_of(self, iid: str) -> dict:
+        return self._file_of[iid]
+
+    def selected_files(self) -> List[dict]:
+        return [self._file_of[i] for i in self.tree.selection() if i in self._file_of]
+
+    def _values(self, f: dict):
+        return (f["type"], os.path.basename(f["path"]), f["range"], "")
+
+    # --- Row operations ---
+    def append(self, new_files: Iterable[dict]):
+        """new_files を self.files の末尾に足し、その行だけ挿入する"""
+        for f in new_files:
+            self._seq += 1
+            iid = f"f{self._seq}"
+            self._iid_of[id(f)] = iid
+            self._file_of[iid] = f
+            self.files.append(f)
+            self.tree.insert("", "end", iid=iid, values=self._values(f))
+        # {seq} {total} が変わるので、プレビューは全行無効
+        self.invalidate()
+
+    def remove(self, targets: Iterable[dict]):
+        ids = {id(f) for f in targets if id(f) in self._iid_of}
+        if not ids:
+            return
+        iids = [self._iid_of.pop(i) for i in ids]
+        for iid in iids:
+            self._file_of.pop(iid, None)
+            self._fresh.pop(iid, None)
+        self.tree.delete(*iids)
+        self.files[:] = [f for f in self.files if id(f) not in ids]
+        self.invalidate()
+
+    def clear(self):
+        if self._pending is not None:
+            self.cancel(self._pending)
+            self._pending = None
+        self.tree.delete(*self.tree.get_children())
+        self.files.clear()
+        self._iid_of.clear()
+        self._file_of.clear()
+        self._fresh.clear()
+
+    def move(self, f: dict, d: int) -> bool:
+        idx = self.files.index(f)
+        n = idx + d
+        if not (0 <= n < len(self.files)):
+            return False
+        self.files[idx], self.files[n] = self.files[n], self.files[idx]
+        self.tree.move(self.iid(f), "", n)
+        self.invalidate()
+        return True
+
+    def update_row(self, f: dict):
+        """範囲指定などを変えた1行だけ書き直す"""
+        iid = self.iid(f)
+        self.tree.item(iid, values=self._values(f))
+        self._fresh.pop(iid, None)
+        self.invalidate()
+
+    # --- Lazy preview ---
+    def invalidate(self):
+        """全行のプレビューを古くし、少し待ってから表示中の行だけ計算し直す"""
+        self._gen += 1
+        if self._pending is not None:
+            self.cancel(self._pending)
+        self._pending = self.schedule(self.debounce_ms, self.refresh_visible)
+
+    def on_scroll(self):
+        """スクロール・リサイズ時（yscrollcommand から）に呼ぶ"""
+        if self._pending is None:
+            self._pending = self.schedule(0, self.refresh_visible)
+
+    def visible_range(self):
+        n = len(self.files)
+        if not n:
+            return 0, 0
+        first, last = self.tree.yview()
+        lo = max(0, int(first * n) - self.OVERSCAN)
+        hi = min(n, math.ceil(last * n) + self.OVERSCAN)
+        return lo, hi
+
+    def refresh_visible(self):
+        self._pending = None
+        lo, hi = self.visible_range()
+        for idx in range(lo, hi):
+            f = self.files[idx]
+            iid = self._iid_of[id(f)]
+            if self._fresh.get(iid) == self._gen:
+                continue
+            self.tree.set(iid, "Out", self.preview(f, idx + 1))
+            self._fresh[iid] = self._gen
+
+    def flush(self):
+        """待ち中の再描画をすぐ行う"""
+        if self._pending is not None:
+            self.cancel(self._pending)
+        self.refresh_visible()
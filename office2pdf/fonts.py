@@ -0,0 +1,45 @@
+import os
+import re
+from typing import Dict, Tuple
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+
+# --- Font Logic (Fixed for TTC) ---
+def build_registry_font_map() -> Dict[str, Tuple[str, int]]:
+    """レジストリからフォント名 → (フォントファイル, TTC内インデックス) を作る"""
+    font_map: Dict[str, Tuple[str, int]] = {}
+    if winreg is None:
+        return font_map
+    fonts_dir = os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")
+    roots = [
+        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts"),
+        (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts"),
+    ]
+    for root, keypath in roots:
+        try:
+            with winreg.OpenKey(root, keypath) as k:
+                i = 0
+                while True:
+                    try:
+                        name_raw, val, _ = winreg.EnumValue(k, i)
+                        i += 1
+                        if not isinstance(val, str):
+                            continue
+                        file_name = re.split(r"[,&]", val)[0].strip()
+                        full_path = os.path.join(fonts_dir, file_name)
+                        if not os.path.exists(full_path):
+                            continue
+                        clean_raw = re.sub(r"\s*\(.*?\)", "", name_raw).replace(";", "")
+                        sub_names = [n.strip() for n in clean_raw.split("&")]
+                        for idx, sub_name in enumerate(sub_names):
+                            if sub_name and sub_name not in font_map:
+                                font_map[sub_name] = (full_path, idx)
+                    except OSError:
+                        break
+        except:
+            continue
+    return font_map
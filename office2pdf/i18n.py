@@ -0,0 +1,302 @@
+# 言語データの定義
+# text=self._("******")へ置き換え
+# self.root.title(self._("win_title"))とか
+# 言語データの定義
+I18N = {
+    "ja": {
+        "win_title": "Office2PDF v5.0",
+        "file_list": "変換ファイル(ドロップで登録・ダブルクリックでページ指定)",
+        "col_type": "種別",
+        "col_name": "ファイル名",
+        "col_range": "範囲",
+        "col_out": "出力先",
+        "btn_up": "上へ",
+        "btn_down": "下へ",
+        "btn_remove": "削除",
+        "btn_clear": "全消去",
+        "btn_clear_list": "リスト全クリア",
+        "btn_add_folder": "フォルダ追加",
+        "frame_wm": "透かし・ページ番号設定",
+        "lbl_font": "フォント:",
+        "lbl_size": "サイズ:",
+        "lbl_alpha": "不透明度:",
+        "btn_start": "PDF変換開始",
+        "btn_cancel": "キャンセル",
+        "msg_no_file": "ファイルがありません。",
+        "err_save_config": "設定保存エラー:",
+        "lbl_presets": "設定プリセット:",
+        "btn_load": "読込",
+        "btn_save": "保存",
+        "btn_delete": "削除",
+        "btn_preview_wm": "選択ファイルの1頁目をプレビュー",
+        "pos_page_center": "中央下",
+        "lbl_watermark": "透かし",
+        "wm_label": "透かし",
+        "pos_none": "なし",
+        "pos_diag_center": "中央斜め",
+        "pos_large_center": "中央大",
+        "pos_top_left": "左上",
+        "pos_top_center": "上中央",
+        "pos_top_right": "右上",
+        "pos_bottom_left": "左下",
+        "pos_bottom_center": "下中央",
+        "pos_bottom_right": "右下",
+        "pos_page_center": "中央下(ページ番号用)",
+        "lbl_page_num": "ページ番号:",
+        "frame_detail": "出力・分割詳細設定",
+        "chk_merge": "【全結合】1つのPDFにまとめる",
+        "chk_split_page": "ページ毎分割",
+        "chk_include_ppt": "(PPTも)",
+        "chk_by_sheet": "シート毎",
+        "chk_by_all_pages": "全ページ毎",
+        "lbl_excel_opt": "--- Excelオプション (印刷範囲優先) ---",
+        "chk_fit_width": "横幅1ページに収める",
+        "chk_fit_height": "縦幅1ページに収める",
+        "chk_parallel": "並列変換（マルチプロセス）",
+        "chk_cache": "変換キャッシュを使う",
+        "chk_metrics": "計測レポートを出力",
+        "frame_exec": "保存設定・実行",
+        "lbl_naming": "ファイル名・命名ルール:",
+        "btn_tag_help": "タグ説明",
+        "opt_same_dir": "元と同じ場所",
+        "opt_custom_dir": "カスタム:",
+        "btn_browse": "参照",
+        "lbl_password": "パスワード:",
+        "chk_meta_clear": "メタ削除",
+        "chk_compress": "PDF軽量化",
+        "chk_compact": "コンパクト出力",
+        "chk_open_done": "完了後開く",
+        "chk_open_folder": "フォルダ開く",
+        "chk_clear_after": "リストクリア",
+        "st_ready": "待機中...",
+        "log_font_loaded": "フォント一覧の読み込みが完了しました。",
+        "log_font_err": "フォント取得エラー:",
+        "log_font_using": "使用フォント:",
+        "log_font_fail": "フォント登録失敗:",
+        "title_warn": "警告",
+        "msg_no_files": "ファイルがありません",
+        "st_converting": "変換中...",
+        "st_conv_file": "変換中:",
+        "st_finalizing": "最終処理中...",
+        "log_fatal": "致命的エラー:",
+        "val_all_pages": "全ページ",
+        "log_ppt_err": "PPT変換エラー",
+        "title_info": "情報",
+        "msg_no_preview": "プレビューするファイルがありません。",
+        "st_preview_gen": "プレビュー生成中:",
+        "log_conv_fail": "変換に失敗しました:",
+        "log_cache_hits": "変換キャッシュ ヒット:",
+        "log_metrics": "計測:",
+        "log_cancelled": "キャンセルしました（完成した出力だけ残しています）",
+        "log_quarantined": "変換が終わらないため隔離して次へ進みます:",
+        "log_resume": "中断したバッチを続きから再開します。変換済み:",
+        "chk_journal": "中断したら続きから再開",
+        "log_watch_start": "監視を開始しました:",
+        "log_watch_stop": "監視を終了しました",
+        "log_watch_batch": "新しいファイルを変換します:",
+        "log_watch_failed": "変換できなかったため failed に移しました:",
+        "log_watch_move_fail": "元ファイルを移動できませんでした:",
+        "log_metrics_report": "計測レポート:",
+        "log_first_output": "最初の出力まで",
+        "log_makespan": "全体",
+        "log_pre_encrypted": "スキップ（パスワード付き）:",
+        "log_pre_broken": "スキップ（ファイルを開けません）:",
+        "log_pre_range": "スキップ（範囲指定に該当するページがありません）:",
+        "tree_range_err": "範囲外",
+        "log_files_added": "ファイルを追加しました:",
+        "log_images_optimized": "画像を縮小しました:",
+        "log_compact": "コンパクト出力:",
+        "err_office_timeout": "{kind}: {secs:g}秒以内に終わりませんでした",
+        "log_office_timeout": "{kind}: {secs:g}秒以内に終わらないため終了します",
+        "log_office_restart": "{kind}: 応答がないため再起動します",
+        "log_office_cancel": "{kind}: キャンセルのため終了します",
+        "log_office_retry": "{name}: {err}。{wait:g}秒後に再試行します ({attempt}/{retries})",
+        "msg_no_output": "処理対象のファイルが生成されなかったため、終了します。",
+        "msg_preview_ok": "プレビューを表示しました。",
+        "msg_preview_fail": "プレビュー失敗:",
+        "title_tag_help": "命名ルールのタグ説明",
+        "title_overwrite": "上書き確認",
+        "msg_exists": "存在します:",
+        "btn_overwrite": "上書き",
+        "btn_seq": "連番",
+        "btn_abort": "中止",
+        "msg_all_done": "すべての処理が完了しました。",
+        "log_preset_load": "プリセットを読込。",
+        "lbl_preset_name": "プリセット名:",
+        "title_confirm": "確認",
+        "msg_ask_delete": "削除しますか？",
+        "title_range": "範囲編集",
+        "pg_pos_bc": "中央下",
+        "pg_pos_br": "右下",
+        "help_tags": (
+            "【利用可能なタグ】\n\n"
+            "{name} : 元のファイル名\n"
+            "{sheet} : Excelシート名\n"
+            "{parent} : 親フォルダの名前\n"
+            "{seq} : 全体の通し番号\n"
+            "{fseq} : ファイル毎の番号\n"
+            "{pseq} : ページ毎の番号\n"
+            "{total} : 全ファイル数\n"
+            "{ptotal} : ファイル内の総ページ数\n"
+            "{username} : PCユーザー名\n"
+            "{rand} : 4桁のランダム数字\n\n"
+            "【日付・時刻】\n"
+            "{date:yyyy-mm-dd} -> 2024-02-06\n"
+            "※HH:時, MM:分, SS:秒"
+        ),
+    },
+    "en": {
+        "win_title": "Office2PDF v5.0",
+        "file_list": "Files (Drag & Drop to add / Double-click to set range)",
+        "col_type": "Type",
+        "col_name": "File Name",
+        "col_range": "Range",
+        "col_out": "Output Preview",
+        "btn_up": "Up",
+        "btn_down": "Down",
+        "btn_remove": "Remove",
+        "btn_clear": "Clear List",
+        "btn_clear_list": "Clear List",
+        "btn_add_folder": "Add Folder",
+        "frame_wm": "Watermark & Page Number",
+        "lbl_font": "Font:",
+        "lbl_size": "Size:",
+        "lbl_alpha": "Opacity:",
+        "btn_start": "Start Conversion",
+        "btn_cancel": "Cancel",
+        "msg_no_file": "No files selected.",
+        "err_save_config": "Error saving settings:",
+        "lbl_presets": "Presets:",
+        "btn_load": "Load",
+        "btn_save": "Save",
+        "btn_delete": "Delete",
+        "btn_preview_wm": "Preview 1st page of selected file",
+        "pos_page_center": "Bottom Center (Mid)",
+        "lbl_watermark": "Watermark",
+        "wm_label": "Watermark",
+        "pos_none": "None",
+        "pos_diag_center": "Diagonal Center",
+        "pos_large_center": "Large Center",
+        "pos_top_left": "Top Left",
+        "pos_top_center": "Top Center",
+        "pos_top_right": "Top Right",
+        "pos_bottom_left": "Bottom Left",
+        "pos_bottom_center": "Bottom Center",
+        "pos_bottom_right": "Bottom Right",
+        "pos_page_center": "Bottom Center (Page)",
+        "lbl_page_num": "Page Numbers:",
+        "frame_detail": "Output & Split Settings",
+        "chk_merge": "[Merge] Combine into a single PDF",
+        "chk_split_page": "Split by Page",
+        "chk_include_ppt": "(Include PPT)",
+        "chk_by_sheet": "By Sheet",
+        "chk_by_all_pages": "By All Pages",
+        "lbl_excel_opt": "--- Excel Options (Prioritize Print Area) ---",
+        "chk_fit_width": "Fit width to 1 page",
+        "chk_fit_height": "Fit height to 1 page",
+        "chk_parallel": "Parallel conversion (multi-process)",
+        "chk_cache": "Reuse cached conversions",
+        "chk_metrics": "Write timing report",
+        "frame_exec": "Export Settings & Run",
+        "lbl_naming": "Naming Rules:",
+        "btn_tag_help": "Tag Guide",
+        "opt_same_dir": "Same as source",
+        "opt_custom_dir": "Custom:",
+        "btn_browse": "Browse...",
+        "lbl_password": "Password:",
+        "chk_meta_clear": "Strip Metadata",
+        "chk_compress": "Compress PDF",
+        "chk_compact": "Compact output",
+        "chk_open_done": "Open when done",
+        "chk_open_folder": "Open folder",
+        "chk_clear_after": "Clear list",
+        "st_ready": "Ready...",
+        "log_font_loaded": "Font list loaded successfully.",
+        "log_font_err": "Error fetching fonts:",
+        "log_font_using": "Font used:",
+        "log_font_fail": "Failed to register font:",
+        "title_warn": "Warning",
+        "msg_no_files": "No files selected",
+        "st_converting": "Converting...",
+        "st_conv_file": "Converting:",
+        "st_finalizing": "Finalizing...",
+        "log_fatal": "Critical Error:",
+        "val_all_pages": "All Pages",
+        "log_ppt_err": "PPT Conversion Error",
+        "title_info": "Info",
+        "msg_no_preview": "No file to preview.",
+        "st_preview_gen": "Generating preview:",
+        "log_conv_fail": "Conversion failed:",
+        "log_cache_hits": "Conversion cache hits:",
+        "log_metrics": "Timing:",
+        "log_cancelled": "Cancelled (only finished outputs were kept)",
+        "log_quarantined": "Conversion kept hanging; quarantined and skipped:",
+        "log_resume": "Resuming an interrupted batch. Already converted:",
+        "chk_journal": "Resume if interrupted",
+        "log_watch_start": "Watching:",
+        "log_watch_stop": "Stopped watching",
+        "log_watch_batch": "Converting new files in",
+        "log_watch_failed": "Could not convert; moved to failed:",
+        "log_watch_move_fail": "Could not move the source file",
+        "log_metrics_report": "Timing report:",
+        "log_first_output": "First output after",
+        "log_makespan": "total",
+        "log_pre_encrypted": "Skipped (password protected):",
+        "log_pre_broken": "Skipped (cannot open file):",
+        "log_pre_range": "Skipped (range selects no pages):",
+        "tree_range_err": "out of range",
+        "log_files_added": "Files added:",
+        "log_images_optimized": "Images downsampled:",
+        "log_compact": "Compact output:",
+        "err_office_timeout": "{kind}: did not finish within {secs:g} s",
+        "log_office_timeout": "{kind}: did not finish within {secs:g} s; stopping it",
+        "log_office_restart": "{kind}: not responding; restarting",
+        "log_office_cancel": "{kind}: stopping it to cancel",
+        "log_office_retry": "{name}: {err}. Retrying in {wait:g} s ({attempt}/{retries})",
+        "msg_no_output": "No output files were generated. Process aborted.",
+        "msg_preview_ok": "Preview displayed successfully.",
+        "msg_preview_fail": "Preview failed:",
+        "title_tag_help": "Naming Rule Tag Guide",
+        "title_overwrite": "Confirm Overwrite",
+        "msg_exists": "File already exists:",
+        "btn_overwrite": "Overwrite",
+        "btn_seq": "Add Seq Number",
+        "btn_abort": "Abort",
+        "msg_all_done": "All processes completed successfully.",
+        "log_preset_load": "Preset loaded.",
+        "lbl_preset_name": "Preset Name:",
+        "title_confirm": "Confirm",
+        "msg_ask_delete": "Are you sure you want to delete?",
+        "title_range": "Edit Range",
+        "pg_pos_bc": "Bottom Center",
+        "pg_pos_br": "Bottom Right",
+        "help_tags": (
+            "[Available Tags]\n\n"
+            "{name} : Original filename\n"
+            "{sheet} : Excel sheet name\n"
+            "{parent} : Parent folder name\n"
+            "{seq} : Global sequence number\n"
+            "{fseq} : File sequence number\n"
+            "{pseq} : Page sequence number\n"
+            "{total} : Total file count\n"
+            "{ptotal} : Total pages in file\n"
+            "{username} : PC username\n"
+            "{rand} : 4-digit random number\n\n"
+            "[Date & Time]\n"
+            "{date:yyyy-mm-dd} -> 2024-02-06\n"
+            "* HH:Hour, MM:Min, SS:Sec"
+        ),
+    },
+}
+# 位置の内部IDと翻訳キーの対応表
+POS_MAP = [
+    ("None", "pos_none"),
+    ("diag", "pos_diag_center"),
+    ("large", "pos_large_center"),
+    ("tl", "pos_top_left"),
+    ("tc", "pos_top_center"),
+    ("tr", "pos_top_right"),
+    ("bl", "pos_bottom_left"),
+    ("bc", "pos_bottom_center"),
+    ("br", "pos_bottom_right"),
+]
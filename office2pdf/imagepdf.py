@@ -0,0 +1,193 @@
+"""
+画像1枚 → 1ページのPDF（できるだけデコード・再圧縮しない）。
+
+- JPEG（ベースライン/プログレッシブ）: ファイルの中身をそのまま /DCTDecode の画像として埋め込む（画質劣化なし）
+- PNG（グレー/RGB/パレット、インターレースなし、透過なし）: IDAT の圧縮データをそのまま
+  /FlateDecode + PNG 予測子（/Predictor 15）として埋め込む
+- 透過付き PNG など上記以外: Pillow でデコードし、色と透過（/SMask）に分けて Flate で圧縮する
+  （以前のように RGB に変換して透過を捨てない）
+
+ページサイズは画像の DPI 情報から決める（無ければ 72dpi = 1ピクセル1ポイント）。
+"""
+
+import struct
+import zlib
+from typing import BinaryIO, List, Optional, Tuple
+
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG のカラータイプ → (PDF の色空間, 色数)
+_PNG_COLOR = {0: ("/DeviceGray", 1), 2: ("/DeviceRGB", 3), 3: (None, 1)}
+
+_JPEG_COLOR = {"L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+
+# DPI 情報として信用する範囲（JFIF の 1x1 は「縦横比だけ」の意味で使われる）
+_DPI_RANGE = (10, 10000)
+
+
+class _Image:
+    """PDF に埋め込む画像ストリーム1つ分"""
+
+    def __init__(self, entries: str, data: bytes, smask: Optional["_Image"] = None):
+        self.entries = entries
+        self.data = data
+        self.smask = smask
+
+
+def page_size(img: Image.Image) -> Tuple[float, float]:
+    """DPI 情報を反映したページサイズ（pt）"""
+    w, h = img.size
+    dpi = img.info.get("dpi")
+    try:
+        dx, dy = float(dpi[0]), float(dpi[1])
+    except (TypeError, ValueError, IndexError):
+        return float(w), float(h)
+    lo, hi = _DPI_RANGE
+    if not (lo <= dx <= hi and lo <= dy <= hi):
+        return float(w), float(h)
+    return w * 72.0 / dx, h * 72.0 / dy
+
+
+def _jpeg_image(path: str, img: Image.Image) -> Optional[_Image]:
+    cs = _JPEG_COLOR.get(img.mode)
+    if cs is None:
+        return None
+    w, h = img.size
+    entries = f"/Width {w} /Height {h} /ColorSpace {cs} /BitsPerComponent 8 /Filter /DCTDecode"
+    if img.mode == "CMYK" and "adobe" in img.info:
+        # Photoshop 等が書く Adobe CMYK は値が反転して保存されている
+        entries += " /Decode [1 0 1 0 1 0 1 0]"
+    with open(path, "rb") as fh:
+        return _Image(entries, fh.read())
+
+
+def _read_png_chunks(path: str) -> Optional[dict]:
+    """PNG のチャンクを読む（デコードはしない）。埋め込めない形式なら None"""
+    with open(path, "rb") as fh:
+        if fh.read(8) != PNG_SIGNATURE:
+            return None
+        info = {"idat": []}
+        while True:
+            head = fh.read(8)
+            if len(head) < 8:
+                return None
+            length, ctype = struct.unpack(">I4s", head)
+            body = fh.read(length)
+            fh.read(4)  # CRC
+            if ctype == b"IHDR":
+                w, h, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", body)
+                if interlace or color not in _PNG_COLOR:
+                    return None
+                info.update(w=w, h=h, depth=depth, color=color)
+            elif ctype == b"PLTE":
+                info["plte"] = body
+            elif ctype == b"tRNS":
+                return None
+            elif ctype == b"IDAT":
+                info["idat"].append(body)
+            elif ctype == b"IEND":
+                break
+    if "w" not in info or not info["idat"] or (info["color"] == 3 and "plte" not in info):
+        return None
+    return info
+
+
+def _png_image(path: str) -> Optional[_Image]:
+    info = _read_png_chunks(path)
+    if info is None:
+        return None
+    cs, colors = _PNG_COLOR[info["color"]]
+    if cs is None:
+        plte = info["plte"]
+        cs = f"[/Indexed /DeviceRGB {len(plte) // 3 - 1} <{plte.hex()}>]"
+    depth = info["depth"]
+    entries = (
+        f"/Width {info['w']} /Height {info['h']} /ColorSpace {cs} /BitsPerComponent {depth} /Filter /FlateDecode"
+        f" /DecodeParms << /Predictor 15 /Colors {colors} /BitsPerComponent {depth} /Columns {info['w']} >>"
+    )
+    return _Image(entries, b"".join(info["idat"]))
+
+
+def _decoded_image(img: Image.Image) -> _Image:
+    """デコードして Flate で詰め直す。透過があれば /SMask に分ける"""
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+    if img.mode in ("1", "L", "I;16", "I"):
+        base = img.convert("L")
+    elif has_alpha:
+        rgba = img.convert("LA" if img.mode == "LA" else "RGBA")
+        base = rgba.convert("L" if rgba.mode == "LA" else "RGB")
+    else:
+        base = img.convert("RGB")
+
+    w, h = img.size
+    smask = None
+    if has_alpha:
+        alpha = rgba.getchannel("A")
+        if alpha.getextrema() != (255, 255):
+            smask = _Image(
+                f"/Width {w} /Height {h} /ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode",
+                zlib.compress(alpha.tobytes(), 6),
+            )
+    cs = "/DeviceGray" if base.mode == "L" else "/DeviceRGB"
+    entries = f"/Width {w} /Height {h} /ColorSpace {cs} /BitsPerComponent 8 /Filter /FlateDecode"
+    return _Image(entries, zlib.compress(base.tobytes(), 6), smask)
+
+
+def _write_pdf(fh: BinaryIO, size: Tuple[float, float], image: _Image):
+    w, h = size
+    content = f"q {w:.4f} 0 0 {h:.4f} 0 0 cm /Im0 Do Q".encode()
+    objs: List[Tuple[bytes, Optional[bytes]]] = [
+        (b"<< /Type /Catalog /Pages 2 0 R >>", None),
+        (b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>", None),
+        (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w:.4f} {h:.4f}]"
+            f" /Resources << /XObject << /Im0 5 0 R >> >> /Contents 4 0 R >>".encode(),
+            None,
+        ),
+        (b"", content),
+    ]
+    smask_ref = " /SMask 6 0 R" if image.smask else ""
+    objs.append((f"<< /Type /XObject /Subtype /Image {image.entries}{smask_ref} ".encode(), image.data))
+    if image.smask:
+        objs.append((f"<< /Type /XObject /Subtype /Image {image.smask.entries} ".encode(), image.smask.data))
+
+    depth16 = "/BitsPerComponent 16" in image.entries
+    fh.write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n" if depth16 else b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for n, (head, data) in enumerate(objs, start=1):
+        offsets.append(fh.tell())
+        fh.write(f"{n} 0 obj\n".encode())
+        if data is None:
+            fh.write(head)
+        else:
+            # 辞書の残り（/Length）を閉じてからストリーム本体をそのまま書く
+            fh.write((head or b"<< ") + f"/Length {len(data)} >>\nstream\n".encode())
+            fh.write(data)
+            fh.write(b"\nendstream")
+        fh.write(b"\nendobj\n")
+    xref = fh.tell()
+    fh.write(f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        fh.write(f"{off:010d} 00000 n \n".encode())
+    fh.write(f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def image_to_pdf(src: str, out: str) -> str:
+    """
+    src の画像を1ページのPDFにして out に書く。どの方法で埋め込んだかを返す
+    （"jpeg" / "png" = 無劣化でそのまま、"decoded" = デコードして詰め直した）。
+    """
+    with Image.open(src) as img:
+        size = page_size(img)
+        image, how = None, "decoded"
+        if img.format == "JPEG":
+            image, how = _jpeg_image(src, img), "jpeg"
+        elif img.format == "PNG":
+            image, how = _png_image(src), "png"
+        if image is None:
+            image, how = _decoded_image(img), "decoded"
+    with open(out, "wb") as fh:
+        _write_pdf(fh, size, image)
+    return how
@@ -0,0 +1,127 @@
+"""
+ドロップ/フォルダ指定されたパスからファイルリストに追加するファイルを集める。
+
+- フォルダは os.scandir で下の階層まで順にたどり、見つけた順に返す（全部集めてから返さない）
+- 重複チェックは正規化したパス（大文字小文字・区切り文字・相対パスの違いを吸収）の集合で行う
+- 見つけたファイルはある程度まとめて on_batch に渡す（GUI への行追加を1件ずつにしない）
+
+tkinter には依存しない。
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from .engine import make_file_info
+
+
+def path_key(path: str) -> str:
+    """重複判定用のキー（Windows では大文字小文字と / \\ の違いを無視する）"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class PathIndex:
+    """ファイルリストに入っているパスの集合。ワーカースレッドと UI スレッドの両方から使う"""
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._keys = {path_key(p) for p in paths}
+
+    def add(self, path: str) -> bool:
+        """まだ無ければ登録して True（既にあれば False）"""
+        k = path_key(path)
+        with self._lock:
+            if k in self._keys:
+                return False
+            self._keys.add(k)
+            return True
+
+    def discard(self, paths: Iterable[str]):
+        keys = [path_key(p) for p in paths]
+        with self._lock:
+            self._keys.difference_update(keys)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def __contains__(self, path: str) -> bool:
+        k = path_key(path)
+        with self._lock:
+            return k in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def _scan_dir(root: str, recursive: bool) -> Iterator[str]:
+    """root 以下のファイルを名前順に返す（読めないフォルダは飛ばす。フォルダへのリンクはたどらない）"""
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                entries = sorted(it, key=lambda e: e.name.lower())
+        except OSError:
+            continue
+        subdirs = []
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append(e.path)
+                elif e.is_file():
+                    yield e.path
+            except OSError:
+                continue
+        if recursive:
+            # 名前順にたどるため逆順で積む
+            stack.extend(reversed(subdirs))
+
+
+def iter_input_files(
+    paths: Iterable[str], index: Optional[PathIndex] = None, recursive: bool = True
+) -> Iterator[dict]:
+    """
+    paths（ファイル/フォルダ混在）から対応形式のファイル情報を順に返す。
+    index に既にあるパスは飛ばし、返したものは index に登録する。
+    """
+    if index is None:
+        index = PathIndex()
+    for p in paths:
+        cands = _scan_dir(p, recursive) if os.path.isdir(p) else (p,)
+        for c in cands:
+            info = make_file_info(c)
+            if info is None or not index.add(c):
+                continue
+            yield info
+
+
+def ingest(
+    paths: Iterable[str],
+    index: PathIndex,
+    on_batch: Callable[[List[dict]], None],
+    recursive: bool = True,
+    batch_size: int = 500,
+    batch_secs: float = 0.25,
+    cancel_event: Optional[threading.Event] = None,
+) -> int:
+    """
+    iter_input_files の結果を batch_size 件、または batch_secs 秒ごとにまとめて on_batch に渡す
+    （遅い共有フォルダでも最初の行がすぐ出るように）。追加した件数を返す。
+    """
+    batch: List[dict] = []
+    total = 0
+    t0 = time.monotonic()
+    for info in iter_input_files(paths, index, recursive):
+        batch.append(info)
+        if len(batch) >= batch_size or time.monotonic() - t0 >= batch_secs:
+            on_batch(batch)
+            total += len(batch)
+            batch, t0 = [], time.monotonic()
+        if cancel_event is not None and cancel_event.is_set():
+            break
+    if batch:
+        on_batch(batch)
+        total += len(batch)
+    return total
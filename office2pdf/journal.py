@@ -0,0 +1,173 @@
+"""
+中断したバッチを続きから再開するための記録（cfg.journal_enabled）。
+
+バッチは「入力（パス・サイズ・更新日時・範囲）の並び + 出力に効く設定」のハッシュで識別し、
+<journal_dir>/<キー>/ に次のものを置く。
+- journal.jsonl : 追記のみの記録。1行1件で、書くたびに flush + fsync する
+  - start  : バッチ開始時刻（{date} タグを再開後も同じにする）
+  - units  : 変換済みのファイル（self.files の番号と中間PDF）
+  - output : 書き終えた出力（出力の位置を表すキーと、パス・サイズ）
+- work/        : 中間PDF（TemporaryDirectory の代わり。再開時に変換をやり直さないで済む）
+
+同じバッチをもう一度実行すると、記録のある変換と出力は飛ばす。出力は一時ファイルに書いてから
+rename するので、記録があってファイルのサイズも一致すれば書きかけではない。
+最後まで終わったら（キャンセル・異常終了でなければ）フォルダごと消す。
+"""
+
+import dataclasses
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 形式を変えたら上げる（古い記録から再開しないため）
+JOURNAL_VERSION = 1
+
+# 出力の中身に関係しない設定（変えても同じバッチとみなす）
+IGNORED_FIELDS = {
+    "auto_open",
+    "open_folder",
+    "clear_after",
+    "fast_stamp",
+    "image_workers",
+    "merge_max_open",
+    "pipeline_depth",
+    "office_recycle_after",
+    "parallel",
+    "parallel_workers",
+    "cache_enabled",
+    "cache_dir",
+    "cache_max_mb",
+    "metrics_enabled",
+    "metrics_dir",
+    "office_timeouts",
+    "office_retries",
+    "office_retry_backoff",
+    "quarantine_dir",
+    "journal_enabled",
+    "journal_dir",
+}
+
+
+def default_journal_dir() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "Office2PDF", "journal")
+
+
+def batch_key(cfg, files: List[dict]) -> str:
+    settings = {k: v for k, v in dataclasses.asdict(cfg).items() if k not in IGNORED_FIELDS}
+    inputs = []
+    for f in files:
+        try:
+            st = os.stat(f["path"])
+            ident = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            # 消えたファイルは下調べで外される
+            ident = [-1, -1]
+        inputs.append([os.path.normcase(os.path.abspath(f["path"])), *ident, f.get("range", "")])
+    blob = json.dumps([JOURNAL_VERSION, settings, inputs], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class BatchJournal:
+    def __init__(self, root: str, key: str):
+        self.dir = os.path.join(root, key)
+        self.path = os.path.join(self.dir, "journal.jsonl")
+        self.work_dir = os.path.join(self.dir, "work")
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.started: Optional[datetime.datetime] = None
+        self.units: Dict[int, List[Tuple[str, str, Optional[List[int]]]]] = {}
+        self.outputs: Dict[str, Tuple[str, int]] = {}
+        self._load()
+        self._fh = open(self.path, "a", encoding="utf-8")
+        # 変換（add_units）と書き出し（add_output）は別スレッドから記録する
+        self._lock = threading.Lock()
+        if self._fh.tell() and not self._ends_with_newline():
+            # 書きかけの最終行（落ちた時）と次の記録がつながらないようにする
+            self._fh.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # 落ちた時の書きかけの行
+                    continue
+                t = rec.get("t")
+                if t == "start" and self.started is None:
+                    self.started = datetime.datetime.fromisoformat(rec["started"])
+                elif t == "units":
+                    self.units[rec["idx"]] = [tuple(u) for u in rec["units"]]
+                elif t == "output":
+                    self.outputs[rec["key"]] = (rec["dest"], rec["size"])
+
+    def _append(self, rec: dict):
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.units or self.outputs)
+
+    def start(self, started: datetime.datetime) -> datetime.datetime:
+        """初回は開始時刻を記録し、再開時は前回の開始時刻を返す"""
+        if self.started is None:
+            self.started = started
+            self._append({"t": "start", "started": started.isoformat()})
+        return self.started
+
+    def converted(self, idx: int) -> Optional[List[Tuple[str, str, Optional[List[int]]]]]:
+        """変換済みなら中間PDFのリスト（消えていれば None = 変換し直す）"""
+        units = self.units.get(idx)
+        if units is None or not all(os.path.exists(p) for p, _, _ in units):
+            return None
+        return units
+
+    def add_units(self, idx: int, units: List[Tuple[str, str, Optional[List[int]]]]):
+        self.units[idx] = units
+        self._append({"t": "units", "idx": idx, "units": units})
+
+    def written(self, key: str) -> Optional[str]:
+        """書き終えた出力ならそのパス（消された・書き換えられたものは None = 書き直す）"""
+        rec = self.outputs.get(key)
+        if rec is None:
+            return None
+        dest, size = rec
+        try:
+            return dest if os.path.getsize(dest) == size else None
+        except OSError:
+            return None
+
+    def add_output(self, key: str, dest: str):
+        size = os.path.getsize(dest)
+        self.outputs[key] = (dest, size)
+        self._append({"t": "output", "key": key, "dest": dest, "size": size})
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+
+    def finish(self):
+        """バッチが最後まで終わった。記録と中間PDFを消す"""
+        self.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def open_journal(cfg, files: List[dict]) -> Optional[BatchJournal]:
+    if not cfg.journal_enabled or not files:
+        return None
+    return BatchJournal(cfg.journal_dir or default_journal_dir(), batch_key(cfg, files))
@@ -0,0 +1,170 @@
+"""
+バッチの段階ごとの計測（cfg.metrics_enabled）。
+
+ファイル・出力ごとに「どの段階で何秒かかったか」とページ数・読み書きしたバイト数・キャッシュヒットを記録し、
+バッチの終わりに JSON（集計 + 全記録）と CSV（全記録）を書き出して、ログに1行の要約を出す。
+
+段階:
+- preflight : 下調べ（バッチ全体で1件）
+- convert   : 1ファイルの変換（Office のエクスポート / 画像の PDF 化 / 範囲指定の反映）
+- stamp     : 透かし・ページ番号を付けてページを追加（画像縮小を含む）
+- compress  : ストリームの Flate 圧縮
+- write     : ディスクへの書き出し（暗号化はここで掛かる。全結合の分割書き出しでは圧縮も含む）
+
+計測しない時は NULL_METRICS を使う。stage() は使い回しの何もしないオブジェクトを返すので、
+呼び出し側は分岐を書かずに済み、オーバーヘッドは属性参照と関数呼び出し1回ずつ程度。
+"""
+
+import csv
+import datetime
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+FIELDS = ("stage", "file", "secs", "pages", "bytes_in", "bytes_out", "cache_hit")
+
+
+def default_metrics_dir() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "Office2PDF", "metrics")
+
+
+class _Stage:
+    """with で囲んだ区間の時間を記録する。as で受けた dict に pages 等を書き足せる"""
+
+    __slots__ = ("_records", "_rec", "_t0")
+
+    def __init__(self, records: List[dict], rec: dict):
+        self._records = records
+        self._rec = rec
+
+    def __enter__(self) -> dict:
+        self._t0 = time.perf_counter()
+        return self._rec
+
+    def __exit__(self, *exc):
+        self._rec["secs"] = time.perf_counter() - self._t0
+        self._records.append(self._rec)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+    # 書き込まれても捨てる（読む人はいない）
+    _sink: dict = {}
+
+    def __enter__(self) -> dict:
+        return self._sink
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullMetrics:
+    """計測しない時の代役"""
+
+    enabled = False
+
+    def stage(self, name: str, file: str = "", **fields) -> _NullStage:
+        return _NULL_STAGE
+
+    def add(self, name: str, file: str = "", **fields) -> dict:
+        return _NullStage._sink
+
+
+NULL_METRICS = NullMetrics()
+
+
+class BatchMetrics:
+    enabled = True
+
+    def __init__(self):
+        self.started = datetime.datetime.now()
+        self._t0 = time.perf_counter()
+        self.total_secs = 0.0
+        self.records: List[dict] = []
+        self.extra: Dict[str, object] = {}
+
+    def _record(self, name: str, file: str, fields: dict) -> dict:
+        rec = {"stage": name, "file": file, "secs": 0.0, "pages": 0, "bytes_in": 0, "bytes_out": 0, "cache_hit": False}
+        rec.update(fields)
+        return rec
+
+    def stage(self, name: str, file: str = "", **fields) -> _Stage:
+        return _Stage(self.records, self._record(name, file, fields))
+
+    def add(self, name: str, file: str = "", **fields) -> dict:
+        """時間を別に測った（並列変換のワーカー等）記録を足す"""
+        rec = self._record(name, file, fields)
+        self.records.append(rec)
+        return rec
+
+    def finish(self):
+        self.total_secs = time.perf_counter() - self._t0
+
+    def summary(self) -> "OrderedDict[str, dict]":
+        """段階ごとの合計（記録された順）"""
+        out: "OrderedDict[str, dict]" = OrderedDict()
+        for r in self.records:
+            s = out.setdefault(
+                r["stage"], {"count": 0, "secs": 0.0, "pages": 0, "bytes_in": 0, "bytes_out": 0, "cache_hits": 0}
+            )
+            s["count"] += 1
+            s["secs"] += r["secs"]
+            s["pages"] += r["pages"]
+            s["bytes_in"] += r["bytes_in"]
+            s["bytes_out"] += r["bytes_out"]
+            s["cache_hits"] += bool(r["cache_hit"])
+        return out
+
+    def summary_line(self) -> str:
+        stages = self.summary()
+        parts = [f"{self.total_secs:.2f}s"]
+        parts += [f"{name} {s['secs']:.2f}s ({s['count']})" for name, s in stages.items()]
+        pages = stages.get("stamp", {}).get("pages", 0)
+        written = stages.get("write", {}).get("bytes_out", 0)
+        if pages and self.total_secs:
+            parts.append(f"{pages} pages, {pages / self.total_secs:.1f} pages/s")
+        if written:
+            parts.append(f"{written / (1024 * 1024):.1f} MB written")
+        if "convert" in stages:
+            parts.append(f"cache {stages['convert']['cache_hits']}/{stages['convert']['count']}")
+        return " | ".join(parts)
+
+    def write_report(self, out_dir: str) -> str:
+        """
+        out_dir に o2p_metrics_<開始時刻>.json / .csv を書き、JSON のパスを返す。
+        同じ秒に始まったバッチのレポートがあれば _1, _2… を付ける（上書きしない）
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        stem = os.path.join(out_dir, f"o2p_metrics_{self.started:%Y%m%d_%H%M%S}")
+        base, n = stem, 0
+        while True:
+            if not os.path.exists(base + ".csv"):
+                try:
+                    # JSON を排他的に作れたらその名前を使う（同時に書く別のバッチとも重ならない）
+                    fh = open(base + ".json", "x", encoding="utf-8")
+                    break
+                except FileExistsError:
+                    pass
+            n += 1
+            base = f"{stem}_{n}"
+        report = {
+            "started": self.started.isoformat(timespec="seconds"),
+            "total_secs": round(self.total_secs, 6),
+            **self.extra,
+            "stages": self.summary(),
+            "records": self.records,
+        }
+        with fh as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        with open(base + ".csv", "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+            w.writeheader()
+            w.writerows(self.records)
+        return base + ".json"
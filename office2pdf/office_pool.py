@@ -0,0 +1,468 @@
+"""
+Office アプリケーション（Word / Excel / PowerPoint）の常駐プール。
+
+1件ごとに DispatchEx → Quit すると起動だけで 1〜4 秒かかるため、
+バッチ中はアプリ毎に1インスタンスを温めたまま使い回す。
+COM の都合上、プールは作成したスレッド（STA）からのみ使うこと。
+
+隠れたダイアログなどで Office が固まると COM 呼び出しは戻ってこないので、
+監視スレッドが種別ごとの制限時間（timeouts）を過ぎた session の Office をプロセスごと止め、
+session から OfficeTimeout を投げる。
+"""
+
+import contextlib
+import os
+import shutil
+import signal
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from .i18n import I18N
+
+PROG_IDS = {
+    "Word": "Word.Application",
+    "Excel": "Excel.Application",
+    "PowerPoint": "PowerPoint.Application",
+}
+
+# DispatchEx でも新しいプロセスを起動せず、動いているものにつながる種別
+SINGLE_INSTANCE = ("PowerPoint",)
+
+
+class OfficeTimeout(Exception):
+    """session が制限時間を過ぎたので Office を止めた"""
+
+    def __init__(self, kind: str, secs: float, lang: str = "en"):
+        super().__init__(kind, secs, lang)
+        self.kind = kind
+        self.secs = secs
+        self.lang = lang
+
+    def __str__(self):
+        return I18N[self.lang]["err_office_timeout"].format(kind=self.kind, secs=self.secs)
+
+
+@contextlib.contextmanager
+def com_apartment():
+    """このスレッドで COM（STA）を初期化する。pywin32 が無い環境では何もしない"""
+    try:
+        import pythoncom
+    except ImportError:
+        yield
+        return
+    pythoncom.CoInitialize()
+    try:
+        yield
+    finally:
+        pythoncom.CoUninitialize()
+
+
+# --- Backends ---
+class OfficeBackend:
+    """プールが Office を起動・確認・終了するためのインターフェース"""
+
+    def launch(self, kind: str) -> Any:
+        raise NotImplementedError
+
+    def is_alive(self, app: Any) -> bool:
+        raise NotImplementedError
+
+    def quit(self, app: Any) -> None:
+        raise NotImplementedError
+
+    def kill(self, app: Any) -> None:
+        """
+        応答を待たずにプロセスごと止める（実行中のエクスポートを中断する用）。
+        プールの監視スレッドから呼ばれるので、COM は使わないこと。
+        自分で起動していないインスタンス（ユーザーが開いている PowerPoint 等）は止めないこと。
+        """
+
+
+def _office_pid(kind: str, app: Any) -> Optional[int]:
+    """Office のプロセスID（ウィンドウハンドルから引く）。分からなければ None"""
+    try:
+        import win32gui
+        import win32process
+
+        if kind == "Word":
+            # Word.Application には Hwnd が無いので、一時的なキャプションでウィンドウを探す
+            caption = f"o2p-{uuid.uuid4().hex}"
+            app.Caption = caption
+            try:
+                hwnd = win32gui.FindWindow("OpusApp", caption)
+            finally:
+                app.Caption = ""  # 空にすると既定のキャプションに戻る
+        elif kind == "Excel":
+            hwnd = app.Hwnd
+        else:
+            hwnd = app.HWND
+        return win32process.GetWindowThreadProcessId(hwnd)[1] or None
+    except Exception:
+        return None
+
+
+def _already_running(kind: str) -> bool:
+    """その種別の Office が既に動いているか（ROT に登録されているか）"""
+    try:
+        import win32com.client
+
+        win32com.client.GetActiveObject(PROG_IDS[kind])
+        return True
+    except Exception:
+        return False
+
+
+class ComBackend(OfficeBackend):
+    """
+    win32com（DispatchEx）で本物の Office を起動する。
+    PowerPoint は1プロセスしか動かないので、ユーザーが開いていればそれにつながる。
+    その場合は終了も kill もしない（ユーザーの作業ごと閉じてしまうため）。
+    """
+
+    def __init__(self):
+        # id(app) → プロセスID（kill は COM を使わずに止めるので、起動時に調べておく）
+        self._pids: Dict[int, int] = {}
+        # 起動前から動いていたインスタンスの id(app)
+        self._shared: Set[int] = set()
+
+    def launch(self, kind: str) -> Any:
+        import win32com.client
+
+        shared = kind in SINGLE_INSTANCE and _already_running(kind)
+        app = win32com.client.DispatchEx(PROG_IDS[kind])
+        if kind == "Excel":
+            app.Visible = False
+            app.DisplayAlerts = False
+        # ★PowerPointは「非表示(Visible=False)」が禁止の環境があるので触らない
+        if shared:
+            self._shared.add(id(app))
+            return app
+        pid = _office_pid(kind, app)
+        if pid:
+            self._pids[id(app)] = pid
+        return app
+
+    def is_alive(self, app: Any) -> bool:
+        try:
+            # プロセスが落ちていれば RPC エラーになる
+            _ = app.Name
+            return True
+        except Exception:
+            return False
+
+    def quit(self, app: Any) -> None:
+        self._pids.pop(id(app), None)
+        if id(app) in self._shared:
+            self._shared.discard(id(app))
+            return
+        try:
+            app.Quit()
+        except Exception:
+            pass
+
+    def kill(self, app: Any) -> None:
+        # 起動前から動いていたものはプロセス ID を記録していないので止めない
+        pid = self._pids.pop(id(app), None)
+        if pid:
+            try:
+                # Windows では TerminateProcess になる
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+
+def write_stub_pdf(path: str, pages: int = 1, size=(595, 842)):
+    """reportlab 等に依存せず、白紙ページだけの最小PDFを書き出す"""
+    w, h = size
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + i} 0 R" for i in range(pages))
+    objs.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for _ in range(pages):
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w} {h}] /Resources << >> >>".encode())
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _fake_export(app: "_FakeApp", out: str, path: str):
+    app.check()
+    if app.backend.should_hang(path):
+        # 隠れたダイアログ待ちの代わり。止められるまで戻らない
+        app.killed.wait()
+    if app.killed.wait(app.backend.export_latency):
+        app.check()
+    if app.backend.template:
+        shutil.copyfile(app.backend.template, out)
+    else:
+        write_stub_pdf(out, app.backend.pages)
+
+
+class _FakeSheet:
+    def __init__(self, app: "_FakeApp", name: str, path: str):
+        self.app = app
+        self.path = path
+        self.Name = name
+        self.Visible = -1  # xlSheetVisible
+        self.PageSetup = type("PageSetup", (), {})()
+
+    def ExportAsFixedFormat(self, fmt, out, *args, **kwargs):
+        _fake_export(self.app, out, self.path)
+
+
+class _FakeDoc:
+    """Document / Presentation / Workbook の代役"""
+
+    def __init__(self, app: "_FakeApp", path: str):
+        self.app = app
+        self.path = path
+        self.Sheets = [_FakeSheet(app, s, path) for s in app.backend.sheets] if app.kind == "Excel" else []
+
+    def Worksheets(self, name):
+        for s in self.Sheets:
+            if s.Name == name:
+                return s
+        raise KeyError(name)
+
+    def ExportAsFixedFormat(self, out, *args, **kwargs):
+        _fake_export(self.app, out, self.path)
+
+    def Close(self, *args):
+        pass
+
+
+class _FakeCollection:
+    def __init__(self, app: "_FakeApp"):
+        self.app = app
+
+    def Open(self, path, *args, **kwargs):
+        self.app.check()
+        if any(s in os.path.basename(path) for s in self.app.backend.fail_on):
+            raise RuntimeError(f"fake open error: {path}")
+        return _FakeDoc(self.app, path)
+
+
+class _FakeApp:
+    def __init__(self, backend: "FakeBackend", kind: str):
+        self.backend = backend
+        self.kind = kind
+        self.alive = True
+        self.killed = threading.Event()
+        self.Visible = False
+        self.DisplayAlerts = False
+        self.Documents = self.Workbooks = self.Presentations = _FakeCollection(self)
+
+    @property
+    def Name(self):
+        self.check()
+        return PROG_IDS[self.kind]
+
+    def check(self):
+        if not self.alive:
+            raise RuntimeError("The RPC server is unavailable.")
+
+    def Quit(self):
+        self.alive = False
+
+
+class FakeBackend(OfficeBackend):
+    """
+    Linux でもプールを動かす・計測するための COM 代役。
+    起動・エクスポートの待ち時間を模擬し、白紙PDF（template を指定すればそのコピー）を書き出す。
+    """
+
+    def __init__(
+        self,
+        launch_latency: float = 0.0,
+        export_latency: float = 0.0,
+        pages: int = 1,
+        sheets: Iterable[str] = ("Sheet1",),
+        fail_on: Iterable[str] = (),
+        template: Optional[str] = None,
+        hang_on: Optional[Dict[str, int]] = None,
+    ):
+        self.launch_latency = launch_latency
+        self.export_latency = export_latency
+        self.pages = pages
+        self.sheets = list(sheets)
+        self.fail_on = list(fail_on)
+        self.template = template
+        # {ファイル名に含まれる文字列: 回数}。該当する文書のエクスポートは kill されるまで戻らない。
+        # 回数 > 0 ならそのファイルの最初の回数分だけ固まる（再試行で通る場合の模擬）、0 なら毎回
+        self.hang_on = dict(hang_on or {})
+        self.hangs: Dict[str, int] = {}
+        self.launches = 0
+        self.quits = 0
+        self.kills = 0
+
+    def launch(self, kind: str) -> Any:
+        time.sleep(self.launch_latency)
+        self.launches += 1
+        return _FakeApp(self, kind)
+
+    def is_alive(self, app: Any) -> bool:
+        return app.alive
+
+    def quit(self, app: Any) -> None:
+        self.quits += 1
+        app.Quit()
+
+    def kill(self, app: Any) -> None:
+        self.kills += 1
+        app.alive = False
+        app.killed.set()
+
+    def should_hang(self, path: str) -> bool:
+        name = os.path.basename(path)
+        for s, times in self.hang_on.items():
+            if s in name:
+                self.hangs[name] = self.hangs.get(name, 0) + 1
+                return not times or self.hangs[name] <= times
+        return False
+
+
+# --- Pool ---
+class OfficePool:
+    """
+    アプリ種別ごとに1インスタンスを保持して使い回す。
+    max_uses 件処理するか、session 内で例外が出たらそのインスタンスは破棄（次回起動し直し）。
+    再利用前には backend.is_alive で生存確認する。
+    timeouts（{"Word": 秒, ...}、0 や無い種別は制限なし）を過ぎた session と、
+    cancel_event がセットされた時の session は、監視スレッドが backend.kill で止める。
+    """
+
+    def __init__(
+        self,
+        backend: OfficeBackend,
+        max_uses: int = 50,
+        log: Optional[Callable[[str], None]] = None,
+        cancel_event=None,
+        timeouts: Optional[Dict[str, float]] = None,
+        lang: str = "en",
+    ):
+        self.backend = backend
+        self.lang = lang
+        self.max_uses = max_uses
+        self.log = log or (lambda msg: None)
+        self._apps: Dict[str, Any] = {}
+        self._uses: Dict[str, int] = {}
+        self.stats = {"launch": 0, "reuse": 0, "recycle": 0, "kill": 0, "timeout": 0}
+        # session 中（エクスポート中）のアプリと期限。監視スレッドはこれをプロセスごと止める
+        self._busy: Dict[str, Tuple[Any, Optional[float]]] = {}
+        # 期限切れで止めた種別（session を抜ける時に OfficeTimeout にする）
+        self._expired: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.cancel_event = cancel_event
+        self.timeouts = {k: v for k, v in (timeouts or {}).items() if v and v > 0}
+        if cancel_event is not None or self.timeouts:
+            threading.Thread(target=self._watch, name="office-watchdog", daemon=True).start()
+
+    def _watch(self):
+        """
+        期限切れ・キャンセル時に実行中の Office を止める。エクスポート中の COM 呼び出しは
+        終わるまで戻ってこないので、呼び出し側のチェックだけでは何分も（固まれば永遠に）待つことになる。
+        """
+        while not self._closed.wait(0.1):
+            cancelled = self.cancel_event is not None and self.cancel_event.is_set()
+            now = time.monotonic()
+            victims = []
+            with self._lock:
+                for kind, (app, deadline) in list(self._busy.items()):
+                    if cancelled or (deadline is not None and now >= deadline):
+                        del self._busy[kind]
+                        if not cancelled:
+                            self._expired[kind] = app
+                        victims.append((kind, app, cancelled))
+            for kind, app, by_cancel in victims:
+                if by_cancel:
+                    self.log(self._("log_office_cancel").format(kind=kind))
+                else:
+                    self.log(self._("log_office_timeout").format(kind=kind, secs=self.timeouts[kind]))
+                    self.stats["timeout"] += 1
+                self.stats["kill"] += 1
+                self.backend.kill(app)
+
+    def _(self, key: str) -> str:
+        return I18N[self.lang].get(key, key)
+
+    def timed_out(self, kind: str) -> bool:
+        """実行中の session が期限切れで止められたか（session 内の例外を握りつぶす前に確かめる用）"""
+        return kind in self._expired
+
+    def _release(self, kind: str) -> bool:
+        """session を監視対象から外し、期限切れで止められていたかを返す"""
+        with self._lock:
+            self._busy.pop(kind, None)
+            return self._expired.pop(kind, None) is not None
+
+    @contextlib.contextmanager
+    def session(self, kind: str):
+        app = self._checkout(kind)
+        secs = self.timeouts.get(kind)
+        with self._lock:
+            self._busy[kind] = (app, time.monotonic() + secs if secs else None)
+        try:
+            yield app
+        except BaseException as e:
+            expired = self._release(kind)
+            self._discard(kind)
+            if expired:
+                raise OfficeTimeout(kind, secs, self.lang) from e
+            raise
+        if self._release(kind):
+            # 止めた直後に終わっていた。結果は使えるが、アプリはもう動かない
+            self._discard(kind)
+        else:
+            self._checkin(kind)
+
+    def _checkout(self, kind: str) -> Any:
+        app = self._apps.get(kind)
+        if app is not None:
+            if self.backend.is_alive(app):
+                self.stats["reuse"] += 1
+                return app
+            self.log(self._("log_office_restart").format(kind=kind))
+            self._discard(kind)
+
+        app = self.backend.launch(kind)
+        self._apps[kind] = app
+        self._uses[kind] = 0
+        self.stats["launch"] += 1
+        return app
+
+    def _checkin(self, kind: str):
+        self._uses[kind] = self._uses.get(kind, 0) + 1
+        if self.max_uses and self._uses[kind] >= self.max_uses:
+            self._discard(kind)
+
+    def _discard(self, kind: str):
+        app = self._apps.pop(kind, None)
+        self._uses.pop(kind, None)
+        if app is not None:
+            self.stats["recycle"] += 1
+            self.backend.quit(app)
+
+    def close(self):
+        self._closed.set()
+        for kind in list(self._apps):
+            app = self._apps.pop(kind)
+            self.backend.quit(app)
+        self._uses.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
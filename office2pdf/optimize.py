@@ -0,0 +1,327 @@
+"""
+「PDF軽量化」の画像縮小。
+
+スキャンや PowerPoint の出力はサイズのほとんどが埋め込み画像なので、
+ページに対して解像度が高すぎる画像を目標 DPI まで縮小し、JPEG（品質指定）で詰め直す。
+
+- 実効 DPI は「画像がページ全体に表示されている」とみなして計算する（小さく表示されている画像は
+  実際にはもっと高解像度なので、縮小しすぎることはない）
+- デコード・縮小・JPEG 化はスレッドプールで並列に行う
+- 同じ内容の画像（ロゴなど）はハッシュで見分けて1回だけ処理する（バッチ中の別の出力でも使い回す）。
+  覚えておく結果は RESULT_CACHE_BYTES までで、超えたら長く使われていないものから捨てる
+- 詰め直して小さくならなかった画像、2値・CMYK・16bit・マスク付きなどはそのまま残す
+"""
+
+import hashlib
+import io
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image
+from pypdf import PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+# 目標 DPI をこれ以上超えている画像だけ縮小する（わずかに高いだけの画像を劣化させない）
+DPI_MARGIN = 1.1
+
+# 縮小結果を覚えておく量の上限（JPEG・アルファのバイト数の合計）。
+# 何千枚のスキャンでもメモリが増え続けないようにする（ロゴなど繰り返し出てくる画像は残り続ける）
+RESULT_CACHE_BYTES = 32 * 1024 * 1024
+
+# 「縮小しない」という結果（None）も覚えておくので、1件あたりこれだけ数える
+_RESULT_OVERHEAD = 256
+
+# 元の色空間をそのまま使える場合（ICCBased は成分数が同じなら残す）
+_DEVICE_CS = {"L": "/DeviceGray", "RGB": "/DeviceRGB"}
+
+
+def _color_space(obj: StreamObject, mode: str):
+    cs = obj.get("/ColorSpace")
+    if cs is not None:
+        cs_obj = cs.get_object()
+        if isinstance(cs_obj, ArrayObject) and cs_obj and cs_obj[0] == "/ICCBased":
+            n = cs_obj[1].get_object().get("/N")
+            if n == len(mode):
+                return cs
+    return NameObject(_DEVICE_CS[mode])
+
+
+def _image_key(obj: StreamObject) -> str:
+    h = hashlib.sha1(obj._data)
+    for k in ("/Width", "/Height", "/Filter", "/DecodeParms", "/BitsPerComponent", "/ColorSpace"):
+        h.update(repr(obj.get(k)).encode())
+    return h.hexdigest()
+
+
+# 縮小するのはこの色空間の画像だけ（CMYK・特色などは色が変わるので触らない）
+_CANDIDATE_CS = ("/DeviceRGB", "/DeviceGray", "/ICCBased", "/Indexed")
+
+
+def _is_candidate(obj: StreamObject) -> bool:
+    if obj.get("/Subtype") != "/Image" or obj.get("/ImageMask") or "/Mask" in obj or "/Decode" in obj:
+        return False
+    if obj.get("/BitsPerComponent", 8) != 8:
+        return False
+    cs = obj.get("/ColorSpace")
+    cs = cs.get_object() if cs is not None else None
+    name = cs[0] if isinstance(cs, ArrayObject) and cs else cs
+    if name == "/ICCBased":
+        return cs[1].get_object().get("/N") in (1, 3)
+    if name == "/Indexed":
+        base = cs[1].get_object()
+        return base in ("/DeviceRGB", "/DeviceGray")
+    return name in _CANDIDATE_CS
+
+
+def _components(cs) -> int:
+    cs = cs.get_object() if cs is not None else None
+    if isinstance(cs, ArrayObject) and cs and cs[0] == "/ICCBased":
+        return cs[1].get_object().get("/N", 0)
+    return {"/DeviceGray": 1, "/DeviceRGB": 3}.get(cs, 0)
+
+
+def _decode(obj: StreamObject, size: Tuple[int, int]) -> Optional[Image.Image]:
+    """
+    画像ストリームを PIL の画像にする（DCT / Flate / 無圧縮だけ。それ以外は None）。
+    JPEG は縮小後の size に近い解像度で（DCT のまま 1/2, 1/4, 1/8 に）デコードする。
+    """
+    filt = obj.get("/Filter")
+    if isinstance(filt, ArrayObject):
+        filt = filt[0] if len(filt) == 1 else None
+    w, h = obj["/Width"], obj["/Height"]
+    if filt == "/DCTDecode":
+        img = Image.open(io.BytesIO(obj._data))
+        img.draft(img.mode, size)
+        img.load()
+        return img
+    if filt not in (None, "/FlateDecode"):
+        return None
+
+    data = obj.get_data()  # 予測子（/DecodeParms）は pypdf が戻す
+    cs = obj.get("/ColorSpace")
+    cs_obj = cs.get_object() if cs is not None else None
+    if isinstance(cs_obj, ArrayObject) and cs_obj and cs_obj[0] == "/Indexed":
+        base = _components(cs_obj[1])
+        lookup = cs_obj[3].get_object()
+        lookup = lookup.get_data() if isinstance(lookup, StreamObject) else bytes(lookup.original_bytes)
+        img = Image.frombytes("P", (w, h), data)
+        img.putpalette(lookup, "RGB" if base == 3 else "L")
+        return img.convert("RGB" if base == 3 else "L")
+    n = _components(cs) if cs is not None else 1  # /SMask は /ColorSpace を持たない
+    if n not in (1, 3):
+        return None
+    return Image.frombytes("L" if n == 1 else "RGB", (w, h), data)
+
+
+class _Result:
+    """縮小結果（同じ画像が何度出てきても使い回す）"""
+
+    def __init__(self, size: Tuple[int, int], mode: str, jpeg: bytes, alpha: Optional[bytes], before: int):
+        self.size = size
+        self.mode = mode
+        self.jpeg = jpeg
+        self.alpha = alpha
+        self.before = before
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.jpeg) + (len(self.alpha) if self.alpha else 0)
+
+
+class ImageOptimizer:
+    """
+    target_dpi まで縮小して quality の JPEG にする。バッチ中は1つを使い回す（同じ画像の結果を共有する）。
+    optimize() は writer に追加したばかりのページに対して呼び、画像オブジェクトをその場で書き換える
+    （参照はそのままなので、同じ画像を使う他のページにも反映される）。
+    """
+
+    def __init__(
+        self, target_dpi: int = 150, quality: int = 75, max_workers: int = 4, cache_bytes: int = RESULT_CACHE_BYTES
+    ):
+        self.target_dpi = target_dpi
+        self.quality = quality
+        self.max_workers = max_workers
+        self.cache_bytes = cache_bytes
+        self._ex: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 画像のキー → 縮小結果（None=縮小しない）。古く使われた順
+        self._results: "OrderedDict[str, Optional[_Result]]" = OrderedDict()
+        self._cached = 0
+        self.images = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def close(self):
+        if self._ex is not None:
+            self._ex.shutdown(wait=True)
+            self._ex = None
+
+    # --- Result cache ---
+    @staticmethod
+    def _cost(res: Optional[_Result]) -> int:
+        return _RESULT_OVERHEAD + (res.nbytes if res is not None else 0)
+
+    def _lookup(self, key: str) -> Tuple[bool, Optional[_Result]]:
+        with self._lock:
+            if key not in self._results:
+                return False, None
+            self._results.move_to_end(key)
+            return True, self._results[key]
+
+    def _remember(self, key: str, res: Optional[_Result]):
+        with self._lock:
+            if key in self._results:
+                self._cached -= self._cost(self._results.pop(key))
+            self._results[key] = res
+            self._cached += self._cost(res)
+            while self._cached > self.cache_bytes and len(self._results) > 1:
+                _, old = self._results.popitem(last=False)
+                self._cached -= self._cost(old)
+
+    # --- Collect ---
+    def _walk(self, resources, page_in: Tuple[float, float], found: dict, seen: set):
+        """resources 内の画像を {idnum: [ref, 実効DPI]} に集める（Form XObject の中も見る）"""
+        if resources is None:
+            return
+        xobjs = resources.get_object().get("/XObject")
+        if xobjs is None:
+            return
+        xobjs = xobjs.get_object()
+        for name in list(xobjs.keys()):
+            ref = xobjs.raw_get(name)
+            if not isinstance(ref, IndirectObject):
+                continue
+            obj = ref.get_object()
+            if obj is None:
+                continue
+            sub = obj.get("/Subtype")
+            if sub == "/Form":
+                if ref.idnum not in seen:
+                    seen.add(ref.idnum)
+                    self._walk(obj.get("/Resources"), page_in, found, seen)
+            elif sub == "/Image":
+                w, h = obj.get("/Width", 0), obj.get("/Height", 0)
+                dpi = min(w / page_in[0], h / page_in[1]) if page_in[0] and page_in[1] else 0
+                entry = found.setdefault(ref.idnum, [ref, dpi])
+                entry[1] = min(entry[1], dpi)  # 複数ページで使われていたら一番大きく表示されるページに合わせる
+
+    # --- Process (worker) ---
+    def _process(self, obj: StreamObject, scale: float) -> Optional[_Result]:
+        size = (max(1, round(obj["/Width"] * scale)), max(1, round(obj["/Height"] * scale)))
+        try:
+            img = _decode(obj, size)
+            smask = obj.get("/SMask")
+            alpha = _decode(smask.get_object(), size) if smask is not None else None
+        except Exception:
+            return None
+        if img is None or img.mode not in _DEVICE_CS or (smask is not None and (alpha is None or alpha.mode != "L")):
+            return None
+
+        buf = io.BytesIO()
+        img.resize(size, Image.LANCZOS).save(buf, "JPEG", quality=self.quality, optimize=True)
+        alpha_data = zlib.compress(alpha.resize(size, Image.LANCZOS).tobytes(), 6) if alpha is not None else None
+
+        before = len(obj._data) + (len(smask.get_object()._data) if smask is not None else 0)
+        after = buf.tell() + (len(alpha_data) if alpha_data else 0)
+        if after >= before:
+            return None
+        return _Result(size, img.mode, buf.getvalue(), alpha_data, before)
+
+    # --- Apply ---
+    def _apply(self, obj: StreamObject, res: _Result):
+        w, h = res.size
+        cs = _color_space(obj, res.mode)
+        for k in ("/DecodeParms", "/Intent"):
+            obj.pop(NameObject(k), None)
+        obj[NameObject("/Width")] = NumberObject(w)
+        obj[NameObject("/Height")] = NumberObject(h)
+        obj[NameObject("/ColorSpace")] = cs
+        obj[NameObject("/BitsPerComponent")] = NumberObject(8)
+        obj[NameObject("/Filter")] = NameObject("/DCTDecode")
+        obj._data = res.jpeg
+        if res.alpha is not None:
+            smask = obj["/SMask"].get_object()
+            smask.pop(NameObject("/DecodeParms"), None)
+            smask[NameObject("/Width")] = NumberObject(w)
+            smask[NameObject("/Height")] = NumberObject(h)
+            smask[NameObject("/ColorSpace")] = NameObject("/DeviceGray")
+            smask[NameObject("/BitsPerComponent")] = NumberObject(8)
+            smask[NameObject("/Filter")] = NameObject("/FlateDecode")
+            smask._data = res.alpha
+
+    def optimize(self, pages: list, check: Optional[Callable[[], None]] = None):
+        """
+        writer に追加済みの pages が使っている画像を縮小する（flush / write の前に呼ぶ）。
+        check は画像1つ処理するごとに呼ぶ（例外を投げれば残りは取り消す）。
+        """
+        found: dict = {}
+        seen: set = set()
+        for page in pages:
+            box = page.mediabox
+            self._walk(page.get("/Resources"), (float(box.width) / 72, float(box.height) / 72), found, seen)
+
+        jobs = []
+        for ref, dpi in found.values():
+            obj = ref.get_object()
+            if _is_candidate(obj) and dpi > self.target_dpi * DPI_MARGIN:
+                scale = self.target_dpi / dpi
+                # 同じ画像でも縮小後のサイズが違えば別物として扱う
+                key = f"{_image_key(obj)}:{round(obj['/Width'] * scale)}"
+                jobs.append((obj, key, scale))
+        if not jobs:
+            return
+        if self._ex is None:
+            self._ex = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="imgopt")
+
+        # 同じ内容の画像は（前の出力で処理済みでも）1回だけ処理する。
+        # この呼び出しで使う結果は results に持つ（キャッシュから捨てられても使える）
+        results: Dict[str, Optional[_Result]] = {}
+        pending = {}
+        for obj, key, scale in jobs:
+            if key in results or key in pending:
+                continue
+            known, res = self._lookup(key)
+            if known:
+                results[key] = res
+            else:
+                pending[key] = self._ex.submit(self._process, obj, scale)
+        try:
+            for key, fut in pending.items():
+                if check:
+                    check()
+                results[key] = fut.result()
+                self._remember(key, results[key])
+        except BaseException:
+            for fut in pending.values():
+                fut.cancel()
+            raise
+
+        for obj, key, _ in jobs:
+            res = results[key]
+            if res is None:
+                continue
+            self._apply(obj, res)
+            self.images += 1
+            self.bytes_before += res.before
+            self.bytes_after += res.nbytes
+
+
+def flate_encode_streams(writer: PdfWriter, check: Optional[Callable[[], None]] = None):
+    """writer 内の未圧縮ストリーム（コンテンツ・透かし）を Flate で圧縮する（check は途中で定期的に呼ぶ）"""
+    for i, obj in enumerate(writer._objects):
+        if check and i % 200 == 0:
+            check()
+        if isinstance(obj, DecodedStreamObject):
+            enc = obj.flate_encode()
+            enc.indirect_reference = obj.indirect_reference
+            writer._objects[i] = enc
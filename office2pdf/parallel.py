@@ -0,0 +1,102 @@
+"""
+マルチプロセス並列変換。
+
+ファイル種別ごとに ProcessPoolExecutor を用意し（並列数は cfg.parallel_workers）、
+各ワーカープロセスは自分の STA（CoInitialize）と OfficePool を持つ。
+結果は完了順に返すので、元の並び順への組み直しは呼び出し側で idx を使って行う。
+"""
+
+import contextlib
+import multiprocessing
+import multiprocessing.util
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Collection, Iterator, List, Optional, Tuple
+
+from .cache import open_cache
+from .converters import convert_file
+from .office_pool import OfficeBackend, OfficePool, com_apartment
+
+# ワーカープロセス内でのみ使う
+_pool: Optional[OfficePool] = None
+_cache = None
+_cancel = None
+_stack = contextlib.ExitStack()
+
+
+def _init_worker(backend: OfficeBackend, cfg, cancel_event, lang: str):
+    global _pool, _cache, _cancel
+    _cancel = cancel_event
+    _stack.enter_context(com_apartment())
+    _pool = _stack.enter_context(
+        OfficePool(
+            backend,
+            max_uses=cfg.office_recycle_after,
+            cancel_event=cancel_event,
+            timeouts=cfg.office_timeouts,
+            lang=lang,
+        )
+    )
+    _cache = open_cache(cfg)
+    # プロセス終了時に Office を確実に閉じる（→ CoUninitialize）
+    multiprocessing.util.Finalize(None, _stack.close, exitpriority=10)
+
+
+def _convert_job(
+    f: dict, idx: int, tmp_dir: str, cfg
+) -> Tuple[List[Tuple[str, str, Optional[List[int]]]], List[str], int, float]:
+    logs: List[str] = []
+    hits = _cache.stats["hit"] if _cache else 0
+    t0 = time.perf_counter()
+    units = convert_file(f, idx, tmp_dir, cfg, _pool, log=logs.append, cache=_cache, cancel_event=_cancel)
+    return units, logs, (_cache.stats["hit"] - hits if _cache else 0), time.perf_counter() - t0
+
+
+def iter_parallel(
+    files: List[dict],
+    tmp_dir: str,
+    cfg,
+    backend: OfficeBackend,
+    cancel_event=None,
+    skip: Collection[int] = (),
+    lang: str = "en",
+) -> Iterator[
+    Tuple[int, List[Tuple[str, str, Optional[List[int]]]], List[str], int, float, Optional[BaseException]]
+]:
+    """
+    files を並列に変換し、(idx, units, logs, キャッシュヒット数, 変換秒数, error) を完了順に yield する。
+    cancel_event がセットされたら未着手のジョブは取り消し、実行中のジョブの Office も止める
+    （ワーカーには multiprocessing.Event で伝える）。skip の idx は変換しない。lang はワーカーのログの言語。
+    """
+    executors = {}
+    futures = {}
+    worker_cancel = multiprocessing.Event()
+    try:
+        for i, f in enumerate(files):
+            if i in skip:
+                continue
+            t = f["type"]
+            if t not in executors:
+                n = max(1, int(cfg.parallel_workers.get(t, 1)))
+                executors[t] = ProcessPoolExecutor(
+                    max_workers=n,
+                    initializer=_init_worker,
+                    initargs=(backend, cfg, worker_cancel, lang),
+                )
+            futures[executors[t].submit(_convert_job, f, i, tmp_dir, cfg)] = i
+
+        pending = set(futures)
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                worker_cancel.set()
+                break
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    units, logs, hits, secs = fut.result()
+                    yield futures[fut], units, logs, hits, secs, None
+                except Exception as e:
+                    yield futures[fut], [], [], 0, 0.0, e
+    finally:
+        for ex in executors.values():
+            ex.shutdown(wait=True, cancel_futures=True)
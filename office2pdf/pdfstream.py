@@ -0,0 +1,331 @@
+"""
+書き出しながらページを足していける PdfWriter。
+
+PdfWriter は write() まで全オブジェクトをメモリに持つので、数千ファイルの結合ではメモリが増え続ける。
+StreamingPdfWriter は flush() のたびに、それまでに追加されたオブジェクトを出力ファイルへ書き出して手放す。
+ページツリー・カタログ・文書情報（・暗号化辞書）だけは最後まで残し、finish() で xref と一緒に書く。
+
+flush() 後は、書き出したオブジェクトを get_object() で参照できない。
+そのため flush() では reader とのオブジェクト対応表（clone の重複排除用）も捨てる。
+同じ reader のページはまとめて追加してから flush() すること。
+
+check を渡すと、書き出し中に定期的に呼ぶ（例外を投げれば途中で止まる。キャンセル用）。
+
+flush() は PdfWriter の内部（_objects・_resolve_links など）を使う。pypdf 5.9〜6.x で確認している。
+それが無い版では flush() は何もせず（全部メモリに持つ）、finish() で PdfWriter.write に任せる（compact も無効）。
+
+compact=True なら出力を小さくする（PDF 1.5）:
+- 内容が同じオブジェクト（結合した各ファイルが持っているフォント・ロゴ・ICC プロファイルなど）は
+  1つだけ書き、参照をそちらに付け替える（書き出し済みのものとも比べる）
+- ストリーム以外のオブジェクトはオブジェクトストリームにまとめて圧縮し、xref もストリームで書く
+"""
+
+import hashlib
+import io
+import zlib
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from pypdf import PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+# 1つのオブジェクトストリームに入れるオブジェクト数
+OBJSTM_SIZE = 100
+
+# 書き出し中、このオブジェクト数ごとに check を呼ぶ
+CHECK_EVERY = 200
+
+# 同じ内容でも1つにまとめてはいけないもの（ページツリーに同じページが2回入る等）
+_NO_DEDUPE_TYPES = ("/Page", "/Pages", "/Annot", "/Catalog", "/ObjStm", "/XRef")
+
+# /Type を省いた注釈も見分けるための /Subtype（PDF 32000 12.5.6）
+_ANNOT_SUBTYPES = frozenset(
+    "/Text /Link /FreeText /Line /Square /Circle /Polygon /PolyLine /Highlight /Underline /Squiggly"
+    " /StrikeOut /Stamp /Caret /Ink /Popup /FileAttachment /Sound /Movie /Widget /Screen /PrinterMark"
+    " /TrapNet /Watermark /3D /Redact /Projection /RichMedia".split()
+)
+
+# flush()・finish() が使う PdfWriter の内部
+_WRITER_INTERNALS = (
+    "_objects",
+    "_info_obj",
+    "_info",
+    "_pages",
+    "_ID",
+    "_encryption",
+    "_encrypt_entry",
+    "_unresolved_links",
+    "_merged_in_pages",
+    "_resolve_links",
+    "_write_xref_table",
+    "_write_trailer",
+    "reset_translation",
+    "flattened_pages",
+)
+
+
+def _replace_refs(obj, alias: Dict[int, int], writer: PdfWriter):
+    """obj の中の間接参照のうち、alias にあるものを付け替える（直接オブジェクトの中も辿る）"""
+    if isinstance(obj, DictionaryObject):
+        items = list(obj.items())
+    elif isinstance(obj, ArrayObject):
+        items = list(enumerate(obj))
+    else:
+        return
+    for k, v in items:
+        if isinstance(v, IndirectObject):
+            if v.idnum in alias:
+                obj[k] = IndirectObject(alias[v.idnum], 0, writer)
+        else:
+            _replace_refs(v, alias, writer)
+
+
+def _dedupable(obj: DictionaryObject) -> bool:
+    """
+    内容が同じなら1つにまとめてよい辞書か。
+    注釈・フォーム部品・しおり等は、同じ内容でも別のページ・親に属する別物なので除く
+    （/P はその注釈のページ、/Parent はページツリー・フィールド・しおりの親）。
+    """
+    if obj.get("/Type") in _NO_DEDUPE_TYPES:
+        return False
+    if not isinstance(obj, StreamObject) and obj.get("/Subtype") in _ANNOT_SUBTYPES:
+        return False
+    return "/P" not in obj and "/Parent" not in obj
+
+
+class StreamingPdfWriter(PdfWriter):
+    def __init__(
+        self, fh: Optional[BinaryIO] = None, compact: bool = False, check: Optional[Callable[[], None]] = None
+    ):
+        super().__init__()
+        self._fh = fh
+        self._check = check
+        self._positions: Dict[int, int] = {}
+        self._flushed = 0  # _objects のうち書き出しを判断済みの数
+        self._started = False
+
+        # この pypdf で書き出しながら結合できるか
+        self.streaming = all(hasattr(self, a) for a in _WRITER_INTERNALS)
+        self.compact = compact and self.streaming
+        self._digests: Dict[bytes, int] = {}  # 内容のハッシュ → 書いた（書く予定の）オブジェクト番号
+        self._alias: Dict[int, int] = {}  # 重複として捨てたオブジェクト番号 → 代わりに使う番号
+        self._objstm_buf: List[Tuple[int, bytes]] = []
+        self._in_objstm: Dict[int, Tuple[int, int]] = {}  # 番号 → (オブジェクトストリームの番号, 何番目か)
+        # 比較用: 重複を捨てずに従来の形式（xref 表）で書いた場合のバイト数の見積もり
+        self.classic_bytes = 0
+        self.deduped = 0
+        if self.compact:
+            self.pdf_header = "%PDF-1.5"
+
+    def _kept_ids(self) -> set:
+        keep = {
+            self._info_obj.indirect_reference.idnum,
+            self._pages.idnum,
+            self.root_object.indirect_reference.idnum,
+        }
+        if self._encrypt_entry is not None:
+            keep.add(self._encrypt_entry.indirect_reference.idnum)
+        return keep
+
+    def _start(self):
+        if not self._started:
+            self._fh.write(self.pdf_header.encode() + b"\n")
+            self._fh.write(b"%\xE2\xE3\xCF\xD3\n")
+            self._started = True
+
+    def _write_object(self, idnum: int, obj):
+        self._start()
+        if self.compact and not isinstance(obj, StreamObject) and obj is not self._encrypt_entry:
+            # 中の文字列はオブジェクトストリームごと暗号化される
+            buf = io.BytesIO()
+            obj.write_to_stream(buf)
+            body = buf.getvalue()
+            self.classic_bytes += len(body) + len(f"{idnum} 0 obj\n\nendobj\n") + 20
+            self._objstm_buf.append((idnum, body))
+            if len(self._objstm_buf) >= OBJSTM_SIZE:
+                self._write_objstm()
+            return
+
+        start = self._fh.tell()
+        self._positions[idnum] = start
+        self._fh.write(f"{idnum} 0 obj\n".encode())
+        if self._encryption and obj is not self._encrypt_entry:
+            obj = self._encryption.encrypt_object(obj, idnum, 0)
+        obj.write_to_stream(self._fh)
+        self._fh.write(b"\nendobj\n")
+        self.classic_bytes += self._fh.tell() - start + 20
+
+    def _write_objstm(self):
+        if not self._objstm_buf:
+            return
+        self._objects.append(None)
+        stm_id = len(self._objects)
+        offsets, bodies, pos = [], [], 0
+        for k, (idnum, body) in enumerate(self._objstm_buf):
+            offsets.append(f"{idnum} {pos}")
+            bodies.append(body)
+            pos += len(body) + 1
+            self._in_objstm[idnum] = (stm_id, k)
+        head = " ".join(offsets).encode() + b"\n"
+        stm = DecodedStreamObject()
+        stm.set_data(head + b"\n".join(bodies))
+        stm[NameObject("/Type")] = NameObject("/ObjStm")
+        stm[NameObject("/N")] = NumberObject(len(self._objstm_buf))
+        stm[NameObject("/First")] = NumberObject(len(head))
+        self._objstm_buf = []
+
+        stm = stm.flate_encode()
+        self._positions[stm_id] = self._fh.tell()
+        self._fh.write(f"{stm_id} 0 obj\n".encode())
+        if self._encryption:
+            stm = self._encryption.encrypt_object(stm, stm_id, 0)
+        stm.write_to_stream(self._fh)
+        self._fh.write(b"\nendobj\n")
+
+    def _dedupe(self, first: int, last: int, keep: set):
+        """
+        first..last 番のオブジェクトのうち、内容が同じものを捨てて参照を付け替える。
+        子（後から追加されたもの＝番号が大きい）から順に見るので、
+        「中身が同じフォントファイルを指すフォント辞書」のような入れ子の重複もまとまる。
+        """
+        for idnum in range(last, first - 1, -1):
+            if self._check and idnum % CHECK_EVERY == 0:
+                self._check()
+            obj = self._objects[idnum - 1]
+            if obj is None or idnum in keep:
+                continue
+            _replace_refs(obj, self._alias, self)
+            if isinstance(obj, DictionaryObject) and not _dedupable(obj):
+                continue
+            buf = io.BytesIO()
+            obj.write_to_stream(buf)
+            digest = hashlib.sha256(buf.getvalue()).digest()
+            first_id = self._digests.setdefault(digest, idnum)
+            if first_id != idnum:
+                self._alias[idnum] = first_id
+                self._objects[idnum - 1] = None
+                self.deduped += 1
+                self.classic_bytes += buf.tell() + len(f"{idnum} 0 obj\n\nendobj\n") + 20
+        # 先に見たオブジェクトから後で捨てたもの（番号の小さいもの）への参照と、
+        # 残す（まだ書かない）ページツリー等からの参照を付け替える
+        for idnum in [*range(first, last + 1), *keep]:
+            obj = self._objects[idnum - 1]
+            if obj is not None:
+                _replace_refs(obj, self._alias, self)
+
+    def flush(self, compress: bool = False):
+        """
+        ここまでに追加したページとその中身を書き出し、メモリから外す。
+        compress=True なら未圧縮のストリームを Flate で圧縮して書く。
+        （page.compress_content_streams は共有しているストリームを消してしまうので使わない）
+        """
+        if not self.streaming:
+            return
+        # ページ内リンク（/Dest）は同じ reader のページ同士ならここで解決できる
+        self._resolve_links()
+        self._unresolved_links = []
+        self._merged_in_pages = {}
+        self.reset_translation()  # reader への参照（PreventGC）も外れる
+
+        keep = self._kept_ids()
+        first, last = self._flushed + 1, len(self._objects)
+        if compress:
+            self._compress_streams(first, last, keep)
+        if self.compact:
+            self._dedupe(first, last, keep)
+
+        for idnum in range(first, last + 1):
+            if self._check and idnum % CHECK_EVERY == 0:
+                self._check()
+            obj = self._objects[idnum - 1]
+            if obj is None or idnum in keep:
+                continue
+            self._write_object(idnum, obj)
+            self._objects[idnum - 1] = None
+        self._flushed = max(self._flushed, last)
+
+        # ページ数（=次に追加する位置）は flattened_pages の長さで決まるので、要素だけ捨てる
+        self.flattened_pages[:] = [None] * len(self.flattened_pages)
+
+    def _compress_streams(self, first: int, last: int, keep: set):
+        for idnum in range(first, last + 1):
+            if self._check and idnum % CHECK_EVERY == 0:
+                self._check()
+            obj = self._objects[idnum - 1]
+            if idnum not in keep and isinstance(obj, DecodedStreamObject):
+                enc = obj.flate_encode()
+                enc.indirect_reference = obj.indirect_reference
+                self._objects[idnum - 1] = enc
+
+    def finish(self, fh: Optional[BinaryIO] = None, compress: bool = False):
+        """
+        残りのオブジェクト・xref・trailer を書いて完成させる（出力ファイルは閉じない）。
+        flush() せずに使う場合は、ここで初めて fh を渡してもよい（PdfWriter.write の代わり）。
+        """
+        if fh is not None:
+            self._fh = fh
+        if not self.streaming:
+            if compress and isinstance(getattr(self, "_objects", None), list):
+                self._compress_streams(1, len(self._objects), set())
+            PdfWriter.write(self, self._fh)
+            return
+        self.flush(compress)
+        for idnum in sorted(self._kept_ids()):
+            self._write_object(idnum, self._objects[idnum - 1])
+
+        if self.compact:
+            self._write_objstm()
+            self._write_xref_stream()
+            return
+        positions = [self._positions.get(i, -1) for i in range(1, len(self._objects) + 1)]
+        free = [i for i, pos in enumerate(positions, start=1) if pos < 0] + [0]
+        xref = self._write_xref_table(self._fh, positions, free)
+        self._write_trailer(self._fh, xref)
+
+    def _write_xref_stream(self):
+        self._objects.append(None)
+        xref_id = len(self._objects)
+        xref_pos = self._fh.tell()
+        self._positions[xref_id] = xref_pos
+        size = len(self._objects) + 1
+
+        off_w = max(4, (xref_pos.bit_length() + 7) // 8)
+        rows = [b"\x00" + (0).to_bytes(off_w, "big") + b"\xff\xff"]
+        for idnum in range(1, size):
+            if idnum in self._positions:
+                rows.append(b"\x01" + self._positions[idnum].to_bytes(off_w, "big") + b"\x00\x00")
+            elif idnum in self._in_objstm:
+                stm_id, k = self._in_objstm[idnum]
+                rows.append(b"\x02" + stm_id.to_bytes(off_w, "big") + k.to_bytes(2, "big"))
+            else:
+                rows.append(b"\x00" + (0).to_bytes(off_w, "big") + b"\x00\x01")
+        data = zlib.compress(b"".join(rows))
+
+        d = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/XRef"),
+                NameObject("/Size"): NumberObject(size),
+                NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(off_w), NumberObject(2)]),
+                NameObject("/Root"): self.root_object.indirect_reference,
+                NameObject("/Filter"): NameObject("/FlateDecode"),
+                NameObject("/Length"): NumberObject(len(data)),
+            }
+        )
+        if self._info is not None:
+            d[NameObject("/Info")] = self._info.indirect_reference
+        if self._ID is not None:
+            d[NameObject("/ID")] = self._ID
+        if self._encrypt_entry:
+            d[NameObject("/Encrypt")] = self._encrypt_entry.indirect_reference
+        # xref ストリームは暗号化しない
+        self._fh.write(f"{xref_id} 0 obj\n".encode())
+        d.write_to_stream(self._fh)
+        self._fh.write(b"\nstream\n" + data + b"\nendstream\nendobj\n")
+        self._fh.write(f"startxref\n{xref_pos}\n%%EOF\n".encode())
@@ -0,0 +1,91 @@
+"""
+変換 → 仕上げ → 書き出しを並行させるための段（cfg.pipeline_depth）。
+
+全結合以外では、1ファイル変換し終えるたびにそのファイルの出力を仕上げる。
+- 変換   : 呼び出し側のスレッド（Office の STA）
+- 仕上げ : 透かし・ページ番号・画像縮小・圧縮（PipelineStage のスレッド）
+- 書き出し: 一時ファイルに書いて rename・記録（もう1つの PipelineStage のスレッド）
+
+段の間の queue は depth 件までしか溜めないので、後ろの段が遅ければ前の段が待つ（メモリは増えない）。
+段の中で例外が起きたら残りは捨て、次の put() か close() で呼び出し側に投げ直す。
+"""
+
+import queue
+import threading
+from typing import Callable, Dict, Optional
+
+_END = object()
+
+
+class PipelineStage:
+    """
+    別スレッドで put() された item を順に fn に渡す。
+    put() は queue が一杯なら空くまで待つ。close() は残りを処理し終えるまで待つ。
+    """
+
+    def __init__(self, fn: Callable[[object], None], depth: int, name: str = "o2p-stage"):
+        self.fn = fn
+        self.q: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+        self.error: Optional[BaseException] = None
+        self._aborted = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.q.get()
+            if item is _END:
+                return
+            if self.error is not None or self._aborted:
+                # 失敗・中止した後に届いたものは捨てる（put で待っている側を止めないため取り出しは続ける）
+                continue
+            try:
+                self.fn(item)
+            except BaseException as e:
+                self.error = e
+
+    def put(self, item):
+        """item を渡す。この段が失敗していればその例外を投げる"""
+        while self.error is None:
+            try:
+                self.q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise self.error
+
+    def close(self):
+        """渡したものを全部処理し終えるまで待つ。途中で失敗していればその例外を投げる"""
+        self.put(_END)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def abort(self):
+        """残りを捨ててスレッドを終わらせる（呼び出し側で例外が起きた時。例外は投げない）"""
+        self._aborted = True
+        while self.thread.is_alive():
+            try:
+                self.q.put(_END, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.thread.join()
+
+
+class InOrder:
+    """
+    完了順に届く (番号, item) を、手前の番号が全部揃った分から番号順に emit(item) する（番号は 0 から）。
+    並列変換は完了順に返るので、出力の順番（{seq}）をファイルの並び順に保つために使う。
+    """
+
+    def __init__(self, emit: Callable[[object], None]):
+        self.emit = emit
+        self.next = 0
+        self._ready: Dict[int, object] = {}
+
+    def done(self, i: int, item):
+        self._ready[i] = item
+        while self.next in self._ready:
+            self.emit(self._ready.pop(self.next))
+            self.next += 1
@@ -0,0 +1,186 @@
+"""
+変換前の下調べ（プリフライト）。
+
+ファイルを追加した時点からスレッドで、変換せずに分かることだけを集めておく:
+- サイズ・更新日時
+- ページ数（PDF はページツリー、.docx/.pptx は docProps/app.xml の Pages/Slides）
+- パスワード付きか（PDF の暗号化、OOXML なのに zip ではなく OLE になっているもの）
+- 壊れていて開けないか
+- 画像の縦横ピクセル数
+
+範囲指定の検証や {ptotal} のプレビュー、変換前にまとめて失敗を報告するのに使う。
+"""
+
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from xml.etree import ElementTree as ET
+
+from PIL import Image
+from pypdf import PasswordType, PdfReader
+
+from .converters import is_all_range, parse_page_spec
+
+# パスワード付きの .docx/.xlsx/.pptx は zip ではなく OLE 複合ファイルとして保存される
+OLE_MAGIC = b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"
+OOXML_EXTS = (".docx", ".xlsx", ".xlsm", ".pptx")
+
+# docProps/app.xml の中でページ数を表す要素
+_APP_PAGE_TAGS = {"Word": "Pages", "PowerPoint": "Slides"}
+
+
+def _app_xml_pages(path: str, t: str) -> Optional[int]:
+    """Office が保存時に書いたページ数/スライド数（無ければ None）"""
+    with zipfile.ZipFile(path) as zf:
+        try:
+            data = zf.read("docProps/app.xml")
+        except KeyError:
+            return None
+    for elem in ET.fromstring(data):
+        if elem.tag.rsplit("}", 1)[-1] == _APP_PAGE_TAGS[t]:
+            try:
+                return int(elem.text)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def probe_file(f: dict) -> dict:
+    """
+    1ファイルを調べて {"size", "mtime", "pages", "pages_exact", "encrypted", "error", "image_size"} を返す。
+    pages は分からなければ None。Word/PowerPoint は保存時の値なので目安（pages_exact=False）。
+    error は開けなかった理由（無ければ空）。
+    """
+    p = f["path"]
+    meta = {
+        "size": 0,
+        "mtime": 0.0,
+        "pages": None,
+        "pages_exact": False,
+        "encrypted": False,
+        "error": "",
+        "image_size": None,
+    }
+    try:
+        st = os.stat(p)
+        meta["size"], meta["mtime"] = st.st_size, st.st_mtime
+        ext = os.path.splitext(p)[1].lower()
+
+        if ext in OOXML_EXTS:
+            with open(p, "rb") as fh:
+                head = fh.read(8)
+            if head == OLE_MAGIC:
+                meta["encrypted"] = True
+                return meta
+
+        t = f["type"]
+        if t == "PDF":
+            with open(p, "rb") as fh:
+                reader = PdfReader(fh)
+                # 権限パスワードだけのPDF（閲覧用パスワードが空）は開けるので、変換対象のまま
+                if reader.is_encrypted and reader.decrypt("") == PasswordType.NOT_DECRYPTED:
+                    meta["encrypted"] = True
+                else:
+                    meta["pages"], meta["pages_exact"] = len(reader.pages), True
+        elif t == "Image":
+            with Image.open(p) as img:
+                meta["image_size"] = img.size
+            meta["pages"], meta["pages_exact"] = 1, True
+        elif t in _APP_PAGE_TAGS and ext in OOXML_EXTS:
+            meta["pages"] = _app_xml_pages(p, t)
+    except Exception as e:
+        meta["error"] = str(e) or type(e).__name__
+    return meta
+
+
+def check_range(f: dict, meta: Optional[dict]) -> bool:
+    """ページ数が確定していて、範囲指定で1ページも残らない時だけ False"""
+    if f["type"] == "Excel" or not meta or not meta["pages_exact"]:
+        return True
+    r_spec = f.get("range", "")
+    return is_all_range(r_spec) or bool(parse_page_spec(r_spec, meta["pages"]))
+
+
+def selected_pages(f: dict, meta: Optional[dict]) -> Optional[int]:
+    """範囲指定を反映したページ数（分からなければ None）"""
+    if f["type"] == "Excel" or not meta or meta["pages"] is None:
+        return None
+    return len(parse_page_spec(f.get("range", ""), meta["pages"]))
+
+
+class PreflightIndex:
+    """
+    パス → 下調べ結果の索引。submit したファイルをスレッドプールで調べる。
+    on_update(path) は調べ終わるたびにワーカースレッドから呼ばれる。
+    ファイルのサイズ・更新日時が変わっていたら調べ直す。
+    """
+
+    def __init__(self, max_workers: int = 4, on_update: Optional[Callable[[str], None]] = None):
+        self._ex = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preflight")
+        self._lock = threading.Lock()
+        self._meta: Dict[str, dict] = {}
+        self._futures: Dict[str, object] = {}
+        self.on_update = on_update
+
+    def _run(self, f: dict):
+        meta = probe_file(f)
+        with self._lock:
+            self._meta[f["path"]] = meta
+            self._futures.pop(f["path"], None)
+        if self.on_update:
+            self.on_update(f["path"])
+
+    def _is_fresh(self, path: str) -> bool:
+        meta = self._meta.get(path)
+        if meta is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return (st.st_size, st.st_mtime) == (meta["size"], meta["mtime"])
+
+    def submit(self, files: Iterable[dict]):
+        with self._lock:
+            for f in files:
+                p = f["path"]
+                if p in self._futures or self._is_fresh(p):
+                    continue
+                self._futures[p] = self._ex.submit(self._run, dict(f))
+
+    def get(self, path: str) -> Optional[dict]:
+        with self._lock:
+            return self._meta.get(path)
+
+    def wait(self, files: Iterable[dict]) -> Dict[str, dict]:
+        """files の下調べが終わるのを待って（未投入なら投入して）結果を返す"""
+        files = list(files)
+        self.submit(files)
+        with self._lock:
+            futs = [self._futures.get(f["path"]) for f in files]
+        for fut in futs:
+            if fut is not None:
+                fut.result()
+        with self._lock:
+            return {f["path"]: self._meta.get(f["path"]) for f in files}
+
+    def close(self):
+        self._ex.shutdown(wait=False, cancel_futures=True)
+
+
+def find_problems(files: List[dict], metas: Dict[str, dict]) -> Dict[int, str]:
+    """変換しても失敗すると分かっているファイル {index: 理由キー}（理由キーは i18n）"""
+    problems = {}
+    for i, f in enumerate(files):
+        meta = metas.get(f["path"])
+        if not meta:
+            continue
+        if meta["encrypted"]:
+            problems[i] = "log_pre_encrypted"
+        elif meta["error"]:
+            problems[i] = "log_pre_broken"
+        elif not check_range(f, meta):
+            problems[i] = "log_pre_range"
+    return problems
@@ -0,0 +1,29 @@
+"""
+何度やり直しても変換が終わらなかった（Office が固まる）ファイルの隔離。
+
+元ファイルは動かさずに隔離フォルダへコピーし、quarantine.tsv に
+日時・元のパス・コピー先・理由を1行ずつ追記する。バッチはそのファイルを飛ばして続ける。
+"""
+
+import datetime
+import os
+import shutil
+
+
+def default_quarantine_dir() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "Office2PDF", "quarantine")
+
+
+def quarantine_file(path: str, reason: str, qdir: str) -> str:
+    """path を qdir にコピーして記録し、コピー先を返す（同名があれば日時を付けて別名にする）"""
+    os.makedirs(qdir, exist_ok=True)
+    now = datetime.datetime.now()
+    dest = os.path.join(qdir, os.path.basename(path))
+    if os.path.exists(dest):
+        stem, ext = os.path.splitext(os.path.basename(path))
+        dest = os.path.join(qdir, f"{stem}_{now:%Y%m%d_%H%M%S_%f}{ext}")
+    shutil.copy2(path, dest)
+    with open(os.path.join(qdir, "quarantine.tsv"), "a", encoding="utf-8") as f:
+        f.write(f"{now.isoformat(timespec='seconds')}\t{path}\t{dest}\t{reason}\n")
+    return dest
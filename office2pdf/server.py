@@ -0,0 +1,536 @@
+"""
+ローカルの変換サーバー（標準ライブラリの http.server だけで動く）。
+
+    python -m office2pdf --serve [--port 8765] [--workers 2] [--queue 16]
+
+他のツールから HTTP で変換を頼むための入口。1ジョブ = 1バッチ（BatchEngine.run）で、
+ワーカースレッドごとに OfficePool を持ち続けるので、ジョブのたびに Office を起動し直さない。
+
+    POST   /jobs                     {"preset": 名前} または {"config": {JOB_FIELDS の項目…}} → 201 {"id", …}
+    PUT    /jobs/<id>/files/<名前>   ファイル本体（Content-Length 必須。ディスクへ少しずつ書く）
+    POST   /jobs/<id>/start          キューに入れる → 202（キューが一杯なら 429 + Retry-After）
+    GET    /jobs/<id>                状態（uploading / queued / running / done / failed / cancelled）と進捗・出力名
+    GET    /jobs/<id>/output/<名前>  出力 PDF のダウンロード
+    DELETE /jobs/<id>                取り消して削除
+    GET    /health                   キューの長さなど
+
+キューは上限付き（queue_size）。一杯の時は新しいジョブの作成も開始も 429 で断る（呼び出し側が待ってやり直す）。
+アップロード中（start 前）のジョブも max_uploading 件までで、超えた作成は 429。1ジョブのファイルは max_files 個まで（超えたら 413）。
+出力先は常にジョブのフォルダ（設定の出力先・自動で開くなどは無視する）。
+リクエストで変えられるのは出力の中身に関わる項目（JOB_FIELDS）だけで、それ以外の項目・型の違う値は 400 で断る
+（キャッシュ・記録・隔離の置き場所や Office の制限時間はサーバーを起動した時の設定のまま）。
+終わったジョブと、ttl 秒アップロードも start も無いジョブは削除する。既定では 127.0.0.1 でだけ待ち受ける。
+"""
+
+import dataclasses
+import json
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from .config import AppConfig
+from .engine import BatchEngine, make_file_info
+from .office_pool import OfficeBackend, OfficePool, com_apartment
+from .sheets import fill_excel_sheets
+
+COPY_CHUNK = 1024 * 1024
+
+# POST の JSON 本体の上限
+MAX_JSON_BYTES = 1024 * 1024
+
+# {"config": {...}} で変えてよい項目（出力の中身に関わるものだけ）
+JOB_FIELDS = {
+    "naming_tpl",
+    "compress_pdf",
+    "wm1_text",
+    "wm1_pos",
+    "wm2_text",
+    "wm2_pos",
+    "wm_font",
+    "wm_size",
+    "wm_color",
+    "wm_alpha",
+    "pg_enabled",
+    "pg_pos",
+    "pg_format",
+    "merge_all",
+    "split_word_page",
+    "split_ppt_page",
+    "split_pdf_page",
+    "split_excel_sheet",
+    "split_excel_page",
+    "password",
+    "excel_fit",
+    "excel_fit_tall",
+    "clear_metadata",
+    "image_dpi",
+    "image_quality",
+    "compact_output",
+}
+
+_COLOR = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+_ROUTE = re.compile(r"^/jobs(?:/([0-9a-f]{32})(?:/(files|output|start)(?:/([^/]+))?)?)?$")
+
+
+class BadRequest(ValueError):
+    """リクエストの中身が正しくない（400 で返す）"""
+
+
+def _check_value(name: str, value, default):
+    """value が default と同じ型（float の項目は int も可）でなければ BadRequest"""
+    if isinstance(default, bool):
+        ok = isinstance(value, bool)
+    elif isinstance(default, float):
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif isinstance(default, int):
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, type(default))
+    if not ok:
+        raise BadRequest(f"{name}: expected {type(default).__name__}")
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0:
+        raise BadRequest(f"{name}: must not be negative")
+    if name == "wm_color" and not _COLOR.match(value):
+        raise BadRequest(f"{name}: expected #RRGGBB")
+
+
+def _safe_name(name: str) -> Optional[str]:
+    """URL から来たファイル名を、ジョブのフォルダの外を指さない名前にする（使えなければ None）"""
+    name = os.path.basename(unquote(name).replace("\\", "/"))
+    if not name or name in (".", "..") or name.startswith("."):
+        return None
+    return name
+
+
+class Job:
+    def __init__(self, root: str, cfg: AppConfig):
+        self.id = uuid.uuid4().hex
+        self.dir = os.path.join(root, self.id)
+        self.in_dir = os.path.join(self.dir, "in")
+        self.out_dir = os.path.join(self.dir, "out")
+        os.makedirs(self.in_dir)
+        os.makedirs(self.out_dir)
+        self.cfg = dataclasses.replace(
+            cfg, out_mode="custom", output_dir=self.out_dir, auto_open=False, open_folder=False, clear_after=False
+        )
+        self.files: List[str] = []
+        self.state = "uploading"
+        self.progress = {"max": 0, "progress": 0, "label": ""}
+        self.outputs: List[str] = []
+        self.log: List[str] = []
+        self.error = ""
+        self.cancel_event = threading.Event()
+        self.created = time.time()
+        # 最後にアップロードを受けた時刻（start されないまま放置されたジョブを消す用）
+        self.touched = self.created
+        self.finished = 0.0
+
+    def status(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "files": [os.path.basename(p) for p in self.files],
+            "progress": dict(self.progress),
+            "outputs": [os.path.basename(p) for p in self.outputs],
+            "log": self.log[-20:],
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """ジョブの一覧・上限付きキュー・変換ワーカー"""
+
+    def __init__(
+        self,
+        backend: OfficeBackend,
+        root: str,
+        workers: int = 1,
+        queue_size: int = 16,
+        presets: Optional[Dict[str, dict]] = None,
+        base_cfg: Optional[AppConfig] = None,
+        ttl: float = 3600.0,
+        max_upload_mb: int = 512,
+        max_uploading: Optional[int] = None,
+        max_files: int = 1000,
+        font_map: Optional[Dict[str, Tuple[str, int]]] = None,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.backend = backend
+        self.root = root
+        self.presets = presets or {}
+        self.base_cfg = base_cfg or AppConfig(output_dir=root)
+        self.ttl = ttl
+        self.max_upload = max_upload_mb * 1024 * 1024
+        # start されていないジョブの数と1ジョブのファイル数の上限（ディスクを際限なく使わせない）
+        self.max_uploading = queue_size if max_uploading is None else max_uploading
+        self.max_files = max_files
+        self.font_map = font_map
+        self.log = log or (lambda msg: None)
+        self.jobs: Dict[str, Job] = {}
+        self.queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0}
+        os.makedirs(root, exist_ok=True)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"o2p-job-{n}", daemon=True) for n in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    # --- Jobs ---
+    def config_from(self, body: dict) -> AppConfig:
+        """
+        {"preset": 名前} または {"config": {...}}（どちらも無ければ既定の設定）。
+        どちらも JOB_FIELDS の項目だけを起動時の設定に重ねる。使えない項目・値は BadRequest
+        """
+        unknown = set(body) - {"preset", "config"}
+        if unknown:
+            raise BadRequest(f"unknown keys: {', '.join(sorted(unknown))}")
+        if body.get("preset"):
+            if body.get("config"):
+                raise BadRequest("give either preset or config")
+            name = body["preset"]
+            if not isinstance(name, str) or name not in self.presets:
+                raise BadRequest(f"unknown preset: {name}")
+            # プリセットはサーバーを起動した人の設定ファイルから読んだものだが、置き場所などは起動時の設定に揃える
+            return dataclasses.replace(
+                self.base_cfg, **{k: v for k, v in self.presets[name].items() if k in JOB_FIELDS}
+            )
+
+        changes = body.get("config") or {}
+        if not isinstance(changes, dict):
+            raise BadRequest("config must be a JSON object")
+        refused = set(changes) - JOB_FIELDS
+        if refused:
+            raise BadRequest(f"not allowed in config: {', '.join(sorted(refused))}")
+        for k, v in changes.items():
+            _check_value(k, v, getattr(self.base_cfg, k))
+        return dataclasses.replace(self.base_cfg, **changes)
+
+    def create(self, cfg: AppConfig) -> Optional[Job]:
+        """
+        ジョブを作る。キューが一杯か、アップロード中のジョブが max_uploading 件あれば None
+        （アップロードさせても待たせるだけなので断る）
+        """
+        self.expire()
+        with self._lock:
+            if self.queue.full() or self.uploading() >= self.max_uploading:
+                self.stats["rejected"] += 1
+                return None
+            job = Job(self.root, cfg)
+            self.jobs[job.id] = job
+        return job
+
+    def uploading(self) -> int:
+        return sum(j.state == "uploading" for j in list(self.jobs.values()))
+
+    def start(self, job: Job) -> bool:
+        if job.state != "uploading":
+            return True
+        job.state = "queued"
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            job.state = "uploading"
+            self.stats["rejected"] += 1
+            return False
+        self.stats["submitted"] += 1
+        return True
+
+    def delete(self, job: Job):
+        job.cancel_event.set()
+        with self._lock:
+            self.jobs.pop(job.id, None)
+        if job.state != "running":
+            shutil.rmtree(job.dir, ignore_errors=True)
+
+    def expire(self):
+        """終わってから ttl 秒たったジョブと、ttl 秒アップロードも start も無いジョブを消す"""
+        now = time.time()
+        with self._lock:
+            old = [
+                j
+                for j in self.jobs.values()
+                if (j.finished and now - j.finished > self.ttl)
+                or (j.state == "uploading" and now - j.touched > self.ttl)
+            ]
+        for job in old:
+            self.delete(job)
+
+    # --- Worker ---
+    def _worker(self):
+        pool = OfficePool(
+            self.backend,
+            max_uses=self.base_cfg.office_recycle_after,
+            log=self.log,
+            cancel_event=self._stop,
+            timeouts=self.base_cfg.office_timeouts,
+        )
+        with com_apartment(), pool:
+            while not self._stop.is_set():
+                job = self.queue.get()
+                if job is None:
+                    break
+                self._run(job, pool)
+
+    def _run(self, job: Job, pool: OfficePool):
+        if job.cancel_event.is_set():
+            job.state = "cancelled"
+            job.finished = time.time()
+            return
+        job.state = "running"
+        files = [make_file_info(p) for p in job.files]
+        fill_excel_sheets(files, use_com=False)
+        engine = BatchEngine(
+            # 並列変換のワーカーはジョブごとに作り直すことになるので、サーバーでは直列（並列数は workers で決める）
+            dataclasses.replace(job.cfg, parallel=False),
+            files,
+            backend=self.backend,
+            log=job.log.append,
+            progress=lambda **kw: job.progress.update(kw),
+            on_exists=lambda dest: False,
+            cancel_event=job.cancel_event,
+            font_map=self.font_map,
+            pool=pool,
+        )
+        try:
+            job.outputs = engine.run()
+            if job.cancel_event.is_set():
+                job.state = "cancelled"
+            else:
+                job.state = "done" if job.outputs else "failed"
+        except Exception as e:
+            job.error = str(e)
+            job.state = "failed"
+        self.stats["done" if job.state == "done" else "failed"] += 1
+        job.finished = time.time()
+        if job.id not in self.jobs:
+            # 実行中に削除された
+            shutil.rmtree(job.dir, ignore_errors=True)
+
+    def close(self):
+        self._stop.set()
+        for _ in self._threads:
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                break
+        for t in self._threads:
+            t.join(timeout=5)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "Office2PDF"
+    manager: JobManager
+
+    def log_message(self, fmt, *args):
+        self.manager.log(f"{self.address_string()} {fmt % args}")
+
+    def _json(self, code: int, body: dict, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _busy(self):
+        self._json(429, {"error": "queue full"}, {"Retry-After": "1"})
+
+    def _route(self) -> Tuple[Optional[Job], Optional[str], Optional[str], bool]:
+        """(ジョブ, 操作, 名前, パスが正しいか)。ジョブが無ければ 404 を返してある"""
+        m = _ROUTE.match(self.path.split("?", 1)[0])
+        if not m:
+            self._json(404, {"error": "not found"})
+            return None, None, None, False
+        job_id, action, name = m.groups()
+        job = None
+        if job_id:
+            job = self.manager.jobs.get(job_id)
+            if job is None:
+                self._json(404, {"error": "no such job"})
+                return None, None, None, False
+        return job, action, name, True
+
+    def _content_length(self) -> Optional[int]:
+        """Content-Length（無ければ -1）。数でなければ 400 を返して None"""
+        value = self.headers.get("Content-Length")
+        if value is None:
+            return -1
+        try:
+            n = int(value)
+        except ValueError:
+            n = -1
+        if n < 0:
+            self._json(400, {"error": "bad Content-Length"})
+            return None
+        return n
+
+    def _read_json(self) -> Optional[dict]:
+        n = self._content_length()
+        if n is None:
+            return None
+        if n > MAX_JSON_BYTES:
+            self._json(413, {"error": "body too large"})
+            return None
+        try:
+            body = json.loads(self.rfile.read(n) or b"{}") if n > 0 else {}
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            self._json(400, {"error": "body must be a JSON object"})
+            return None
+        return body
+
+    # --- Methods ---
+    def do_GET(self):
+        if self.path == "/health":
+            m = self.manager
+            self._json(
+                200,
+                {
+                    "queued": m.queue.qsize(),
+                    "queue_size": m.queue.maxsize,
+                    "uploading": m.uploading(),
+                    "jobs": len(m.jobs),
+                    **m.stats,
+                },
+            )
+            return
+        job, action, name, ok = self._route()
+        if not ok:
+            return
+        if job is None:
+            self._json(200, {"jobs": [j.status() for j in list(self.manager.jobs.values())]})
+        elif action is None:
+            self._json(200, job.status())
+        elif action == "output" and name:
+            by_name = {os.path.basename(p): p for p in job.outputs}
+            path = by_name.get(_safe_name(name) or "")
+            if job.state != "done" or path is None or not os.path.exists(path):
+                self._json(404, {"error": "no such output"})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, COPY_CHUNK)
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        job, action, name, ok = self._route()
+        if not ok:
+            return
+        if job is None and action is None:
+            body = self._read_json()
+            if body is None:
+                return
+            try:
+                cfg = self.manager.config_from(body)
+            except BadRequest as e:
+                self._json(400, {"error": f"bad config: {e}"})
+                return
+            job = self.manager.create(cfg)
+            if job is None:
+                self._busy()
+                return
+            self._json(201, job.status())
+        elif job is not None and action == "start":
+            if not job.files:
+                self._json(400, {"error": "no files"})
+            elif self.manager.start(job):
+                self._json(202, job.status())
+            else:
+                self._busy()
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_PUT(self):
+        job, action, name, ok = self._route()
+        if not ok:
+            return
+        if job is None or action != "files" or not name:
+            self._json(404, {"error": "not found"})
+            return
+        fname = _safe_name(name)
+        length = self._content_length()
+        if length is None:
+            return
+        if fname is None or make_file_info(fname) is None:
+            self._json(400, {"error": "unsupported file name"})
+        elif job.state != "uploading":
+            self._json(409, {"error": f"job is {job.state}"})
+        elif length < 0:
+            self._json(411, {"error": "Content-Length required"})
+        elif length > self.manager.max_upload:
+            self._json(413, {"error": "file too large"})
+        elif os.path.join(job.in_dir, fname) not in job.files and len(job.files) >= self.manager.max_files:
+            self._json(413, {"error": "too many files"})
+        else:
+            path = os.path.join(job.in_dir, fname)
+            job.touched = time.time()
+            # 本体はメモリに溜めずに少しずつディスクへ書き、書き終えてから名前を付ける
+            fd, tmp = tempfile.mkstemp(dir=job.in_dir, prefix=".upload_")
+            remaining = length
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    while remaining:
+                        chunk = self.rfile.read(min(COPY_CHUNK, remaining))
+                        if not chunk:
+                            raise ConnectionError("upload ended early")
+                        f.write(chunk)
+                        remaining -= len(chunk)
+                        job.touched = time.time()
+                os.replace(tmp, path)
+            except (OSError, ConnectionError) as e:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                self._json(400, {"error": str(e)})
+                return
+            if path not in job.files:
+                job.files.append(path)
+            self._json(201, {"id": job.id, "file": fname, "bytes": length})
+
+    def do_DELETE(self):
+        job, action, name, ok = self._route()
+        if not ok:
+            return
+        if job is None or action is not None:
+            self._json(404, {"error": "not found"})
+            return
+        self.manager.delete(job)
+        self._json(200, {"id": job.id, "state": "deleted"})
+
+
+def make_server(manager: JobManager, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"manager": manager})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(manager: JobManager, host: str = "127.0.0.1", port: int = 8765):
+    """Ctrl+C まで待ち受ける"""
+    server = make_server(manager, host, port)
+    manager.log(f"http://{host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.close()
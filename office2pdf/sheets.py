@@ -0,0 +1,150 @@
+"""
+Excel ブックのシート一覧（名前・表示状態・使用範囲・空かどうか）。
+
+.xlsx / .xlsm は zip 内の xl/workbook.xml と各シートの XML を直接読むので Excel を起動しない。
+複数ファイルはスレッドで並列に読む。Excel が必要なのは旧形式の .xls だけで、
+その場合も OfficePool で1インスタンスを使い回し、終わったら確実に閉じる。
+
+シート情報は dict: {"name", "kind"("worksheet"/"chart"), "visible", "empty", "dims"}
+（.xls は COM では空判定・使用範囲を取らないので empty=False / dims=""）。
+読めなかったファイルは None（変換時に従来どおり Excel 側で判断する）。
+"""
+
+import os
+import posixpath
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from xml.etree import ElementTree as ET
+
+from .office_pool import ComBackend, OfficeBackend, OfficePool, com_apartment
+
+OOXML_EXTS = (".xlsx", ".xlsm")
+
+# 中身が無くても印刷されるもの（グラフ・図形・画像）
+_DRAWING_TAGS = ("drawing", "legacyDrawing", "legacyDrawingHF", "picture")
+
+
+def _local(tag: str) -> str:
+    # 名前空間（Transitional / Strict で異なる）は見ない
+    return tag.rsplit("}", 1)[-1]
+
+
+def _attr(elem, name: str) -> Optional[str]:
+    for k, v in elem.attrib.items():
+        if _local(k) == name:
+            return v
+    return None
+
+
+def _scan_worksheet(zf: zipfile.ZipFile, part: str) -> dict:
+    """シートXMLを先頭から読み、使用範囲と「セルか図形が1つでもあるか」を調べる（見つかった時点で打ち切る）"""
+    dims = ""
+    empty = True
+    with zf.open(part) as fh:
+        for _, elem in ET.iterparse(fh, events=("start",)):
+            tag = _local(elem.tag)
+            if tag == "dimension":
+                dims = elem.get("ref", "")
+            elif tag == "c" or tag in _DRAWING_TAGS:
+                empty = False
+                break
+    return {"dims": dims, "empty": empty}
+
+
+def read_ooxml_sheets(path: str) -> List[dict]:
+    with zipfile.ZipFile(path) as zf:
+        rels = {}
+        with zf.open("xl/_rels/workbook.xml.rels") as fh:
+            for rel in ET.parse(fh).getroot():
+                target = rel.get("Target", "")
+                if target.startswith("/"):
+                    target = target.lstrip("/")
+                else:
+                    target = posixpath.normpath(posixpath.join("xl", target))
+                rels[rel.get("Id")] = (target, rel.get("Type", "").rsplit("/", 1)[-1])
+
+        sheets = []
+        with zf.open("xl/workbook.xml") as fh:
+            root = ET.parse(fh).getroot()
+        for elem in root.iter():
+            if _local(elem.tag) != "sheet":
+                continue
+            part, rel_type = rels.get(_attr(elem, "id"), ("", ""))
+            info = {
+                "name": elem.get("name", ""),
+                "kind": "chart" if rel_type == "chartsheet" else "worksheet",
+                "visible": elem.get("state", "visible") == "visible",
+                "empty": False,
+                "dims": "",
+            }
+            if info["kind"] == "worksheet" and part in zf.NameToInfo:
+                info.update(_scan_worksheet(zf, part))
+            sheets.append(info)
+    return sheets
+
+
+def read_com_sheets(
+    paths: Iterable[str], backend: Optional[OfficeBackend] = None
+) -> Dict[str, Optional[List[dict]]]:
+    """旧形式（.xls）用。Excel は1つだけ起動して使い回す（このスレッドで COM を初期化する）"""
+    out: Dict[str, Optional[List[dict]]] = {}
+    with com_apartment(), OfficePool(backend or ComBackend(), max_uses=0) as pool:
+        for p in paths:
+            try:
+                with pool.session("Excel") as excel:
+                    wb = excel.Workbooks.Open(os.path.abspath(p), ReadOnly=True)
+                    try:
+                        out[p] = [
+                            {"name": s.Name, "kind": "worksheet", "visible": s.Visible == -1, "empty": False, "dims": ""}
+                            for s in wb.Sheets
+                        ]
+                    finally:
+                        wb.Close(False)
+            except Exception:
+                out[p] = None
+    return out
+
+
+def read_sheets(
+    paths: Iterable[str], backend: Optional[OfficeBackend] = None, max_workers: int = 8, use_com: bool = True
+) -> Dict[str, Optional[List[dict]]]:
+    """paths のシート情報を {パス: [シート情報, ...]} で返す。use_com=False なら .xls は None のまま"""
+    ooxml, legacy = [], []
+    for p in paths:
+        (ooxml if os.path.splitext(p)[1].lower() in OOXML_EXTS else legacy).append(p)
+
+    def _read(p):
+        try:
+            return read_ooxml_sheets(p)
+        except Exception:
+            # 壊れた zip・パスワード付き（中身が暗号化されたOLE）など
+            return None
+
+    out: Dict[str, Optional[List[dict]]] = {}
+    if ooxml:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(ooxml))) as ex:
+            out.update(zip(ooxml, ex.map(_read, ooxml)))
+    if legacy and use_com:
+        out.update(read_com_sheets(legacy, backend))
+    return out
+
+
+def printable_sheets(sheet_info: List[dict]) -> List[str]:
+    """PDF化の対象になるシート（表示中で中身のあるワークシート）"""
+    return [s["name"] for s in sheet_info if s["kind"] == "worksheet" and s["visible"] and not s["empty"]]
+
+
+def fill_excel_sheets(files: List[dict], backend: Optional[OfficeBackend] = None, use_com: bool = True):
+    """
+    ファイルリストの Excel について "sheet_info" と "sheets"（PDF化するシート名）を埋める。
+    use_com=False なら .xls のために Excel を起動しない（変換時に Excel 側で判断する）。
+    """
+    targets = [f for f in files if f["type"] == "Excel" and f.get("sheet_info") is None]
+    if not targets:
+        return
+    found = read_sheets([f["path"] for f in targets], backend, use_com=use_com)
+    for f in targets:
+        f["sheet_info"] = found.get(f["path"])
+        if f["sheet_info"] is not None:
+            f["sheets"] = printable_sheets(f["sheet_info"])
@@ -0,0 +1,88 @@
+"""
+Form XObject による高速スタンプ。
+
+merge_page はページごとにコンテンツストリームを解析・書き直すので重い。
+ここでは透かしを Form XObject にして、各ページには
+「元のコンテンツを q … Q で囲み、/O2P_n Do で XObject を呼ぶ」短いストリームを足すだけにする。
+ページに依存しない透かしはページサイズごとに1つの XObject を全ページで共有する。
+"""
+
+from typing import List
+
+from pypdf import PageObject, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+)
+
+from .templates import compile_template
+
+
+def is_page_invariant(tpl: str) -> bool:
+    """ページごとに値が変わるタグを含まない透かしは、全ページ同じ見た目"""
+    return compile_template(tpl).page_invariant
+
+
+def _stream(writer: PdfWriter, data: bytes) -> IndirectObject:
+    s = DecodedStreamObject()
+    s.set_data(data)
+    return writer._add_object(s)
+
+
+def page_to_form(writer: PdfWriter, page: PageObject) -> IndirectObject:
+    """reportlab で描いたオーバーレイの1ページを Form XObject として writer に登録する"""
+    form = DecodedStreamObject()
+    form.set_data(page.get_contents().get_data())
+    form = form.flate_encode()
+    mb = page.mediabox
+    form.update(
+        {
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/BBox"): ArrayObject([FloatObject(0), FloatObject(0), FloatObject(mb.width), FloatObject(mb.height)]),
+            # 同じオーバーレイ文書から clone したフォント等は writer 内で1つに共有される
+            NameObject("/Resources"): page["/Resources"].get_object().clone(writer),
+        }
+    )
+    return writer._add_object(form)
+
+
+class FormStamper:
+    """1つの writer 内で、前後を囲む q / Q ストリームを全ページで共有する"""
+
+    def __init__(self, writer: PdfWriter):
+        self.writer = writer
+        self._head = _stream(writer, b"q\n")
+        self._tails = {}
+
+    def _tail(self, n: int) -> IndirectObject:
+        if n not in self._tails:
+            body = b"Q\n" + b"".join(b"q /O2P_%d Do Q\n" % i for i in range(n))
+            self._tails[n] = _stream(self.writer, body)
+        return self._tails[n]
+
+    def stamp(self, page: PageObject, forms: List[IndirectObject]):
+        """writer に追加済みのページへ forms を上から重ねる"""
+        if not forms:
+            return
+
+        # /Resources や /XObject は他ページと共有されていることがあるので、書き換えずに複製する
+        res = DictionaryObject(page.get("/Resources", DictionaryObject()).get_object())
+        xobj = DictionaryObject(res.get("/XObject", DictionaryObject()).get_object())
+        for i, form in enumerate(forms):
+            xobj[NameObject(f"/O2P_{i}")] = form
+        res[NameObject("/XObject")] = xobj
+        page[NameObject("/Resources")] = res
+
+        contents = page.get("/Contents")
+        if contents is None:
+            parts = []
+        elif isinstance(contents.get_object(), ArrayObject):
+            parts = list(contents.get_object())
+        else:
+            parts = [contents]
+        page[NameObject("/Contents")] = ArrayObject([self._head] + parts + [self._tail(len(forms))])
@@ -0,0 +1,173 @@
+"""
+命名ルール・透かし・ページ番号のタグ置換。
+
+テンプレートは1回だけ字句に分解（compile_template、結果はキャッシュ）し、タグを3種類に分けておく:
+- バッチ中ずっと同じ     : 文字列そのもの、{username}、{date:…}（バッチ開始時刻で固定）
+- ファイルごとに決まる   : {name} {sheet} {parent} {fseq} {total}
+- ページ（呼び出し）ごと : {seq} {pseq} {ptotal} {rand}
+
+bind() で前の2種類を埋めた FileTemplate を作れば、ページごとの render() は数字を埋めるだけになる。
+"""
+
+import datetime
+import getpass
+import os
+import random
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+_TAG_RE = re.compile(r"{date:(.*?)}|{(\w+)}")
+
+FILE_TAGS = ("name", "sheet", "parent", "fseq", "total")
+PAGE_TAGS = ("seq", "pseq", "ptotal", "rand")
+
+# ページ番号の書式（{n} / {total}）はページ番号・総ページ数として読む
+PAGE_NUMBER_ALIASES = (("n", "pseq"), ("total", "ptotal"))
+
+_RAND = PAGE_TAGS.index("rand")
+
+# 字句: 文字列 / ("tag", 名前) / ("date", strftime 形式)
+Token = Union[str, Tuple[str, str]]
+
+
+@lru_cache(maxsize=1)
+def get_username() -> str:
+    try:
+        return os.getlogin()
+    except OSError:
+        # 端末を持たないスケジューラ/サービス実行では getlogin が失敗する
+        return getpass.getuser()
+
+
+def _strftime_fmt(fmt: str) -> str:
+    # yyyy-mm-dd HH:MM:SS → Pythonのstrftime形式
+    fmt = fmt.replace("yyyy", "%Y").replace("mm", "%m").replace("dd", "%d")
+    return fmt.replace("HH", "%H").replace("MM", "%M").replace("SS", "%S")
+
+
+class FileTemplate:
+    """1ファイル分のタグを埋めたテンプレート。render はページ（呼び出し）ごとの値だけ埋める"""
+
+    __slots__ = ("_pieces", "_slots", "_const")
+
+    def __init__(self, pieces: List[str], slots: List[Tuple[int, int]]):
+        self._pieces = pieces
+        self._slots = slots
+        self._const = "".join(pieces) if not slots else None
+
+    def render(self, seq: int, pseq: int, ptotal: int = 1) -> str:
+        if self._const is not None:
+            return self._const
+        out = self._pieces[:]
+        for pos, code in self._slots:
+            if code == _RAND:
+                out[pos] = f"{random.randint(0, 9999):04d}"
+            else:
+                out[pos] = str((seq, pseq, ptotal)[code])
+        return "".join(out)
+
+
+class Template:
+    """字句に分解済みのテンプレート（compile_template で作る）"""
+
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.has_date = any(isinstance(t, tuple) and t[0] == "date" for t in tokens)
+        # ページごとに値が変わるタグを含まなければ、1つの出力の中では全ページ同じ文字列になる
+        # （{ptotal} は出力ごとに決まる）
+        self.page_invariant = not any(isinstance(t, tuple) and t[1] in ("seq", "pseq", "rand") for t in tokens)
+        self._static: Optional[Tuple[Optional[datetime.datetime], List[Token]]] = None
+
+    def _resolve_static(self, now: Optional[datetime.datetime]) -> List[Token]:
+        """{username} と {date:…} を文字列にした字句（同じ now なら使い回す）"""
+        if now is None and self.has_date:
+            now = datetime.datetime.now()
+        if self._static is not None and (self._static[0] == now or not self.has_date):
+            return self._static[1]
+        out: List[Token] = []
+        for t in self.tokens:
+            if isinstance(t, tuple) and t[0] == "date":
+                out.append(now.strftime(t[1]))
+            elif t == ("tag", "username"):
+                out.append(get_username())
+            else:
+                out.append(t)
+        self._static = (now, out)
+        return out
+
+    def bind(self, u_info: dict, fseq: int, total: int = 1, now: Optional[datetime.datetime] = None) -> FileTemplate:
+        path = u_info["orig"]["path"]
+        per_file = {
+            "name": os.path.splitext(os.path.basename(path))[0],
+            "sheet": u_info.get("sheet", ""),
+            "parent": os.path.basename(os.path.dirname(path)),  # 親フォルダ名
+            "fseq": str(fseq),
+            "total": str(total),
+        }
+        # pieces は「文字列, 空き, 文字列, 空き, …」の並び。空き（slots）だけ render で埋める
+        pieces: List[str] = [""]
+        slots: List[Tuple[int, int]] = []
+        for t in self._resolve_static(now):
+            if isinstance(t, str):
+                pieces[-1] += t
+            elif t[1] in per_file:
+                pieces[-1] += per_file[t[1]]
+            else:
+                slots.append((len(pieces), PAGE_TAGS.index(t[1])))
+                pieces += ["", ""]
+        return FileTemplate(pieces, slots)
+
+    def render(
+        self,
+        u_info: dict,
+        seq: int,
+        fseq: int,
+        pseq: int,
+        ptotal: int = 1,
+        total: int = 1,
+        now: Optional[datetime.datetime] = None,
+    ) -> str:
+        return self.bind(u_info, fseq, total, now).render(seq, pseq, ptotal)
+
+
+@lru_cache(maxsize=256)
+def compile_template(tpl: str, aliases: Tuple[Tuple[str, str], ...] = ()) -> Template:
+    """
+    tpl を字句に分解する。知らないタグ（{foo}）はそのまま文字列として残す。
+    aliases: ((別名, タグ名), ...)。ページ番号書式の {n} → {pseq} など
+    """
+    alias = dict(aliases)
+    known = set(FILE_TAGS) | set(PAGE_TAGS) | {"username"}
+    tokens: List[Token] = []
+    pos = 0
+    for m in _TAG_RE.finditer(tpl):
+        if m.group(1) is not None:
+            tok: Token = ("date", _strftime_fmt(m.group(1)))
+        else:
+            name = alias.get(m.group(2), m.group(2))
+            if name not in known:
+                continue
+            tok = ("tag", name)
+        if m.start() > pos:
+            tokens.append(tpl[pos : m.start()])
+        tokens.append(tok)
+        pos = m.end()
+    if pos < len(tpl):
+        tokens.append(tpl[pos:])
+    return Template(tokens)
+
+
+def apply_tags(
+    tpl: str,
+    u_info: dict,
+    seq: int,
+    fseq: int,
+    pseq: int,
+    ptotal: int = 1,
+    total: int = 1,
+    now: Optional[datetime.datetime] = None,
+) -> str:
+    """1回だけ置換する時用（now を省略すると現在時刻）"""
+    return compile_template(tpl).render(u_info, seq, fseq, pseq, ptotal, total, now)
+
@@ -0,0 +1,193 @@
+"""
+ホットフォルダ（監視フォルダに置かれたファイルを自動で PDF にする常駐モード）。
+
+    python -m office2pdf --watch \\\\server\\to-PDF --preset 社内標準
+
+- フォルダは一定間隔で os.scandir して調べる（ポーリング。ネットワークドライブでも Linux でも動く）
+- コピー中のファイルを拾わないよう、サイズと更新日時が settle 秒変わらなくなってから処理する
+- その時点で揃ったファイルをまとめて1バッチとして BatchEngine に渡す（設定はプリセットのまま）
+- 終わった元ファイルは done/、失敗したものは failed/ に移す
+- Office は OfficePool を監視の間ずっと持ち続けるので、ファイルが届くたびに起動し直さない
+
+出力先が「元フォルダ」の設定だと出力が監視フォルダに置かれて再び拾われるので、
+その場合は監視フォルダの out/ に出力する。
+"""
+
+import dataclasses
+import datetime
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import AppConfig
+from .engine import BatchEngine, make_file_info
+from .i18n import I18N
+from .office_pool import OfficeBackend, OfficePool, com_apartment
+from .sheets import fill_excel_sheets
+
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+OUT_DIR = "out"
+
+# Office の一時ファイル（~$xxx.docx）や、書き出し途中の一時ファイル
+_IGNORED_PREFIXES = ("~$", ".")
+
+
+def _move_to(path: str, sub: str) -> str:
+    """path を同じフォルダの sub/ に移す（同名があれば日時を付ける）"""
+    d = os.path.join(os.path.dirname(path), sub)
+    os.makedirs(d, exist_ok=True)
+    dest = os.path.join(d, os.path.basename(path))
+    if os.path.exists(dest):
+        stem, ext = os.path.splitext(os.path.basename(path))
+        dest = os.path.join(d, f"{stem}_{datetime.datetime.now():%Y%m%d_%H%M%S_%f}{ext}")
+    shutil.move(path, dest)
+    return dest
+
+
+class HotFolder:
+    """
+    folders を監視して変換し続ける。run() は stop_event がセットされるまで戻らない。
+    interval: 調べる間隔（秒）、settle: 変化が止まってから処理するまでの秒数
+    """
+
+    def __init__(
+        self,
+        folders: Sequence[str],
+        cfg: AppConfig,
+        backend: OfficeBackend,
+        log: Optional[Callable[[str], None]] = None,
+        interval: float = 2.0,
+        settle: float = 5.0,
+        lang: str = "en",
+        font_map: Optional[Dict[str, Tuple[str, int]]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ):
+        self.folders = [os.path.abspath(f) for f in folders]
+        self.cfg = cfg
+        self.backend = backend
+        self.log = log or (lambda msg: None)
+        self.interval = interval
+        self.settle = settle
+        self.lang = lang
+        self.font_map = font_map
+        self.stop_event = stop_event or threading.Event()
+        # パス → (サイズ, 更新日時, 最後に変化を見た時刻)
+        self._seen: Dict[str, Tuple[int, int, float]] = {}
+        self.stats = {"batches": 0, "done": 0, "failed": 0}
+
+    def _(self, key: str) -> str:
+        return I18N[self.lang].get(key, key)
+
+    def config_for(self, folder: str) -> AppConfig:
+        # 並列変換のワーカーはバッチごとに作り直すので、Office を温めておけない。監視中は直列で変換する
+        cfg = dataclasses.replace(self.cfg, parallel=False)
+        if cfg.out_mode == "original":
+            cfg.out_mode, cfg.output_dir = "custom", os.path.join(folder, OUT_DIR)
+        return cfg
+
+    def poll(self, folder: str) -> List[str]:
+        """folder の直下で、変化が settle 秒止まっている対応ファイルを名前順に返す"""
+        now = time.monotonic()
+        ready = []
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name.lower())
+        except OSError:
+            return ready
+        present = set()
+        for e in entries:
+            if e.name.startswith(_IGNORED_PREFIXES) or make_file_info(e.path) is None:
+                continue
+            try:
+                if not e.is_file():
+                    continue
+                st = e.stat()
+            except OSError:
+                continue
+            present.add(e.path)
+            prev = self._seen.get(e.path)
+            if prev is None or prev[:2] != (st.st_size, st.st_mtime_ns):
+                self._seen[e.path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - prev[2] >= self.settle and self._readable(e.path):
+                ready.append(e.path)
+        for p in [p for p in self._seen if os.path.dirname(p) == folder and p not in present]:
+            del self._seen[p]
+        return ready
+
+    @staticmethod
+    def _readable(path: str) -> bool:
+        # 書き込み中で開けないもの（共有違反）は次の回に回す
+        try:
+            with open(path, "rb"):
+                return True
+        except OSError:
+            return False
+
+    def process(self, folder: str, paths: List[str], pool: OfficePool) -> List[str]:
+        """paths を1バッチとして変換し、元ファイルを done/ か failed/ に移す。出力のパスを返す"""
+        files = [make_file_info(p) for p in paths]
+        fill_excel_sheets(files, use_com=False)
+        self.log(f"{self._('log_watch_batch')} {folder} ({len(files)})")
+        engine = BatchEngine(
+            self.config_for(folder),
+            files,
+            backend=self.backend,
+            log=self.log,
+            on_exists=lambda dest: False,
+            cancel_event=self.stop_event,
+            lang=self.lang,
+            font_map=self.font_map,
+            pool=pool,
+            keep_going=True,
+        )
+        outputs: List[str] = []
+        try:
+            outputs = engine.run()
+        except Exception as e:
+            self.log(f"{self._('log_fatal')}: {e}")
+        if self.stop_event.is_set():
+            # 止めたバッチの元ファイルはそのまま残し、次に起動した時にやり直す
+            return outputs
+        self.stats["batches"] += 1
+        # 1ファイルの失敗ではバッチは止まらない（keep_going）。元ファイルはそれぞれの結果で振り分ける
+        for i, p in enumerate(paths):
+            ok = i in engine.finished
+            try:
+                _move_to(p, DONE_DIR if ok else FAILED_DIR)
+            except OSError as e:
+                self.log(f"{self._('log_watch_move_fail')} {os.path.basename(p)}: {e}")
+            if ok:
+                self.stats["done"] += 1
+            else:
+                self.stats["failed"] += 1
+                self.log(f"{self._('log_watch_failed')} {os.path.basename(p)}")
+            self._seen.pop(p, None)
+        return outputs
+
+    def run(self):
+        for folder in self.folders:
+            os.makedirs(folder, exist_ok=True)
+            self.log(f"{self._('log_watch_start')} {folder}")
+        pool = OfficePool(
+            self.backend,
+            max_uses=self.cfg.office_recycle_after,
+            log=self.log,
+            cancel_event=self.stop_event,
+            timeouts=self.cfg.office_timeouts,
+            lang=self.lang,
+        )
+        # Office は監視している間ずっと温めておく（このスレッドの STA で使う）
+        with com_apartment(), pool:
+            while not self.stop_event.is_set():
+                for folder in self.folders:
+                    paths = self.poll(folder)
+                    if paths and not self.stop_event.is_set():
+                        self.process(folder, paths, pool)
+                self.stop_event.wait(self.interval)
+        self.log(self._("log_watch_stop"))
+
+    def stop(self):
+        self.stop_event.set()